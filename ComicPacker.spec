@@ -9,13 +9,33 @@ a = Analysis(
     datas=[('requirements.txt', '.')],
     hiddenimports=[
         'pack_comic',
+        'archive_source',
+        'cbz_writer',
+        'discovery',
+        'engine',
+        'image_probe',
+        'memory_budget',
+        'metadata',
+        'page_cache',
+        'progress',
+        'retag',
+        'state_store',
+        'stats',
+        'transcode',
+        'verify',
         'version',
+        'watcher',
+        'worker_pool',
         'cbz.comic',
         'cbz.constants',
+        'cbz.models',
         'cbz.page',
+        'xmltodict',
         'PIL',
         'PIL.Image',
         'PIL.ImageOps',
+        'py7zr',
+        'zstandard',
     ],
     hookspath=[],
     hooksconfig={},
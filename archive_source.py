@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 压缩包来源
+以统一的接口读取ZIP、7z和TAR压缩包中的图片，并按路径顺序直接流式写入CBZ，无需解压到临时目录。
+压缩包可以是文件路径，也可以是内存中的数据或文件对象（例如标准输入）
+"""
+
+import io
+import posixpath
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from cbz.constants import PageType
+
+import discovery
+from cbz_writer import COPY_BUFFER_SIZE, CBZWriter
+from discovery import is_image_member, member_sort_key, split_archive_name
+from memory_budget import estimate_reorder_peak
+from stats import stage
+
+# 通过文件头识别压缩包格式：(偏移, 魔数, 后缀)。gzip等压缩格式按压缩的TAR处理
+ARCHIVE_SIGNATURES = (
+    (0, b"PK\x03\x04", ".zip"),
+    # 不含任何成员的ZIP
+    (0, b"PK\x05\x06", ".zip"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".tar.gz"),
+    (0, b"BZh", ".tar.bz2"),
+    (0, b"\xfd7zXZ\x00", ".tar.xz"),
+    (0, b"\x28\xb5\x2f\xfd", ".tar.zst"),
+    (257, b"ustar", ".tar"),
+)
+# 事先不知道页面顺序的来源（single_pass）在未设置内存预算时，暂存的页面最多使用的内存字节数，
+# 超出部分暂存到临时文件，使内存占用不随压缩包大小增长
+SINGLE_PASS_MEMORY = 64 * 1024 * 1024
+
+
+class BufferReader(io.BufferedIOBase):
+    """以只读文件对象的形式访问内存中的数据，不复制整个缓冲区
+
+    read返回所请求范围的副本，readview返回原缓冲区的memoryview切片，
+    复制ZIP成员的原始压缩数据时使用readview，页面数据不会被复制。
+
+    Example:
+        with open_archive(BufferReader(data)) as source:
+            ...
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        """
+        Args:
+            data (Union[bytes, bytearray, memoryview]): 支持缓冲区协议的连续内存数据
+        """
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"无效的whence: {whence}")
+        if position < 0:
+            raise ValueError(f"无效的位置: {position}")
+        self._position = position
+        return position
+
+    def readview(self, size: int = -1) -> memoryview:
+        """读取至多size个字节（为负数时读到末尾），返回原缓冲区的切片，不复制数据"""
+        start = min(self._position, len(self._view))
+        end = len(self._view) if size < 0 else min(start + size, len(self._view))
+        self._position = max(self._position, end)
+        return self._view[start:end]
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return bytes(self.readview(-1 if size is None else size))
+
+    read1 = read
+
+    def readinto(self, buffer) -> int:
+        data = self.readview(len(buffer))
+        memoryview(buffer).cast("B")[: len(data)] = data
+        return len(data)
+
+    readinto1 = readinto
+
+
+def sniff_archive_suffix(fileobj: BinaryIO) -> str:
+    """根据文件头识别压缩包格式，读取后回到原来的位置
+
+    Args:
+        fileobj (BinaryIO): 可以seek的二进制文件对象
+
+    Returns:
+        str: 对应格式的后缀，例如".zip"
+
+    Raises:
+        ValueError: 无法识别的格式
+    """
+    position = fileobj.tell()
+    header = fileobj.read(262)
+    fileobj.seek(position)
+    for offset, magic, suffix in ARCHIVE_SIGNATURES:
+        if header[offset : offset + len(magic)] == magic:
+            return suffix
+    raise ValueError("无法识别的压缩包格式")
+
+
+class ArchiveSource:
+    """压缩包来源基类
+
+    子类声明支持的后缀并实现list_members和copy_pages，通过register_archive_source注册后，
+    pack_compressed_comic_to_cbz即可处理对应格式的压缩包。
+
+    Example:
+        with open_archive(path) as source:
+            with CBZWriter(output_path, comic) as writer:
+                source.copy_pages(writer)
+    """
+
+    # 支持的小写文件后缀，包含多级后缀（如".tar.gz"）
+    suffixes: tuple[str, ...] = ()
+    # 为True时列出成员需要完整读取压缩包，copy_pages在同一次读取中确定页面顺序，
+    # 调用方不应在copy_pages之前调用image_names或estimate_memory
+    single_pass: bool = False
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 压缩包路径，或可以seek的二进制文件对象
+        """
+        if hasattr(path, "read"):
+            self.fileobj: Optional[BinaryIO] = path
+            name = getattr(path, "name", None)
+            self.path = Path(name) if isinstance(name, str) else None
+        else:
+            self.fileobj = None
+            self.path = Path(path)
+        self._members: Optional[list[tuple[str, int]]] = None
+        self._names: Optional[list[str]] = None
+
+    def __enter__(self) -> "ArchiveSource":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        """压缩包文件名，用于错误信息，输入为内存数据时为空字符串"""
+        return self.path.name if self.path is not None else ""
+
+    def size(self) -> int:
+        """压缩包的字节数"""
+        if self.fileobj is None:
+            return self.path.stat().st_size
+        position = self.fileobj.tell()
+        size = self.fileobj.seek(0, io.SEEK_END)
+        self.fileobj.seek(position)
+        return size
+
+    def _rewind(self) -> BinaryIO:
+        """将输入的文件对象定位到开头，用于再次从头读取"""
+        self.fileobj.seek(0)
+        return self.fileobj
+
+    def close(self) -> None:
+        """释放压缩包占用的资源，输入的文件对象由调用方关闭"""
+
+    def list_members(self) -> list[tuple[str, int]]:
+        """按存储顺序列出压缩包中所有普通文件的成员路径和解压后大小"""
+        raise NotImplementedError
+
+    def image_members(self) -> list[tuple[str, int]]:
+        """按存储顺序排列的图片成员路径和解压后大小"""
+        if self._members is None:
+            self._members = [
+                (name, size) for name, size in self.list_members() if is_image_member(name)
+            ]
+        return self._members
+
+    def image_names(self) -> list[str]:
+        """按路径顺序排列的图片成员路径，包括子文件夹中的图片"""
+        if self._names is None:
+            names = dict.fromkeys(name for name, _ in self.image_members())
+            self._names = sorted(names, key=member_sort_key)
+        return self._names
+
+    def estimate_memory(self) -> int:
+        """估算使用内存路径打包时的内存峰值，只使用成员列表，不读取页面
+
+        默认按顺序读取估算：提前到达的页面需要在内存中等待前面的页面写入。
+        """
+        return estimate_reorder_peak(self.image_members(), self.image_names())
+
+    def copy_pages(
+        self,
+        writer: CBZWriter,
+        type: PageType = PageType.STORY,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        """将所有图片成员按路径顺序写入CBZ
+
+        Args:
+            writer (CBZWriter): 目标CBZ写入器
+            type (PageType, optional): 页面类型。默认为STORY
+            memory_limit (int, optional): 缓冲页面可使用的内存字节数。为None时整页在内存中处理；
+                否则页面分块流式写入，超出部分暂存到临时文件。single_pass为True的来源
+                无法事先估算内存峰值，应直接传入内存预算，为None时暂存的页面最多使用
+                SINGLE_PASS_MEMORY的内存
+        """
+        raise NotImplementedError
+
+
+class _PageReorderBuffer:
+    """将按压缩包存储顺序到达的页面按路径顺序写入CBZ
+
+    压缩包只能顺序解压时，已到达但尚未轮到的页面需要暂存。存储顺序与路径顺序一致
+    （最常见的情况）时，每个页面到达后立即写入。设置memory_limit时，页面暂存在
+    内存中的总大小不超过该值，其余页面暂存到临时文件。
+
+    事先不知道页面列表时（names为None），所有到达的页面都先暂存，
+    在finish中按路径排序后再依次写入。
+    """
+
+    def __init__(
+        self,
+        writer: CBZWriter,
+        names: Optional[list[str]],
+        type: PageType,
+        memory_limit: Optional[int] = None,
+    ):
+        self._writer = writer
+        self._names = names
+        self._wanted = set(names) if names is not None else None
+        self._type = type
+        self._index = 0
+        self._pending: dict[str, Union[bytes, BinaryIO]] = {}
+        self._memory_limit = memory_limit
+        self._memory = 0
+        # 暂存在内存中的页面字节数（包括整页传入的页面）的峰值
+        self.peak_memory = 0
+        # 使用内存的暂存文件 -> 计入预算的字节数。按暂存文件而不是成员路径记录，
+        # 重复的成员各自分配暂存文件，不会覆盖前一个的记录
+        self._in_memory: dict[BinaryIO, int] = {}
+        # 7z的多个数据块可能在不同线程中并行解压
+        self._lock = threading.Lock()
+
+    def open_spool(self, size: int) -> BinaryIO:
+        """为即将到达的页面分配暂存文件，内存预算足够时使用内存，否则使用临时文件"""
+        with self._lock:
+            if self._memory_limit is None or self._memory + size <= self._memory_limit:
+                spool = io.BytesIO()
+                self._memory += size
+                self.peak_memory = max(self.peak_memory, self._memory)
+                self._in_memory[spool] = size
+                return spool
+        return tempfile.TemporaryFile()
+
+    def _release(self, spool: BinaryIO) -> None:
+        """关闭暂存文件并归还其占用的内存预算"""
+        spool.close()
+        self._memory -= self._in_memory.pop(spool, 0)
+
+    def push(self, name: str, data: Union[bytes, BinaryIO]) -> None:
+        """接收一个已解压的成员，写入所有已经轮到的页面
+
+        Args:
+            name (str): 成员路径
+            data (Union[bytes, BinaryIO]): 页面内容，或由open_spool分配并已写入页面内容的文件
+        """
+        with self._lock:
+            wanted = self._wanted is None or name in self._wanted
+            if not wanted or name in self._pending:
+                # 重复的成员只使用第一次出现的内容
+                if not isinstance(data, bytes):
+                    self._release(data)
+                return
+            self._pending[name] = data
+            if isinstance(data, bytes):
+                self._memory += len(data)
+                self.peak_memory = max(self.peak_memory, self._memory)
+            if self._names is not None:
+                self._flush()
+
+    def _flush(self) -> None:
+        """按顺序写入所有已经到达且轮到的页面"""
+        while self._index < len(self._names):
+            next_name = self._names[self._index]
+            if next_name not in self._pending:
+                break
+            self._write(next_name, self._pending.pop(next_name))
+            self._wanted.discard(next_name)
+            self._index += 1
+
+    def _write(self, name: str, data: Union[bytes, BinaryIO]) -> None:
+        base_name = posixpath.basename(name)
+        if isinstance(data, bytes):
+            self._writer.add_page(data, name=base_name, type=self._type)
+            self._memory -= len(data)
+            return
+
+        try:
+            data.seek(0)
+            self._writer.add_page_stream(data, name=base_name, type=self._type)
+        finally:
+            self._release(data)
+
+    def finish(self) -> None:
+        """确认所有页面都已写入，事先不知道页面列表时在此按路径顺序写入暂存的页面"""
+        if self._names is None:
+            self._names = sorted(self._pending, key=member_sort_key)
+            self._wanted = set(self._names)
+            self._flush()
+        if self._index < len(self._names):
+            raise ValueError(f"无法从压缩包中读取页面: {self._names[self._index]}")
+
+
+class ZipSource(ArchiveSource):
+    """ZIP压缩包来源，能够直接复制的成员（参见CBZWriter.can_copy_raw）复制原始压缩数据"""
+
+    suffixes = (".zip",)
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(self.fileobj or self.path, "r")
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def list_members(self) -> list[tuple[str, int]]:
+        return [
+            (info.filename, info.file_size)
+            for info in self._zip.infolist()
+            if not info.is_dir()
+        ]
+
+    def estimate_memory(self) -> int:
+        # ZIP可以随机访问，内存中只需要保留当前页面
+        return max((size for _, size in self.image_members()), default=0)
+
+    def copy_pages(
+        self,
+        writer: CBZWriter,
+        type: PageType = PageType.STORY,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        stream = memory_limit is not None
+        for name in self.image_names():
+            writer.copy_zip_member(self._zip, self._zip.getinfo(name), type=type, stream=stream)
+
+
+class TarSource(ArchiveSource):
+    """TAR压缩包来源，支持未压缩以及gzip、bzip2、xz和zstd压缩的TAR
+
+    未压缩的TAR先列出成员（跳过文件内容）再顺序读取，页面按路径顺序到达时立即写入。
+    压缩的TAR只解压一次：页面顺序要到读完整个压缩包才能确定，所有页面在此之前都需要暂存。
+    暂存的页面最多使用内存预算（未设置时为SINGLE_PASS_MEMORY）的内存，其余暂存到临时文件，
+    内存占用不随压缩包大小增长，代价是超出的页面多一次磁盘读写。
+    暂存的数据量为全部页面的大小，因此压缩的TAR不事先估算内存峰值（single_pass）。
+    zstd压缩在Python 3.14以下需要安装可选依赖zstandard。
+    """
+
+    suffixes = (
+        ".tar",
+        ".cbt",
+        ".tar.gz",
+        ".tgz",
+        ".tar.bz2",
+        ".tbz2",
+        ".tar.xz",
+        ".txz",
+        ".tar.zst",
+        ".tzst",
+    )
+
+    def __init__(self, path):
+        super().__init__(path)
+        if self.fileobj is not None:
+            suffix = sniff_archive_suffix(self._rewind())
+        else:
+            suffix = split_archive_name(self.path.name)[1]
+        self._zstd = suffix in (".tar.zst", ".tzst")
+        # 未压缩的TAR可以跳过文件内容列出成员，压缩的TAR只能在解压时读取成员
+        self.single_pass = suffix not in (".tar", ".cbt")
+
+    def _open(self, mode: str) -> tarfile.TarFile:
+        if self.fileobj is None:
+            return tarfile.open(self.path, mode)
+        return tarfile.open(fileobj=self._rewind(), mode=mode)
+
+    def _open_stream(self) -> tarfile.TarFile:
+        """以流模式打开TAR，只能按存储顺序顺序读取"""
+        if not self._zstd:
+            return self._open("r|*")
+        if sys.version_info >= (3, 14):
+            return self._open("r|zst")
+
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "读取.tar.zst压缩包需要安装zstandard: pip install zstandard"
+            ) from None
+        if self.fileobj is None:
+            fileobj, closefd = self.path.open("rb"), True
+        else:
+            fileobj, closefd = self._rewind(), False
+        reader = zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=closefd)
+        return tarfile.open(fileobj=reader, mode="r|")
+
+    def list_members(self) -> list[tuple[str, int]]:
+        if self._zstd:
+            with self._open_stream() as tar:
+                return [(member.name, member.size) for member in tar if member.isfile()]
+        # 未使用zstd时可随机访问，未压缩的TAR列出成员时会直接跳过文件内容
+        with self._open("r:*") as tar:
+            return [
+                (member.name, member.size)
+                for member in tar.getmembers()
+                if member.isfile()
+            ]
+
+    def copy_pages(
+        self,
+        writer: CBZWriter,
+        type: PageType = PageType.STORY,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        # 压缩的TAR不事先列出成员，页面顺序在读完后确定
+        names = None if self.single_pass else self.image_names()
+        if names is None and memory_limit is None:
+            # 所有页面都要暂存到读完为止，未设置预算时也不能全部留在内存中
+            memory_limit = SINGLE_PASS_MEMORY
+        buffer = _PageReorderBuffer(writer, names, type, memory_limit)
+        with self._open_stream() as tar:
+            for member in tar:
+                if not member.isfile() or not is_image_member(member.name):
+                    continue
+                with stage(writer.stats, "extract"):
+                    src = tar.extractfile(member)
+                    if memory_limit is None:
+                        data = src.read()
+                    else:
+                        data = buffer.open_spool(member.size)
+                        shutil.copyfileobj(src, data, COPY_BUFFER_SIZE)
+                buffer.push(member.name, data)
+        buffer.finish()
+
+
+class SevenZipSource(ArchiveSource):
+    """7z压缩包来源，需要安装可选依赖py7zr（纯Python实现）
+
+    成员在解压过程中直接交给CBZ写入器，不会写入磁盘。
+    """
+
+    suffixes = (".7z", ".cb7")
+
+    def __init__(self, path):
+        super().__init__(path)
+        try:
+            import py7zr
+        except ImportError:
+            raise ImportError("读取7z压缩包需要安装py7zr: pip install py7zr") from None
+
+        self._archive = py7zr.SevenZipFile(self.fileobj or self.path, "r")
+        if self._archive.needs_password():
+            self._archive.close()
+            raise ValueError(f"不支持加密的7z压缩包: {self.name}")
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def list_members(self) -> list[tuple[str, int]]:
+        return [
+            (info.filename, info.uncompressed)
+            for info in self._archive.list()
+            if not info.is_directory
+        ]
+
+    def copy_pages(
+        self,
+        writer: CBZWriter,
+        type: PageType = PageType.STORY,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        names = self.image_names()
+        buffer = _PageReorderBuffer(writer, names, type, memory_limit)
+        sizes = dict(self.image_members()) if memory_limit is not None else None
+        factory = _make_7z_factory(buffer, sizes)
+        stats = writer.stats
+        start = time.perf_counter()
+        recorded = sum(stats.stages.values()) if stats is not None else 0.0
+
+        self._archive.reset()
+        self._archive.extract(targets=names, factory=factory)
+        # 旧版本的py7zr不会在成员解压完成时调用close，在此补充写入
+        for product in factory.products:
+            product.close()
+        buffer.finish()
+
+        # 解压与写入交替进行，解压耗时为总耗时减去写入页面时已记录的耗时
+        if stats is not None:
+            elapsed = time.perf_counter() - start
+            stats.stages["extract"] += elapsed - (sum(stats.stages.values()) - recorded)
+
+
+def _make_7z_factory(buffer: _PageReorderBuffer, sizes: Optional[dict[str, int]]):
+    """创建py7zr的WriterFactory，成员解压完成后立即交给buffer
+
+    Args:
+        buffer (_PageReorderBuffer): 页面重排缓冲
+        sizes (dict[str, int], optional): 成员解压后大小。为None时成员整个保存在内存中，
+            否则通过buffer.open_spool分配暂存文件
+    """
+    from py7zr.io import Py7zIO, WriterFactory
+
+    class MemberIO(Py7zIO):
+        def __init__(self, name):
+            self.name = name
+            if sizes is None:
+                self._file = io.BytesIO()
+            else:
+                self._file = buffer.open_spool(sizes.get(name, 0))
+            self._done = False
+
+        def write(self, s):
+            return self._file.write(s)
+
+        def read(self, size=None):
+            return self._file.read(size)
+
+        def seek(self, offset, whence=0):
+            return self._file.seek(offset, whence)
+
+        def flush(self):
+            pass
+
+        def size(self):
+            position = self._file.tell()
+            end = self._file.seek(0, io.SEEK_END)
+            self._file.seek(position)
+            return end
+
+        def close(self):
+            if self._done:
+                return
+            self._done = True
+            data = self._file.getvalue() if sizes is None else self._file
+            buffer.push(self.name, data)
+
+    class MemberFactory(WriterFactory):
+        def __init__(self):
+            # 重复的成员各自创建一个MemberIO，按路径保存会丢失前一个
+            self.products = []
+
+        def create(self, filename):
+            product = MemberIO(filename)
+            self.products.append(product)
+            return product
+
+    return MemberFactory()
+
+
+# 已注册的压缩包来源，按顺序匹配后缀
+ARCHIVE_SOURCES: list[type[ArchiveSource]] = [ZipSource, TarSource, SevenZipSource]
+
+
+def register_archive_source(source: type[ArchiveSource]) -> type[ArchiveSource]:
+    """注册新的压缩包来源，可作为类装饰器使用
+
+    注册后其后缀也会加入批量处理时识别的压缩包格式。
+
+    Args:
+        source (type[ArchiveSource]): ArchiveSource的子类
+
+    Returns:
+        type[ArchiveSource]: 原样返回source
+    """
+    ARCHIVE_SOURCES.insert(0, source)
+    discovery.ARCHIVE_EXTENSIONS_SET.update(source.suffixes)
+    return source
+
+
+def as_archive_file(data) -> BinaryIO:
+    """将内存数据或文件对象转换为可以seek的文件对象
+
+    bytes、bytearray和memoryview使用BufferReader包装，不复制数据；
+    不能seek的文件对象（例如管道）一次性读入内存，不会写入临时文件。
+
+    Args:
+        data: 内存中的压缩包数据或二进制文件对象
+
+    Returns:
+        BinaryIO: 可以seek的二进制文件对象
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return BufferReader(data)
+    if not data.seekable():
+        # ZIP和7z的目录位于末尾，只能在读完所有数据后解析
+        return BufferReader(data.read())
+    return data
+
+
+def open_archive(path, name: Optional[str] = None) -> ArchiveSource:
+    """按文件后缀打开压缩包来源
+
+    Args:
+        path: 压缩包路径、内存中的压缩包数据（bytes、bytearray、memoryview）或二进制文件对象
+        name (str, optional): 文件名，输入不是路径时用于从后缀判断格式。
+            未指定且文件对象没有文件名时按文件头识别格式
+
+    Returns:
+        ArchiveSource: 压缩包来源，使用完毕后需要关闭。输入的文件对象由调用方关闭
+
+    Raises:
+        ValueError: 不支持的压缩包格式
+    """
+    if isinstance(path, (bytes, bytearray, memoryview)) or hasattr(path, "read"):
+        path = as_archive_file(path)
+        name = name or getattr(path, "name", None)
+        suffix = split_archive_name(name)[1] if isinstance(name, str) else ""
+        if not any(suffix in source.suffixes for source in ARCHIVE_SOURCES):
+            suffix = sniff_archive_suffix(path)
+    else:
+        name = Path(path).name
+        suffix = split_archive_name(name)[1]
+    for source in ARCHIVE_SOURCES:
+        if suffix in source.suffixes:
+            return source(path)
+    raise ValueError(f"不支持的压缩包格式: {name}")
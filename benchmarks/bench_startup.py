@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 启动时间基准测试
+测量 `python -X importtime main.py --version` 的导入耗时和命令行启动耗时，并与保存的基线比较
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+MAIN_SCRIPT = ROOT_DIR / "main.py"
+
+DEFAULT_BASELINE = BENCHMARK_DIR / "startup_baseline.json"
+
+# 测量的命令行参数
+COMMANDS = {"version": ["--version"], "help": ["--help"]}
+
+# 启动阶段不应导入的重量级模块，出现时视为回退
+FORBIDDEN_MODULES = ("cbz", "PIL", "pack_comic", "sqlite3", "concurrent.futures")
+
+# importtime输出行，例如 "import time:       230 |        433 | stats"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """解析-X importtime的输出
+
+    Returns:
+        tuple[float, dict[str, float], set[str]]: 所有模块自身耗时之和(ms)、
+            顶层模块的累计耗时(ms)以及导入的全部模块
+    """
+    total_us = 0
+    top_level = {}
+    imported = set()
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total_us += int(self_us)
+        imported.add(module)
+        # 顶层模块的缩进为一个空格
+        if len(indent) == 1:
+            top_level[module] = int(cumulative_us) / 1000
+    return total_us / 1000, top_level, imported
+
+
+def measure_importtime():
+    """运行一次 `python -X importtime main.py --version`，返回导入耗时和导入的模块"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN_SCRIPT), "--version"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_wall(args):
+    """测量一次命令行调用从启动到退出的耗时(ms)"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(MAIN_SCRIPT), *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def imported_forbidden(modules):
+    """返回启动阶段导入的重量级模块"""
+    return [
+        forbidden
+        for forbidden in FORBIDDEN_MODULES
+        if any(name == forbidden or name.startswith(forbidden + ".") for name in modules)
+    ]
+
+
+def run(repeat):
+    """多次测量并取最小值，减少系统噪声的影响"""
+    # 预热一次，使后续测量使用已编译的字节码和文件系统缓存
+    measure_importtime()
+
+    import_times = []
+    top_level = {}
+    imported = set()
+    for _ in range(repeat):
+        total, modules, names = measure_importtime()
+        import_times.append(total)
+        imported |= names
+        for name, ms in modules.items():
+            top_level[name] = min(ms, top_level.get(name, ms))
+
+    results = {"import_ms": min(import_times)}
+    for name, args in COMMANDS.items():
+        results[f"{name}_ms"] = min(measure_wall(args) for _ in range(repeat))
+
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)
+    return results, dict(slowest[:10]), imported_forbidden(imported)
+
+
+def compare_with_baseline(results, baseline, tolerance, slack_ms):
+    """与基线比较，返回超出容差的回退列表
+
+    每项指标允许增加 基线值×tolerance 与 slack_ms 中的较大者，避免毫秒级噪声导致误报。
+    """
+    regressions = []
+    for metric, current in results.items():
+        expected = baseline.get("results", {}).get(metric)
+        if not expected:
+            continue
+        if current - expected > max(expected * tolerance, slack_ms):
+            regressions.append((metric, expected, current, (current - expected) / expected))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComicPacker 启动时间基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="每项测量的重复次数，取最快一次 (默认: 10)")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线JSON文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为新的基线")
+    parser.add_argument("--check", action="store_true", help="检查模式：基线不存在时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的启动耗时回退比例 (默认: 0.2)")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="允许的最小回退毫秒数 (默认: 5)")
+    args = parser.parse_args()
+    if args.check and args.save_baseline:
+        parser.error("--check 不能与 --save-baseline 同时使用")
+
+    results, slowest, forbidden = run(args.repeat)
+    report = {
+        "python": sys.version.split()[0],
+        "results": results,
+        "slowest_imports": slowest,
+        "forbidden_imports": forbidden,
+    }
+
+    print(f"{'指标':<14}{'耗时(ms)':>10}")
+    for metric, ms in results.items():
+        print(f"{metric:<14}{ms:>10.1f}")
+    print("\n最慢的顶层导入:")
+    for name, ms in slowest.items():
+        print(f"    {name:<28}{ms:>8.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n结果已保存: {args.output}")
+
+    failed = False
+    if forbidden:
+        print(f"\n[-] `main.py --version` 导入了重量级模块: {', '.join(forbidden)}")
+        failed = True
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"基线已更新: {baseline_path}")
+    elif not baseline_path.exists():
+        print(f"\n{'[-] ' if args.check else ''}未找到基线文件 {baseline_path}，使用 --save-baseline 创建")
+        failed = args.check
+    else:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print(f"\n[-] 检测到启动时间回退 (容差 {args.tolerance:.0%}):")
+            for metric, expected, current, change in regressions:
+                print(f"    {metric}: {expected:.1f} -> {current:.1f} ms ({change:+.1%})")
+            failed = True
+        else:
+            print(f"\n[+] 与基线相比没有超出容差 ({args.tolerance:.0%}) 的启动时间回退")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成漫画生成器
+在本地生成用于基准测试的漫画文件夹和ZIP压缩包
+"""
+
+import argparse
+import random
+import zipfile
+from pathlib import Path
+
+from PIL import Image
+
+# 格式名到文件后缀的映射
+FORMAT_SUFFIXES = {
+    "jpeg": ".jpg",
+    "png": ".png",
+    "webp": ".webp",
+    "gif": ".gif",
+    "bmp": ".bmp",
+    "tiff": ".tif",
+}
+
+
+def parse_size(value):
+    """解析WxH格式的图片尺寸"""
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def make_page(width, height, seed):
+    """生成一张带噪声的页面图片，使其压缩后的大小接近真实扫描图"""
+    rng = random.Random(seed)
+    noise = Image.effect_noise((width, height), rng.randint(20, 80))
+    background = Image.new("L", (width, height), rng.randint(180, 255))
+    gray = Image.blend(background, noise, 0.35)
+    return Image.merge("RGB", (gray, gray, gray))
+
+
+def generate_folder(folder, pages, size, formats, seed=0):
+    """生成一个漫画文件夹
+
+    Args:
+        folder (Path): 输出文件夹
+        pages (int): 页数
+        size (tuple[int, int]): 页面尺寸
+        formats (list[str]): 轮流使用的图片格式
+        seed (int): 随机种子
+
+    Returns:
+        int: 生成的图片总字节数
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(pages):
+        fmt = formats[i % len(formats)]
+        path = folder / f"{i + 1:04d}{FORMAT_SUFFIXES[fmt]}"
+        image = make_page(*size, seed=seed * 100_000 + i)
+        if fmt == "gif":
+            image = image.convert("P")
+        image.save(path, fmt.upper())
+        total += path.stat().st_size
+    return total
+
+
+def generate_zip(zip_path, pages, size, formats, seed=0, compression=zipfile.ZIP_DEFLATED):
+    """生成一个漫画ZIP压缩包
+
+    Returns:
+        int: 压缩包中图片的总字节数
+    """
+    folder = zip_path.with_suffix("")
+    total = generate_folder(folder, pages, size, formats, seed)
+    with zipfile.ZipFile(zip_path, "w", compression) as zf:
+        for path in sorted(folder.iterdir()):
+            zf.write(path, path.name)
+    for path in folder.iterdir():
+        path.unlink()
+    folder.rmdir()
+    return total
+
+
+def generate_library(root, comics, pages, size, formats, zip_ratio=0.5):
+    """生成包含多个漫画文件夹和ZIP的输入目录，用于批量处理测试
+
+    Args:
+        root (Path): 输入目录
+        comics (int): 漫画数量
+        pages (int): 每本漫画的页数
+        size (tuple[int, int]): 页面尺寸
+        formats (list[str]): 图片格式
+        zip_ratio (float): ZIP压缩包所占比例
+
+    Returns:
+        int: 所有图片的总字节数
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    zip_count = int(comics * zip_ratio)
+    total = 0
+    for i in range(comics):
+        if i < zip_count:
+            total += generate_zip(root / f"comic-{i:04d}.zip", pages, size, formats, seed=i)
+        else:
+            total += generate_folder(root / f"comic-{i:04d}", pages, size, formats, seed=i)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于基准测试的合成漫画")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--comics", type=int, default=4, help="漫画数量 (默认: 4)")
+    parser.add_argument("--pages", type=int, default=50, help="每本漫画的页数 (默认: 50)")
+    parser.add_argument("--size", type=parse_size, default="1200x1800", help="页面尺寸WxH (默认: 1200x1800)")
+    parser.add_argument(
+        "--formats",
+        default="jpeg",
+        help=f"逗号分隔的图片格式，可选 {', '.join(FORMAT_SUFFIXES)} (默认: jpeg)",
+    )
+    parser.add_argument("--zip-ratio", type=float, default=0.5, help="ZIP压缩包所占比例 (默认: 0.5)")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    total = generate_library(
+        Path(args.output), args.comics, args.pages, args.size, formats, args.zip_ratio
+    )
+    print(f"已生成 {args.comics} 本漫画，共 {total / 1024 / 1024:.1f} MB: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 基准测试
+生成合成漫画，测量打包吞吐量和内存峰值，并与保存的基线比较
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from generate_comics import (  # noqa: E402
+    generate_folder,
+    generate_library,
+    generate_zip,
+    parse_size,
+)
+
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+# 比较基线时使用的指标，True表示越大越好
+COMPARED_METRICS = {"pages_per_s": True, "mb_per_s": True, "peak_rss_mb": False}
+
+
+def peak_rss_mb(children=False):
+    """获取当前进程（或已结束子进程）的内存峰值，单位MB"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    usage = resource.getrusage(who)
+    # Linux上ru_maxrss单位为KB，macOS上为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss * scale / 1024 / 1024
+
+
+def bench_pack_folder(workdir, repeat):
+    """测量pack_comic_to_cbz打包文件夹"""
+    from pack_comic import pack_comic_to_cbz
+
+    source = workdir / "folder"
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        pack_comic_to_cbz(
+            comic_path=source,
+            output_path=workdir / "out" / f"folder-{i}.cbz",
+            series="benchmark",
+            number=1,
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings), peak_rss_mb()
+
+
+def bench_pack_zip(workdir, repeat):
+    """测量pack_compressed_comic_to_cbz转换ZIP"""
+    from pack_comic import pack_compressed_comic_to_cbz
+
+    source = workdir / "comic.zip"
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        pack_compressed_comic_to_cbz(
+            compressed_path=source,
+            output_path=workdir / "out" / f"zip-{i}.cbz",
+            series="benchmark",
+            number=1,
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings), peak_rss_mb()
+
+
+def bench_batch(workdir, repeat, jobs="auto"):
+    """测量main.py批量处理整个输入目录"""
+    timings = []
+    for i in range(repeat):
+        output = workdir / "out" / f"batch-{i}"
+        start = time.perf_counter()
+        subprocess.run(
+            [
+                sys.executable,
+                str(ROOT_DIR / "main.py"),
+                "-ip",
+                str(workdir / "library"),
+                "-o",
+                str(output),
+                "--jobs",
+                str(jobs),
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings), peak_rss_mb(children=True)
+
+
+BENCHMARKS = {
+    "pack_folder": bench_pack_folder,
+    "pack_zip": bench_pack_zip,
+    "batch": bench_batch,
+}
+
+
+def prepare_workdir(workdir, args):
+    """生成测试数据，返回每个基准测试处理的页数和字节数"""
+    formats = args.formats.split(",")
+    (workdir / "out").mkdir(parents=True)
+    folder_bytes = generate_folder(workdir / "folder", args.pages, args.size, formats)
+    zip_bytes = generate_zip(workdir / "comic.zip", args.pages, args.size, formats, seed=1)
+    library_bytes = generate_library(
+        workdir / "library", args.comics, args.pages, args.size, formats
+    )
+    return {
+        "pack_folder": (args.pages, folder_bytes),
+        "pack_zip": (args.pages, zip_bytes),
+        "batch": (args.pages * args.comics, library_bytes),
+    }
+
+
+def run_child(name, workdir, args):
+    """在独立子进程中运行一个基准测试，保证内存峰值互不影响"""
+    cmd = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        "--child",
+        name,
+        "--workdir",
+        str(workdir),
+        "--repeat",
+        str(args.repeat),
+        "--jobs",
+        str(args.jobs),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"基准测试 {name} 运行失败:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def environment_info():
+    """收集运行环境信息，便于解释不同机器间的差异"""
+    info = {"python": platform.python_version(), "platform": platform.platform()}
+    for package in ("cbz", "Pillow"):
+        try:
+            info[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            info[package] = None
+    return info
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """与基线比较，返回超出容差的回退列表"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, expected = result.get(metric), base.get(metric)
+            if not current or not expected:
+                continue
+            change = (current - expected) / expected
+            if (higher_is_better and change < -tolerance) or (
+                not higher_is_better and change > tolerance
+            ):
+                regressions.append((name, metric, expected, current, change))
+    return regressions
+
+
+def print_results(results):
+    """打印结果表格"""
+    print(f"{'基准测试':<14}{'耗时(s)':>10}{'页/秒':>10}{'MB/秒':>10}{'内存峰值(MB)':>14}")
+    for name, r in results.items():
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+        print(
+            f"{name:<14}{r['seconds']:>10.3f}{r['pages_per_s']:>10.1f}"
+            f"{r['mb_per_s']:>10.1f}{rss:>14}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComicPacker 基准测试")
+    parser.add_argument("--pages", type=int, default=100, help="每本漫画的页数 (默认: 100)")
+    parser.add_argument("--size", type=parse_size, default="1200x1800", help="页面尺寸WxH (默认: 1200x1800)")
+    parser.add_argument("--formats", default="jpeg", help="逗号分隔的图片格式 (默认: jpeg)")
+    parser.add_argument("--comics", type=int, default=8, help="批量测试的漫画数量 (默认: 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的重复次数，取最快一次 (默认: 3)")
+    parser.add_argument("--jobs", default="auto", help="批量测试的并行进程数 (默认: auto)")
+    parser.add_argument("--only", help=f"只运行指定的测试，逗号分隔: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线JSON文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为新的基线")
+    parser.add_argument(
+        "--check", action="store_true", help="检查模式：基线不存在或测试配置与基线不同时以非零状态退出"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的性能回退比例 (默认: 0.2)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.check and args.save_baseline:
+        parser.error("--check 不能与 --save-baseline 同时使用")
+    if args.check and not Path(args.baseline).exists():
+        # 在运行耗时的测试之前失败
+        print(f"[-] 未找到基线文件 {args.baseline}，使用 --save-baseline 创建")
+        sys.exit(1)
+
+    if args.child:
+        bench = BENCHMARKS[args.child]
+        extra = {"jobs": args.jobs} if args.child == "batch" else {}
+        seconds, rss = bench(Path(args.workdir), args.repeat, **extra)
+        print(json.dumps({"seconds": seconds, "peak_rss_mb": rss}))
+        return
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    workdir = Path(tempfile.mkdtemp(prefix="comicpacker-bench-"))
+    try:
+        print("生成测试数据...")
+        workload = prepare_workdir(workdir, args)
+
+        results = {}
+        for name in names:
+            print(f"运行 {name}...")
+            measured = run_child(name, workdir, args)
+            pages, size = workload[name]
+            seconds = measured["seconds"]
+            results[name] = {
+                "seconds": seconds,
+                "pages": pages,
+                "bytes": size,
+                "pages_per_s": pages / seconds,
+                "mb_per_s": size / 1024 / 1024 / seconds,
+                "peak_rss_mb": measured["peak_rss_mb"],
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "environment": environment_info(),
+        "config": {
+            "pages": args.pages,
+            "size": list(args.size),
+            "formats": args.formats,
+            "comics": args.comics,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+        },
+        "results": results,
+    }
+
+    print()
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n结果已保存: {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"基线已更新: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\n未找到基线文件 {baseline_path}，使用 --save-baseline 创建")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("config") != report["config"]:
+        if args.check:
+            print("\n[-] 基线的测试配置与本次不同，无法比较")
+            sys.exit(1)
+        print("\n[!] 基线的测试配置与本次不同，比较结果可能没有意义")
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n[-] 检测到性能回退 (容差 {args.tolerance:.0%}):")
+        for name, metric, expected, current, change in regressions:
+            print(f"    {name}.{metric}: {expected:.2f} -> {current:.2f} ({change:+.1%})")
+        sys.exit(1)
+
+    print(f"\n[+] 与基线相比没有超出容差 ({args.tolerance:.0%}) 的性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,8 +84,8 @@ def validate_build_environment() -> bool:
         return False
 
     # 检查Python版本
-    if sys.version_info < (3, 8):
-        print("[-] Python版本过低，需要Python 3.8或更高版本!")
+    if sys.version_info < (3, 9):
+        print("[-] Python版本过低，需要Python 3.9或更高版本!")
         return False
 
     print("[+] 构建环境验证通过!")
@@ -0,0 +1,754 @@
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+import copy
+import os
+import shutil
+import struct
+import time
+import zipfile
+
+import xmltodict
+from PIL import Image
+
+from cbz.comic import ComicInfo
+from cbz.constants import XML_NAME, IMAGE_FORMAT, PageType
+from cbz.models import PageModel
+
+from discovery import volume_path
+from image_probe import probe_image
+from stats import PackStats, stage
+
+# 支持的压缩策略：全部存储、全部Deflate压缩、按文件类型自动选择
+COMPRESSION_MODES = ("store", "deflate", "auto")
+# 已经是压缩格式的图片，Deflate几乎无法再减小体积，auto模式下直接存储
+PRECOMPRESSED_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+# 流式复制文件时使用的缓冲区大小
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def is_output_stream(output) -> bool:
+    """判断输出目标是否为可写的二进制文件对象（而不是文件路径）。"""
+    return hasattr(output, "write")
+
+
+def build_page_model(
+    suffix: str,
+    width: int,
+    height: int,
+    size: int,
+    name: str = "",
+    type: PageType = PageType.STORY,
+) -> PageModel:
+    """根据图片元数据构建不含图片内容的页面模型。
+
+    Args:
+        suffix (str): 图片后缀（如".jpeg"）
+        width (int): 图片宽度
+        height (int): 图片高度
+        size (int): 图片字节数
+        name (str, optional): 原始文件名
+        type (PageType, optional): 页面类型。默认为STORY
+
+    Returns:
+        PageModel: 页面模型，可直接用于生成ComicInfo.xml
+    """
+    if suffix not in IMAGE_FORMAT:
+        raise ValueError(f"不支持的图片格式: {suffix}")
+
+    page = PageModel(
+        type=type,
+        image_size=int(size),
+        image_width=int(width),
+        image_height=int(height),
+    )
+    page.suffix = suffix
+    page.name = name
+    return page
+
+
+def read_image_info(source: Union[bytes, BinaryIO]) -> tuple[str, int, int]:
+    """读取图片的格式和尺寸。
+
+    优先只解析文件头，无法解析时回退到Pillow。
+
+    Args:
+        source (Union[bytes, BinaryIO]): 图片内容或可seek的二进制文件对象
+
+    Returns:
+        tuple[str, int, int]: 图片后缀、宽度和高度
+    """
+    info = probe_image(source)
+    if info is not None:
+        return info
+
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    else:
+        source.seek(0)
+    with Image.open(source) as image:
+        return f".{image.format.lower()}", int(image.width), int(image.height)
+
+
+def seek_raw_member(source: zipfile.ZipFile, info: zipfile.ZipInfo) -> BinaryIO:
+    """将源ZIP的文件对象定位到成员原始压缩数据的开头。
+
+    Args:
+        source (zipfile.ZipFile): 源ZIP文件
+        info (zipfile.ZipInfo): 成员信息
+
+    Returns:
+        BinaryIO: 源ZIP的文件对象，接下来的compress_size个字节即为成员的原始压缩数据
+    """
+    fp = source.fp
+    fp.seek(info.header_offset)
+    header = fp.read(zipfile.sizeFileHeader)
+    if header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"成员 {info.filename} 的本地文件头无效")
+
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+    return fp
+
+
+def read_raw_member(
+    source: zipfile.ZipFile, info: zipfile.ZipInfo
+) -> Union[bytes, memoryview]:
+    """读取ZIP成员未解压的原始压缩数据。
+
+    Args:
+        source (zipfile.ZipFile): 源ZIP文件
+        info (zipfile.ZipInfo): 成员信息
+
+    Returns:
+        Union[bytes, memoryview]: 成员的原始压缩数据（不含本地文件头和数据描述符）。
+            源ZIP位于内存中时为原缓冲区的切片，不复制数据
+    """
+    fp = seek_raw_member(source, info)
+    # 内存中的压缩包（archive_source.BufferReader）直接切片
+    if hasattr(fp, "readview"):
+        return fp.readview(info.compress_size)
+    return fp.read(info.compress_size)
+
+
+def _copy_exact(src: BinaryIO, dest: BinaryIO, size: int) -> None:
+    """从src分块复制恰好size个字节到dest。"""
+    remaining = size
+    while remaining:
+        chunk = src.read(min(COPY_BUFFER_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile("成员的原始压缩数据不完整")
+        dest.write(chunk)
+        remaining -= len(chunk)
+
+
+def write_raw_member(
+    zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, raw: Union[bytes, memoryview, BinaryIO]
+) -> None:
+    """将原始压缩数据作为一个成员写入ZIP，不进行解压和重新压缩。
+
+    Args:
+        zf (zipfile.ZipFile): 以写入模式打开的ZIP文件
+        zinfo (zipfile.ZipInfo): 成员信息，需要已设置CRC、大小和压缩方式。
+            flag_bits包含数据描述符标志(0x08)时，在数据之后写入数据描述符
+        raw (Union[bytes, memoryview, BinaryIO]): 原始压缩数据，或位于原始压缩数据开头的
+            文件对象（将分块复制compress_size个字节）
+    """
+    with zf._lock:
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        zinfo.header_offset = zf.fp.tell()
+        zf.fp.write(zinfo.FileHeader())
+        if isinstance(raw, (bytes, memoryview)):
+            zf.fp.write(raw)
+        else:
+            _copy_exact(raw, zf.fp, zinfo.compress_size)
+        if zinfo.flag_bits & 0x08:
+            # 本地文件头中的CRC和大小为0，由数据描述符给出
+            zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+            zf.fp.write(
+                struct.pack(
+                    "<4sLQQ" if zip64 else "<4sLLL",
+                    b"PK\x07\x08",
+                    zinfo.CRC,
+                    zinfo.compress_size,
+                    zinfo.file_size,
+                )
+            )
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.start_dir = zf.fp.tell()
+
+
+def build_comic_info_xml(comic: ComicInfo) -> bytes:
+    """生成与cbz库格式一致的ComicInfo.xml内容。
+
+    Args:
+        comic (ComicInfo): 漫画信息，pages中只需包含页面元数据
+
+    Returns:
+        bytes: ComicInfo.xml的UTF-8编码内容
+    """
+    return unparse_comic_info({"ComicInfo": comic.get_info()})
+
+
+def unparse_comic_info(document: dict) -> bytes:
+    """将xmltodict格式的ComicInfo文档序列化为与cbz库格式一致的XML。
+
+    Args:
+        document (dict): 以ComicInfo为根元素的文档
+
+    Returns:
+        bytes: ComicInfo.xml的UTF-8编码内容
+    """
+    content = xmltodict.unparse(document, pretty=True)
+    return content.replace("></Page>", " />").encode("utf-8")
+
+
+class CBZWriter:
+    """流式CBZ写入器。
+
+    逐页写入图片，只在内存中保留当前页面，所有页面写入完成后再追加
+    ComicInfo.xml。输出先写入同目录下的临时文件，成功后才替换为目标文件，
+    失败时不会留下不完整的CBZ。
+
+    输出也可以是二进制文件对象，例如sys.stdout.buffer或上传流。不能seek的管道等输出
+    由zipfile使用数据描述符写入，不需要回写本地文件头；失败时不写入中央目录，
+    接收方不会得到看似完整的CBZ。
+
+    Example:
+        with CBZWriter(output_path, comic) as writer:
+            for path in image_paths:
+                writer.add_page(path.read_bytes(), name=path.name)
+    """
+
+    def __init__(
+        self,
+        output_path: Union[Path, BinaryIO],
+        comic: ComicInfo,
+        compression: str = "auto",
+        compresslevel: Optional[int] = None,
+        stats: Optional[PackStats] = None,
+    ):
+        """
+        Args:
+            output_path (Union[Path, BinaryIO]): 输出CBZ文件路径，或可写的二进制文件对象
+            comic (ComicInfo): 漫画信息，页面列表将在写入完成时填充
+            compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。
+                auto模式下JPEG、PNG、GIF和WebP直接存储，ComicInfo.xml、BMP和TIFF使用Deflate压缩。
+                默认为"auto"
+            compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+            stats (PackStats, optional): 处理统计，记录各阶段耗时和输出字节数
+        """
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"不支持的压缩策略: {compression}")
+
+        self.comic = comic
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.stats = stats
+        self.pages: list[PageModel] = []
+        if is_output_stream(output_path):
+            # 直接写入文件对象，不使用临时文件
+            self.output_path = None
+            self._temp_path = None
+            self._zip = zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED)
+            self._start = self._zip.start_dir
+        else:
+            self.output_path = Path(output_path)
+            self._temp_path = self.output_path.with_name(self.output_path.name + ".part")
+            self._zip = zipfile.ZipFile(self._temp_path, "w", zipfile.ZIP_STORED)
+
+    def __enter__(self) -> "CBZWriter":
+        return self
+
+    @property
+    def volumes(self) -> list[Path]:
+        """输出的CBZ文件路径，与VolumeWriter一致。输出到文件对象时为空列表。"""
+        return [] if self.output_path is None else [self.output_path]
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def compress_type_for(self, suffix: str) -> int:
+        """根据压缩策略获取指定类型文件的ZIP压缩方式。
+
+        Args:
+            suffix (str): 文件后缀
+
+        Returns:
+            int: zipfile.ZIP_STORED或zipfile.ZIP_DEFLATED
+        """
+        if self.compression == "store":
+            return zipfile.ZIP_STORED
+        if self.compression == "auto" and suffix.lower() in PRECOMPRESSED_SUFFIXES:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def can_copy_raw(self, info: zipfile.ZipInfo, suffix: str) -> bool:
+        """判断ZIP成员能否直接复制原始压缩数据，而不必解压后重新写入。
+
+        压缩方式与压缩策略一致时直接复制。auto模式下已经是压缩格式的图片即使使用了Deflate
+        也直接复制：重新存储只会让成员更大（Deflate没有减小体积时除外），且需要完整解压。
+
+        Args:
+            info (zipfile.ZipInfo): 源ZIP成员信息
+            suffix (str): 图片后缀
+
+        Returns:
+            bool: 是否直接复制
+        """
+        if info.compress_type == self.compress_type_for(suffix):
+            return True
+        return (
+            self.compression == "auto"
+            and suffix.lower() in PRECOMPRESSED_SUFFIXES
+            and info.compress_type == zipfile.ZIP_DEFLATED
+            and info.compress_size < info.file_size
+        )
+
+    def _writestr(self, name: str, data: bytes, suffix: str) -> None:
+        """按压缩策略写入一个ZIP成员。"""
+        self._zip.writestr(
+            name,
+            data,
+            compress_type=self.compress_type_for(suffix),
+            compresslevel=self.compresslevel,
+        )
+
+    def _append_page(self, page: PageModel, input_size: Optional[int] = None) -> PageModel:
+        """记录已写入的页面，并以原始页面的字节数通知处理统计。"""
+        self.pages.append(page)
+        if self.stats is not None:
+            self.stats.page_written(page.image_size if input_size is None else input_size)
+        return page
+
+    def _next_name(self, suffix: str) -> str:
+        """生成与cbz库一致的顺序页面文件名（如page-001.jpeg）。"""
+        return f"page-{len(self.pages) + 1:03d}{suffix}"
+
+    def add_page(
+        self,
+        data: bytes,
+        name: str = "",
+        type: PageType = PageType.STORY,
+        input_size: Optional[int] = None,
+    ) -> PageModel:
+        """写入一页图片。
+
+        Args:
+            data (bytes): 图片内容
+            name (str, optional): 原始文件名
+            type (PageType, optional): 页面类型。默认为STORY
+            input_size (int, optional): 转码前原始页面的字节数，用于报告进度。默认为data的长度
+
+        Returns:
+            PageModel: 已写入页面的元数据
+        """
+        with stage(self.stats, "load"):
+            suffix, width, height = read_image_info(data)
+        page = build_page_model(suffix, width, height, len(data), name, type)
+        with stage(self.stats, "pack"):
+            self._writestr(self._next_name(suffix), data, suffix)
+        return self._append_page(page, input_size)
+
+    def add_page_file(
+        self,
+        path: Path,
+        suffix: str,
+        width: int,
+        height: int,
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """按已知的元数据直接从文件流式写入一页，无需将整页读入内存。
+
+        Args:
+            path (Path): 图片文件路径
+            suffix (str): 图片后缀
+            width (int): 图片宽度
+            height (int): 图片高度
+            type (PageType, optional): 页面类型。默认为STORY
+
+        Returns:
+            PageModel: 已写入页面的元数据
+        """
+        path = Path(path)
+        with stage(self.stats, "pack"), path.open("rb") as src:
+            size = os.fstat(src.fileno()).st_size
+            page = build_page_model(suffix, width, height, size, path.name, type)
+            self._write_stream(src, size, suffix)
+
+        return self._append_page(page)
+
+    def add_page_stream(
+        self,
+        src: BinaryIO,
+        size: Optional[int] = None,
+        name: str = "",
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """从文件对象分块流式写入一页，只读取图片头，无需将整页读入内存。
+
+        Args:
+            src (BinaryIO): 位于图片开头、可以seek的二进制文件对象
+            size (int, optional): 图片字节数，未指定时通过seek到末尾获取
+            name (str, optional): 原始文件名
+            type (PageType, optional): 页面类型。默认为STORY
+
+        Returns:
+            PageModel: 已写入页面的元数据
+        """
+        with stage(self.stats, "load"):
+            suffix, width, height = read_image_info(src)
+            if size is None:
+                size = src.seek(0, os.SEEK_END)
+            src.seek(0)
+        page = build_page_model(suffix, width, height, size, name, type)
+        with stage(self.stats, "pack"):
+            self._write_stream(src, size, suffix)
+        return self._append_page(page)
+
+    def _write_stream(self, src: BinaryIO, size: int, suffix: str) -> None:
+        """按压缩策略将文件对象的内容分块写入为下一个页面成员。"""
+        zinfo = zipfile.ZipInfo(
+            self._next_name(suffix), date_time=time.localtime(time.time())[:6]
+        )
+        zinfo.compress_type = self.compress_type_for(suffix)
+        zinfo.external_attr = 0o600 << 16
+        if self.compresslevel is not None:
+            # Python 3.12起该属性更名为compress_level
+            if hasattr(zinfo, "compress_level"):
+                zinfo.compress_level = self.compresslevel
+            else:
+                zinfo._compresslevel = self.compresslevel
+
+        force_zip64 = size > zipfile.ZIP64_LIMIT
+        with self._zip.open(zinfo, "w", force_zip64=force_zip64) as dest:
+            shutil.copyfileobj(src, dest, COPY_BUFFER_SIZE)
+
+    def add_raw_page(
+        self,
+        raw: Union[bytes, memoryview, BinaryIO],
+        source: zipfile.ZipInfo,
+        suffix: str,
+        width: int,
+        height: int,
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """直接写入已压缩的页面数据，不进行解压和重新压缩。
+
+        Args:
+            raw (Union[bytes, memoryview, BinaryIO]): 源ZIP成员的原始压缩数据，
+                或位于原始压缩数据开头的文件对象（将分块复制compress_size个字节）
+            source (zipfile.ZipInfo): 源ZIP成员信息，提供CRC、大小和压缩方式
+            suffix (str): 图片后缀
+            width (int): 图片宽度
+            height (int): 图片高度
+            type (PageType, optional): 页面类型。默认为STORY
+
+        Returns:
+            PageModel: 已写入页面的元数据
+        """
+        page = build_page_model(
+            suffix, width, height, source.file_size, Path(source.filename).name, type
+        )
+
+        zinfo = zipfile.ZipInfo(self._next_name(suffix), date_time=source.date_time)
+        zinfo.compress_type = source.compress_type
+        zinfo.external_attr = source.external_attr
+        zinfo.CRC = source.CRC
+        zinfo.compress_size = source.compress_size
+        zinfo.file_size = source.file_size
+
+        with stage(self.stats, "pack"):
+            write_raw_member(self._zip, zinfo, raw)
+
+        return self._append_page(page)
+
+    def copy_zip_member(
+        self,
+        source: zipfile.ZipFile,
+        info: zipfile.ZipInfo,
+        type: PageType = PageType.STORY,
+        stream: bool = False,
+    ) -> PageModel:
+        """将ZIP中的图片成员复制为一页。
+
+        成员未加密且可以直接复制时（参见can_copy_raw）复制原始压缩数据，
+        其他成员解压后按普通页面写入。
+
+        Args:
+            source (zipfile.ZipFile): 源ZIP文件
+            info (zipfile.ZipInfo): 图片成员信息
+            type (PageType, optional): 页面类型。默认为STORY
+            stream (bool, optional): 是否分块流式复制，不将整个成员读入内存。默认为False
+
+        Returns:
+            PageModel: 已写入页面的元数据
+        """
+        name = Path(info.filename).name
+        if info.flag_bits & 0x1:
+            if stream:
+                with source.open(info) as f:
+                    return self.add_page_stream(f, info.file_size, name=name, type=type)
+            with stage(self.stats, "extract"):
+                data = source.read(info)
+            return self.add_page(data, name=name, type=type)
+
+        # 只读取图片头部获取格式和尺寸
+        with stage(self.stats, "load"), source.open(info) as f:
+            suffix, width, height = read_image_info(f)
+
+        if not self.can_copy_raw(info, suffix):
+            # 压缩方式不一致，需要解压后按压缩策略重新写入
+            if stream:
+                with source.open(info) as f:
+                    return self.add_page_stream(f, info.file_size, name=name, type=type)
+            with stage(self.stats, "extract"):
+                data = source.read(info)
+            return self.add_page(data, name=name, type=type)
+
+        if stream:
+            raw = seek_raw_member(source, info)
+        else:
+            with stage(self.stats, "extract"):
+                raw = read_raw_member(source, info)
+        return self.add_raw_page(raw, info, suffix, width, height, type)
+
+    def close(self) -> None:
+        """写入ComicInfo.xml并完成CBZ文件。"""
+        if self._zip.fp is None:
+            return
+
+        self.comic.pages = self.pages
+        with stage(self.stats, "comicinfo"):
+            content = build_comic_info_xml(self.comic)
+        with stage(self.stats, "write"):
+            self._writestr(XML_NAME, content, ".xml")
+            # 不能seek的输出由zipfile包装为记录写入位置的对象，关闭后仍可获取
+            fp = self._zip.fp
+            self._zip.close()
+            if self.output_path is None:
+                size = fp.tell() - self._start
+            else:
+                os.replace(self._temp_path, self.output_path)
+                size = self.output_path.stat().st_size
+
+        if self.stats is not None:
+            self.stats.pages += len(self.pages)
+            self.stats.bytes_out += size
+
+    def abort(self) -> None:
+        """放弃写入并删除临时文件。输出到文件对象时不写入中央目录。"""
+        if self._temp_path is None:
+            self._zip._didModify = False
+            self._zip.close()
+            return
+        self._zip.close()
+        try:
+            self._temp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class VolumeWriter:
+    """按页数或大小将页面依次写入多个CBZ分卷。
+
+    写入接口与CBZWriter相同。写入每一页之前检查当前分卷是否已满，已满时完成当前分卷并开始
+    下一卷，因此页面只需读取一次。每个分卷都有自己的ComicInfo.xml，卷号从comic.number
+    （未设置时为1）开始依次递增。分卷大小按页面的原始大小计算，每卷至少包含一页。
+
+    Example:
+        with VolumeWriter(output_path, comic, split_pages=500) as writer:
+            for path in image_paths:
+                writer.add_page(path.read_bytes(), name=path.name)
+        print(writer.volumes)
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        comic: ComicInfo,
+        compression: str = "auto",
+        compresslevel: Optional[int] = None,
+        stats: Optional[PackStats] = None,
+        split_pages: Optional[int] = None,
+        split_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            output_path (Path): 输出CBZ文件路径，分卷路径由volume_path生成
+            comic (ComicInfo): 漫画信息，每个分卷使用其副本并设置卷号
+            compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。默认为"auto"
+            compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+            stats (PackStats, optional): 处理统计，记录各阶段耗时和输出字节数
+            split_pages (int, optional): 每卷最多包含的页数
+            split_size (int, optional): 每卷页面的最大总字节数
+
+        Raises:
+            ValueError: 未指定拆分条件、拆分条件不为正数、卷号不是整数或输出为文件对象
+        """
+        if split_pages is None and split_size is None:
+            raise ValueError("需要指定split_pages或split_size")
+        if is_output_stream(output_path):
+            raise ValueError("输出到文件对象时不能拆分分卷")
+        if (split_pages is not None and split_pages < 1) or (
+            split_size is not None and split_size < 1
+        ):
+            raise ValueError("拆分的页数和大小必须大于0")
+        try:
+            self._first_number = int(comic.number or 1)
+        except (TypeError, ValueError):
+            raise ValueError(f"拆分分卷时卷号必须为整数: {comic.number}")
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"不支持的压缩策略: {compression}")
+
+        self.output_path = Path(output_path)
+        self.comic = comic
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.stats = stats
+        self.split_pages = split_pages
+        self.split_size = split_size
+        # 已创建的分卷路径，按卷号排列
+        self.volumes: list[Path] = []
+        self._writer: Optional[CBZWriter] = None
+        self._volume_size = 0
+
+    def __enter__(self) -> "VolumeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _writer_for(self, size: int) -> CBZWriter:
+        """获取写入下一页（size字节）的分卷，当前分卷已满时开始下一卷。"""
+        writer = self._writer
+        if writer is not None and writer.pages and (
+            (self.split_pages is not None and len(writer.pages) >= self.split_pages)
+            or (
+                self.split_size is not None
+                and self._volume_size + size > self.split_size
+            )
+        ):
+            writer.close()
+            writer = None
+
+        if writer is None:
+            index = len(self.volumes) + 1
+            comic = copy.copy(self.comic)
+            comic.number = self._first_number + index - 1
+            path = volume_path(self.output_path, index)
+            writer = CBZWriter(
+                path, comic, self.compression, self.compresslevel, self.stats
+            )
+            self.volumes.append(path)
+            self._writer = writer
+            self._volume_size = 0
+
+        self._volume_size += size
+        return writer
+
+    def add_page(
+        self,
+        data: bytes,
+        name: str = "",
+        type: PageType = PageType.STORY,
+        input_size: Optional[int] = None,
+    ) -> PageModel:
+        """写入一页图片，参见CBZWriter.add_page。"""
+        return self._writer_for(len(data)).add_page(data, name, type, input_size)
+
+    def add_page_file(
+        self,
+        path: Path,
+        suffix: str,
+        width: int,
+        height: int,
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """按已知的元数据直接从文件流式写入一页，参见CBZWriter.add_page_file。"""
+        writer = self._writer_for(os.stat(path).st_size)
+        return writer.add_page_file(path, suffix, width, height, type)
+
+    def add_page_stream(
+        self,
+        src: BinaryIO,
+        size: Optional[int] = None,
+        name: str = "",
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """从文件对象分块流式写入一页，参见CBZWriter.add_page_stream。"""
+        if size is None:
+            size = src.seek(0, os.SEEK_END)
+            src.seek(0)
+        return self._writer_for(size).add_page_stream(src, size, name, type)
+
+    def add_raw_page(
+        self,
+        raw: Union[bytes, memoryview, BinaryIO],
+        source: zipfile.ZipInfo,
+        suffix: str,
+        width: int,
+        height: int,
+        type: PageType = PageType.STORY,
+    ) -> PageModel:
+        """直接写入已压缩的页面数据，参见CBZWriter.add_raw_page。"""
+        writer = self._writer_for(source.file_size)
+        return writer.add_raw_page(raw, source, suffix, width, height, type)
+
+    def copy_zip_member(
+        self,
+        source: zipfile.ZipFile,
+        info: zipfile.ZipInfo,
+        type: PageType = PageType.STORY,
+        stream: bool = False,
+    ) -> PageModel:
+        """将ZIP中的图片成员复制为一页，参见CBZWriter.copy_zip_member。"""
+        return self._writer_for(info.file_size).copy_zip_member(source, info, type, stream)
+
+    def close(self) -> None:
+        """完成最后一卷。没有任何页面时仍会创建第一卷。"""
+        if self._writer is None:
+            self._writer_for(0)
+        self._writer.close()
+
+    def abort(self) -> None:
+        """放弃写入，删除当前分卷的临时文件和已完成的分卷。"""
+        if self._writer is not None:
+            self._writer.abort()
+        for path in self.volumes[:-1]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def open_cbz_writer(
+    output_path: Union[Path, BinaryIO],
+    comic: ComicInfo,
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    stats: Optional[PackStats] = None,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
+) -> Union[CBZWriter, VolumeWriter]:
+    """创建CBZ写入器，指定拆分条件时按分卷写入。
+
+    Args:
+        output_path (Union[Path, BinaryIO]): 输出CBZ文件路径，或可写的二进制文件对象（不能拆分分卷）
+
+    Returns:
+        Union[CBZWriter, VolumeWriter]: 未指定split_pages和split_size时为CBZWriter，否则为VolumeWriter
+    """
+    if split_pages is None and split_size is None:
+        return CBZWriter(output_path, comic, compression, compresslevel, stats)
+    return VolumeWriter(
+        output_path, comic, compression, compresslevel, stats, split_pages, split_size
+    )
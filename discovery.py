@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 文件发现
+基于os.scandir单次遍历嵌套的目录树，按路径顺序惰性返回图片文件和待处理项目
+"""
+
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+# 支持的图片格式
+IMAGE_EXTENSIONS_SET = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tiff", ".tif"}
+# 作为单个项目处理的压缩包格式，包含多级后缀（如".tar.gz"）
+ARCHIVE_EXTENSIONS_SET = {
+    ".zip",
+    ".7z",
+    ".cb7",
+    ".tar",
+    ".cbt",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+    ".tar.zst",
+    ".tzst",
+}
+# 遍历时忽略的名称，例如macOS打包ZIP时生成的资源分支目录
+IGNORED_NAMES = {"__MACOSX"}
+
+
+def is_image_name(name: str) -> bool:
+    """判断文件名是否为支持的图片格式"""
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS_SET
+
+
+def split_archive_name(name: str) -> tuple[str, str]:
+    """将压缩包文件名拆分为名称和压缩包后缀，支持多级后缀
+
+    Args:
+        name (str): 文件名或路径
+
+    Returns:
+        tuple[str, str]: 不含后缀的文件名和小写的压缩包后缀，不是支持的压缩包时后缀为空字符串
+    """
+    base = os.path.basename(name)
+    lower = base.lower()
+    # 优先匹配较长的后缀，使"a.tar.gz"拆分为("a", ".tar.gz")而不是("a.tar", ".gz")
+    for suffix in sorted(ARCHIVE_EXTENSIONS_SET, key=len, reverse=True):
+        if lower.endswith(suffix) and len(base) > len(suffix):
+            return base[: -len(suffix)], suffix
+    return os.path.splitext(base)[0], ""
+
+
+def is_archive_name(name: str) -> bool:
+    """判断文件名是否为支持的压缩包格式"""
+    return bool(split_archive_name(name)[1])
+
+
+def volume_path(output_path, index: int) -> Path:
+    """获取拆分后第index卷（从1开始）的输出路径，例如"漫画 v01.cbz"。"""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem} v{index:02d}{output_path.suffix}")
+
+
+def is_ignored_name(name: str) -> bool:
+    """判断是否忽略该名称：隐藏文件（包括macOS的._资源文件）和IGNORED_NAMES中的名称"""
+    return name.startswith(".") or name in IGNORED_NAMES
+
+
+def is_image_member(name: str) -> bool:
+    """判断压缩包成员是否为需要打包的图片，忽略隐藏文件和IGNORED_NAMES中的目录
+
+    Args:
+        name (str): 以"/"分隔的成员路径
+    """
+    return is_image_name(name) and not any(
+        is_ignored_name(part) for part in name.split("/") if part not in ("", ".")
+    )
+
+
+def member_sort_key(name: str) -> list[str]:
+    """压缩包成员按路径逐级排序的键，与walk的遍历顺序一致"""
+    return [part for part in name.split("/") if part not in ("", ".")]
+
+
+def _list_dir(path) -> list[os.DirEntry]:
+    """列出目录中未被忽略的条目，按名称排序"""
+    with os.scandir(path) as it:
+        return sorted(
+            (entry for entry in it if not is_ignored_name(entry.name)),
+            key=lambda entry: entry.name,
+        )
+
+
+def _is_link_loop(entry: os.DirEntry, followed: set) -> bool:
+    """判断指向目录的符号链接是否会导致重复遍历
+
+    指向自身上级目录或已经遍历过的目标的符号链接会被跳过，避免无限遍历。
+
+    Args:
+        entry (os.DirEntry): 目录条目
+        followed (set): 已经遍历过的符号链接目标，新的目标会被加入其中
+    """
+    if not entry.is_symlink():
+        return False
+    target = os.path.realpath(entry.path)
+    parent = os.path.realpath(os.path.dirname(entry.path))
+    if target in followed or parent == target or parent.startswith(
+        target.rstrip(os.sep) + os.sep
+    ):
+        return True
+    followed.add(target)
+    return False
+
+
+def _list_subdir(entry: os.DirEntry, onerror) -> list[os.DirEntry]:
+    """列出子目录，无法访问时交给onerror处理并返回空列表，未指定onerror时抛出异常"""
+    try:
+        return _list_dir(entry.path)
+    except OSError as e:
+        if onerror is None:
+            raise
+        onerror(e)
+        return []
+
+
+def walk(root, onerror=None) -> Iterator[os.DirEntry]:
+    """深度优先遍历目录树，按名称顺序惰性返回所有文件和目录
+
+    每个目录只列出一次，目录在其内容之前返回，整体顺序与按路径逐级排序一致。
+    返回的DirEntry缓存了文件类型和stat信息，调用方可直接复用而无需再次访问文件系统。
+
+    Args:
+        root: 根目录路径
+        onerror (callable, optional): 无法访问子目录时以OSError为参数调用，然后跳过该目录。
+            未指定时直接抛出异常
+
+    Yields:
+        os.DirEntry: 目录树中的文件或目录
+    """
+    stack = [iter(_list_dir(root))]
+    followed = set()
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        yield entry
+        if entry.is_dir() and not _is_link_loop(entry, followed):
+            stack.append(iter(_list_subdir(entry, onerror)))
+
+
+def iter_image_files(folder) -> Iterator[os.DirEntry]:
+    """按路径顺序惰性返回文件夹（包括子文件夹）中的图片文件
+
+    Args:
+        folder: 文件夹路径
+
+    Yields:
+        os.DirEntry: 图片文件
+    """
+    for entry in walk(folder):
+        if is_image_name(entry.name) and entry.is_file():
+            yield entry
+
+
+def item_input_size(path) -> int:
+    """获取待处理项目的输入字节数，用于估算进度
+
+    Args:
+        path: 压缩包或漫画文件夹路径
+
+    Returns:
+        int: 压缩包的文件大小，或文件夹（包括子文件夹）中图片文件的总大小；无法访问时为0
+    """
+    try:
+        if not os.path.isdir(path):
+            return os.stat(path).st_size
+        return sum(entry.stat().st_size for entry in iter_image_files(path))
+    except OSError:
+        return 0
+
+
+def _folder_input_size(entries: list[os.DirEntry]) -> int:
+    """根据已列出的文件夹条目统计图片文件的总大小，只需再遍历其中的子文件夹，无法访问的条目不计入"""
+    size = 0
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                size += sum(e.stat().st_size for e in iter_image_files(entry.path))
+            elif is_image_name(entry.name) and entry.is_file():
+                size += entry.stat().st_size
+        except OSError:
+            pass
+    return size
+
+
+def _iter_items(root, onerror) -> Iterator[tuple[os.DirEntry, Optional[list[os.DirEntry]]]]:
+    """iter_work_items的实现，同时返回文件夹项目已列出的条目，压缩包项目为None"""
+    stack = [iter(_list_dir(root))]
+    followed = set()
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        if entry.is_dir():
+            if _is_link_loop(entry, followed):
+                continue
+            entries = _list_subdir(entry, onerror)
+            if any(is_image_name(e.name) and e.is_file() for e in entries):
+                yield entry, entries
+            else:
+                # 复用已列出的条目继续向下查找
+                stack.append(iter(entries))
+        elif is_archive_name(entry.name) and entry.is_file():
+            yield entry, None
+
+
+def iter_work_items(root, onerror=None) -> Iterator[str]:
+    """按路径顺序惰性返回目录树中的待处理项目
+
+    待处理项目包括ZIP压缩包，以及直接包含图片的文件夹（整个文件夹作为一本漫画，
+    其子文件夹中的图片也会一并打包）。不直接包含图片的文件夹会继续向下查找，
+    因此"系列/卷/图片"这样的嵌套目录无需手动整理。
+
+    Args:
+        root: 输入目录路径
+        onerror (callable, optional): 无法访问子目录时以OSError为参数调用，然后跳过该目录。
+            未指定时直接抛出异常
+
+    Yields:
+        str: 待处理项目的路径
+    """
+    for entry, _ in _iter_items(root, onerror):
+        yield entry.path
+
+
+def iter_sized_work_items(root, onerror=None) -> Iterator[tuple[str, int]]:
+    """与iter_work_items相同，同时返回每个项目的输入字节数，用于估算进度
+
+    输入字节数与item_input_size一致，但复用遍历时已列出的条目，
+    文件夹项目本身不会被再次列出，只有其中的子文件夹需要额外遍历。
+
+    Args:
+        root: 输入目录路径
+        onerror (callable, optional): 无法访问子目录时以OSError为参数调用，然后跳过该目录。
+            未指定时直接抛出异常
+
+    Yields:
+        tuple[str, int]: 待处理项目的路径和输入字节数，无法访问时字节数为0
+    """
+    for entry, entries in _iter_items(root, onerror):
+        if entries is not None:
+            yield entry.path, _folder_input_size(entries)
+            continue
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            size = 0
+        yield entry.path, size
+
+
+def iter_items_at(path, onerror=None) -> Iterator[str]:
+    """返回以单个路径为起点的待处理项目，规则与iter_work_items一致
+
+    Args:
+        path: 文件或目录路径
+        onerror (callable, optional): 无法访问子目录时以OSError为参数调用，然后跳过该目录。
+            未指定时直接抛出异常
+
+    Yields:
+        str: 待处理项目的路径
+    """
+    if os.path.isdir(path):
+        entries = _list_dir(path)
+        if any(is_image_name(e.name) and e.is_file() for e in entries):
+            yield os.fspath(path)
+        else:
+            yield from iter_work_items(path, onerror)
+    elif is_archive_name(os.fspath(path)) and os.path.isfile(path):
+        yield os.fspath(path)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 编程接口
+ComicPacker引擎保存打包配置和常驻进程池，提交的项目在工作进程中打包，
+以结构化的结果返回输出路径、页数、字节数、各阶段耗时和错误信息。
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from discovery import is_archive_name, split_archive_name
+from stats import PackStats, reset_peak_memory
+from worker_pool import WorkerPool
+
+# 只适用于文件夹输入的打包参数，处理压缩包时忽略
+FOLDER_ONLY_OPTIONS = {
+    "transcode",
+    "transcode_workers",
+}
+
+
+class PackResult(NamedTuple):
+    """单个项目的打包结果"""
+
+    # 输入项目路径
+    item: str
+    success: bool
+    # 输出的CBZ文件路径，拆分分卷时按卷号排列
+    outputs: list[str]
+    pages: int
+    bytes_in: int
+    bytes_out: int
+    # 各阶段耗时（秒），阶段名称见stats.STAGES
+    stages: dict[str, float]
+    # 总耗时（秒）
+    total: float
+    peak_memory_mb: Optional[float]
+    # 失败时的错误信息
+    error: Optional[str] = None
+
+
+def _warm_worker() -> None:
+    """工作进程的初始化：提前导入打包所需的依赖"""
+    import pack_comic  # noqa: F401
+
+
+def pack_item(item_path, output_path=None, options: Optional[dict] = None) -> PackResult:
+    """打包单个漫画文件夹或压缩包并返回结构化结果，不抛出异常，供工作进程调用
+
+    Args:
+        item_path: 漫画文件夹或压缩包路径
+        output_path (optional): 输出CBZ文件路径，默认为当前目录下的同名CBZ文件
+        options (dict, optional): 传给pack_comic_to_cbz或pack_compressed_comic_to_cbz的参数，
+            另外支持page_cache_path（页面元数据缓存路径）。
+            title和series默认为项目名称，number默认为1
+
+    Returns:
+        PackResult: 打包结果
+    """
+    from pack_comic import pack_comic_to_cbz, pack_compressed_comic_to_cbz
+    from page_cache import PageCache
+
+    item_path = os.fspath(item_path)
+    options = dict(options or {})
+    page_cache_path = options.pop("page_cache_path", None)
+
+    reset_peak_memory()
+    stats = PackStats(item_path)
+    outputs = []
+    error = None
+    try:
+        if os.path.isdir(item_path):
+            name = os.path.basename(os.path.normpath(item_path))
+        elif is_archive_name(item_path) and os.path.isfile(item_path):
+            name = split_archive_name(item_path)[0]
+            options = {k: v for k, v in options.items() if k not in FOLDER_ONLY_OPTIONS}
+        else:
+            raise ValueError(f"不是漫画文件夹或支持的压缩包: {item_path}")
+
+        options.setdefault("title", name)
+        options.setdefault("series", options["title"])
+        options.setdefault("number", 1)
+        output_path = Path(output_path) if output_path else Path(f"{name}.cbz")
+        os.makedirs(output_path.parent, exist_ok=True)
+
+        if os.path.isdir(item_path):
+            page_cache = PageCache(page_cache_path) if page_cache_path else None
+            try:
+                outputs = pack_comic_to_cbz(
+                    comic_path=Path(item_path),
+                    output_path=output_path,
+                    page_cache=page_cache,
+                    stats=stats,
+                    **options,
+                )
+            finally:
+                if page_cache is not None:
+                    page_cache.close()
+        else:
+            outputs = pack_compressed_comic_to_cbz(
+                compressed_path=Path(item_path),
+                output_path=output_path,
+                stats=stats,
+                **options,
+            )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    stats.finish(error is None)
+    record = stats.to_dict()
+    return PackResult(
+        item=item_path,
+        success=error is None,
+        outputs=[os.fspath(path) for path in outputs],
+        pages=record["pages"],
+        bytes_in=record["bytes_in"],
+        bytes_out=record["bytes_out"],
+        stages=record["stages"],
+        total=record["total"],
+        peak_memory_mb=record["peak_memory_mb"],
+        error=error,
+    )
+
+
+class ComicPacker:
+    """漫画打包引擎
+
+    保存打包配置并持有常驻的工作进程池，工作进程启动时即导入打包依赖，
+    多次调用可复用同一个进程池，无需每次启动命令行程序。打包失败不会抛出异常，
+    而是体现在结果的success和error中。
+
+    Example:
+        with ComicPacker(output_dir="./out", workers=4, compression="auto") as packer:
+            future = packer.submit("./漫画文件夹", series="火影忍者", number=1)
+            print(future.result())
+            for result in packer.map(["./第1卷", "./第2卷.zip"]):
+                print(result.item, result.success, result.outputs, result.error)
+    """
+
+    def __init__(
+        self,
+        output_dir=".",
+        workers: Optional[int] = None,
+        page_cache_path=None,
+        **options,
+    ):
+        """
+        Args:
+            output_dir (optional): 输出目录，默认为当前目录
+            workers (int, optional): 工作进程数，默认为CPU核心数。为0时在当前进程中打包
+            page_cache_path (optional): 页面元数据缓存路径，默认不使用缓存
+            **options: 默认的打包参数，例如language_iso、compression、compresslevel、
+                max_memory、transcode、max_height、split_pages等，参见pack_comic_to_cbz
+        """
+        self.output_dir = Path(output_dir)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.options = dict(options)
+        # 转码进程默认不再嵌套并行，避免进程数成倍增加
+        self.options.setdefault("transcode_workers", 1)
+        if page_cache_path:
+            self.options["page_cache_path"] = os.fspath(page_cache_path)
+        self._pool = WorkerPool(self.workers, initializer=_warm_worker)
+
+    def __enter__(self) -> "ComicPacker":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _job_args(self, item_path, output_path, options):
+        item_path = os.fspath(item_path)
+        if output_path is None:
+            name = (
+                split_archive_name(item_path)[0]
+                if os.path.isfile(item_path)
+                else os.path.basename(os.path.normpath(item_path))
+            )
+            output_path = self.output_dir / f"{name}.cbz"
+        return item_path, os.fspath(output_path), {**self.options, **options}
+
+    def submit(self, item_path, output_path=None, **options):
+        """提交一个漫画文件夹或压缩包
+
+        Args:
+            item_path: 漫画文件夹或压缩包路径
+            output_path (optional): 输出CBZ文件路径，默认为输出目录下的同名CBZ文件
+            **options: 覆盖默认配置的打包参数，例如title、series、number
+
+        Returns:
+            concurrent.futures.Future: 结果为PackResult。工作进程异常退出时future抛出BrokenProcessPool
+        """
+        return self._pool.submit(pack_item, *self._job_args(item_path, output_path, options))
+
+    def map(self, items: Iterable, ordered: bool = False) -> Iterator[PackResult]:
+        """批量打包多个项目，按完成顺序（或输入顺序）逐个返回结果
+
+        同时提交的项目数量有上限，项目可以在遍历输入的同时陆续提交。
+        工作进程异常退出时，受影响的项目在单独的进程中重试，仍然崩溃的项目返回失败结果，
+        进程池重建后继续处理其余项目。
+
+        Args:
+            items (Iterable): 漫画文件夹或压缩包路径，也可以是(路径, 参数字典)元组以单独设置参数
+            ordered (bool): 是否按输入顺序返回结果。默认按完成顺序返回
+
+        Yields:
+            PackResult: 每个项目的打包结果
+        """
+        from concurrent.futures.process import BrokenProcessPool
+
+        def jobs():
+            for item in items:
+                item_path, options = item if isinstance(item, tuple) else (item, {})
+                yield self._job_args(item_path, None, options)
+
+        def on_error(job, error):
+            if isinstance(error, BrokenProcessPool):
+                # 崩溃时所有未完成的项目都会报告BrokenProcessPool，单独重试以确认是否由该项目导致
+                try:
+                    return self._pool.run_isolated(pack_item, *job)
+                except BrokenProcessPool:
+                    return self._failed_result(job[0])
+            return self._failed_result(job[0], f"{type(error).__name__}: {error}")
+
+        yield from self._pool.imap(pack_item, jobs(), on_error, ordered=ordered)
+
+    @staticmethod
+    def _failed_result(
+        item_path, error: str = "BrokenProcessPool: 工作进程异常退出"
+    ) -> PackResult:
+        return PackResult(
+            item=os.fspath(item_path),
+            success=False,
+            outputs=[],
+            pages=0,
+            bytes_in=0,
+            bytes_out=0,
+            stages={},
+            total=0.0,
+            peak_memory_mb=None,
+            error=error,
+        )
+
+    def close(self) -> None:
+        """关闭进程池，等待已提交的项目完成"""
+        self._pool.close()
@@ -0,0 +1,162 @@
+"""
+只解析文件头获取图片格式和尺寸，无需使用Pillow打开整个图片
+"""
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+import struct
+
+# JPEG中包含图片尺寸的SOF标记（排除DHT、JPG和DAC）
+JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+# JPEG中没有长度字段的独立标记
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+# 探测结果：(后缀, 宽度, 高度)，后缀与Pillow的格式名一致（如".jpeg"）
+ProbeResult = tuple[str, int, int]
+
+
+def _probe_jpeg(fp: BinaryIO) -> Optional[ProbeResult]:
+    """逐个跳过JPEG标记段，直到找到SOF标记。"""
+    fp.seek(2)
+    while True:
+        byte = fp.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            return None
+
+        # 跳过填充字节
+        marker = fp.read(1)
+        while marker == b"\xff":
+            marker = fp.read(1)
+        if not marker:
+            return None
+
+        code = marker[0]
+        if code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code in (0xD9, 0xDA):
+            # 到达图像数据或文件结尾仍未找到SOF
+            return None
+
+        length_bytes = fp.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if length < 2:
+            return None
+
+        if code in JPEG_SOF_MARKERS:
+            segment = fp.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack(">HH", segment[1:5])
+            return ".jpeg", width, height
+
+        fp.seek(length - 2, 1)
+
+
+def _probe_tiff(fp: BinaryIO, header: bytes) -> Optional[ProbeResult]:
+    """读取TIFF第一个IFD中的ImageWidth和ImageLength标签。"""
+    endian = "<" if header[:2] == b"II" else ">"
+    (ifd_offset,) = struct.unpack(endian + "I", header[4:8])
+
+    fp.seek(ifd_offset)
+    count_bytes = fp.read(2)
+    if len(count_bytes) < 2:
+        return None
+    (count,) = struct.unpack(endian + "H", count_bytes)
+
+    entries = fp.read(count * 12)
+    if len(entries) < count * 12:
+        return None
+
+    size = {}
+    for i in range(count):
+        tag, field_type, _, value = struct.unpack(
+            endian + "HHI4s", entries[i * 12:i * 12 + 12]
+        )
+        if tag not in (256, 257):
+            continue
+        if field_type == 3:  # SHORT
+            size[tag] = struct.unpack(endian + "H", value[:2])[0]
+        elif field_type == 4:  # LONG
+            size[tag] = struct.unpack(endian + "I", value)[0]
+        if len(size) == 2:
+            return ".tiff", size[256], size[257]
+    return None
+
+
+def _probe_header(fp: BinaryIO, header: bytes) -> Optional[ProbeResult]:
+    """根据文件头的魔数分派到对应格式的解析。"""
+    if header[:8] == b"\x89PNG\r\n\x1a\n":
+        if header[12:16] != b"IHDR":
+            return None
+        width, height = struct.unpack(">II", header[16:24])
+        return ".png", width, height
+
+    if header[:2] == b"\xff\xd8":
+        return _probe_jpeg(fp)
+
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", header[6:10])
+        return ".gif", width, height
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        chunk = header[12:16]
+        if chunk == b"VP8 " and header[23:26] == b"\x9d\x01\x2a":
+            width, height = struct.unpack("<HH", header[26:30])
+            return ".webp", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L" and header[20] == 0x2F:
+            b0, b1, b2, b3 = header[21:25]
+            width = 1 + (b0 | (b1 & 0x3F) << 8)
+            height = 1 + (b1 >> 6 | b2 << 2 | (b3 & 0x0F) << 10)
+            return ".webp", width, height
+        if chunk == b"VP8X":
+            width = 1 + int.from_bytes(header[24:27], "little")
+            height = 1 + int.from_bytes(header[27:30], "little")
+            return ".webp", width, height
+        return None
+
+    if header[:2] == b"BM":
+        (dib_size,) = struct.unpack("<I", header[14:18])
+        if dib_size == 12:
+            width, height = struct.unpack("<HH", header[18:22])
+        else:
+            width, height = struct.unpack("<ii", header[18:26])
+        # 高度为负数表示自上而下存储的位图
+        return ".bmp", abs(width), abs(height)
+
+    if header[:4] in (b"II*\x00", b"MM\x00*"):
+        return _probe_tiff(fp, header)
+
+    return None
+
+
+def probe_image(source: Union[bytes, memoryview, BinaryIO]) -> Optional[ProbeResult]:
+    """只解析文件头获取图片格式和尺寸。
+
+    支持JPEG、PNG、GIF、WebP、BMP和TIFF。只读取必要的文件头部分，
+    JPEG和TIFF需要可以seek的文件对象。
+
+    Args:
+        source (Union[bytes, memoryview, BinaryIO]): 图片内容或位于图片开头的二进制文件对象
+
+    Returns:
+        Optional[tuple[str, int, int]]: 图片后缀、宽度和高度。无法识别或解析失败时返回None，
+            调用方应回退到Pillow
+    """
+    fp = BytesIO(source) if isinstance(source, (bytes, memoryview)) else source
+    try:
+        header = fp.read(32)
+        if len(header) < 32:
+            return None
+        result = _probe_header(fp, header)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if result is None or result[1] <= 0 or result[2] <= 0:
+        return None
+    return result
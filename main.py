@@ -1,13 +1,58 @@
 # 导入必要的模块
-from pack_comic import pack_comic_to_cbz, pack_compressed_comic_to_cbz
+from discovery import (
+    is_archive_name,
+    item_input_size,
+    iter_sized_work_items,
+    iter_work_items,
+    split_archive_name,
+    volume_path,
+)
+from memory_budget import parse_memory_size
+from metadata import ENUM_FIELDS, enum_member, load_manifest
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, PageCache
+from progress import PROGRESS_MODES, ProgressReporter, page_counter
+from state_store import close_state_stores, compute_fingerprint, get_state_store
+from stats import PackStats, StatsReport, reset_peak_memory
+from transcode import DEFAULT_QUALITY
 from version import get_full_version
+from watcher import DEFAULT_INTERVAL, DEFAULT_SETTLE
+from worker_pool import WorkerPool
+import contextlib
+import io
+import itertools
 import os
 import argparse
 import sys
 import re
+import time
 from pathlib import Path
 
 
+# 输出参数为该值时将CBZ写入标准输出
+STDOUT = "-"
+# 输入参数为该值时从标准输入读取压缩包
+STDIN = "-"
+# 从标准输入读取且未指定标题时使用的名称
+STDIN_NAME = "stdin"
+
+
+def open_stdout_output():
+    """输出CBZ到标准输出：返回标准输出的二进制流，并将之后的提示信息改为输出到标准错误，避免混入CBZ数据"""
+    if sys.stdout.isatty():
+        print("错误: 标准输出是终端，请重定向到文件或管道")
+        sys.exit(1)
+    output = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    return output
+
+
+def item_output(output_path, name):
+    """项目的输出位置：输出目录下的同名CBZ文件，输出目录为-时为标准输出"""
+    if output_path == STDOUT:
+        return sys.__stdout__.buffer
+    return Path(output_path) / f"{name}.cbz"
+
+
 def parse_extra_args(extra_args_str):
     """解析额外参数字符串"""
     if not extra_args_str:
@@ -31,39 +76,190 @@ def parse_extra_args(extra_args_str):
     return extra_params
 
 
+def parse_jobs(value):
+    """解析并行任务数参数，auto表示使用CPU核心数"""
+    if value == "auto":
+        return os.cpu_count() or 1
+
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的任务数: '{value}'")
+
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"任务数必须大于0: '{value}'")
+    return jobs
+
+
+def parse_size(value):
+    """解析大小参数，例如512M或2G"""
+    try:
+        return parse_memory_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_positive_int(value):
+    """解析必须为正整数的参数，例如页面尺寸限制和每卷页数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的整数: '{value}'")
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"数值必须大于0: '{value}'")
+    return number
+
+
+def parse_seconds(value):
+    """解析秒数参数，必须为正数"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的秒数: '{value}'")
+
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"秒数必须大于0: '{value}'")
+    return seconds
+
+
+def metadata_params(extra_params):
+    """额外参数中的格式、日漫、黑白和年龄分级元数据，转换为cbz库的枚举"""
+    return {
+        key: enum_member(key, value)
+        for key, value in extra_params.items()
+        if key in ENUM_FIELDS
+    }
+
+
+def state_params(params):
+    """获取影响输出内容的打包参数，用于增量处理比较"""
+    return {k: v for k, v in params.items() if k != "remove_original_file"}
+
+
+def check_item_state(item_path, output_path, cbz_path, params, content_hash):
+    """增量处理：计算项目指纹并检查输出是否已是最新
+
+    状态存储在当前进程中按输出目录共用，参见get_state_store。
+
+    Returns:
+        tuple[Fingerprint, bool]: 项目指纹，以及输出是否已是最新
+    """
+    fingerprint = compute_fingerprint(item_path, content_hash)
+    up_to_date = get_state_store(output_path).is_up_to_date(
+        item_path, cbz_path, fingerprint, state_params(params)
+    )
+    return fingerprint, up_to_date
+
+
+def record_item_state(item_path, output_path, cbz_path, params, fingerprint):
+    """增量处理：记录项目的处理结果"""
+    get_state_store(output_path).record(item_path, cbz_path, fingerprint, state_params(params))
+
+
 def process_single_item(
-    item_path, output_path, language, delete_original, verbose, extra_params
+    item_path,
+    output_path,
+    language,
+    delete_original,
+    verbose,
+    extra_params,
+    incremental=False,
+    content_hash=False,
+    compression="auto",
+    compresslevel=None,
+    page_cache_path=None,
+    page_cache_size=DEFAULT_MAX_ENTRIES,
+    max_memory=None,
+    transcode=None,
+    quality=DEFAULT_QUALITY,
+    transcode_workers=None,
+    max_width=None,
+    max_height=None,
+    split_pages=None,
+    split_size=None,
+    stats=None,
 ):
     """处理单个文件或文件夹"""
-    if not os.path.exists(item_path):
+    # 注意: pack_comic会导入cbz和Pillow等较重的依赖，只在真正处理项目时才导入，
+    # 使--version、--help和参数错误等情况能够快速启动
+    from pack_comic import pack_comic_to_cbz, pack_compressed_comic_to_cbz
+
+    from_stdin = item_path == STDIN
+    if not from_stdin and not os.path.exists(item_path):
         print(f"错误: 路径 '{item_path}' 不存在")
         return False
 
     try:
-        # 处理ZIP文件
-        if item_path.endswith(".zip"):
+        if output_path != STDOUT:
+            os.makedirs(output_path, exist_ok=True)
+
+        # 处理压缩包（ZIP、7z、TAR），标准输入按文件头识别格式
+        if from_stdin or (is_archive_name(item_path) and not os.path.isdir(item_path)):
+            label = "标准输入" if from_stdin else os.path.basename(item_path)
             if verbose:
-                print(f"处理ZIP文件: {os.path.basename(item_path)}")
+                print(f"处理压缩包: {label}")
 
-            # 获取文件名（不含扩展名）
-            name = os.path.splitext(os.path.basename(item_path))[0]
+            # 获取文件名（不含扩展名），标准输入没有文件名，默认使用标题
+            if from_stdin:
+                name = str(extra_params.get("title", STDIN_NAME))
+            else:
+                name = split_archive_name(item_path)[0]
 
             # 合并额外参数
             params = {
                 "series": extra_params.get("series", name),
                 "number": extra_params.get("number", 1),
-                "language_iso": language,
+                "language_iso": extra_params.get("language", language),
                 "title": extra_params.get("title", name),
                 "remove_original_file": delete_original,
+                "compression": compression,
+                "compresslevel": compresslevel,
+                **metadata_params(extra_params),
             }
+            if split_pages:
+                params["split_pages"] = split_pages
+            if split_size:
+                params["split_size"] = split_size
+            # 缩放设置影响输出内容，加入参数以便增量处理时比较。压缩包暂不转码
+            if max_width or max_height:
+                params["quality"] = quality
+            if max_width:
+                params["max_width"] = max_width
+            if max_height:
+                params["max_height"] = max_height
+
+            cbz_path = Path(output_path) / f"{name}.cbz"
+            if split_pages or split_size:
+                # 拆分分卷时以第一卷作为增量处理的输出
+                cbz_path = volume_path(cbz_path, 1)
 
-            pack_compressed_comic_to_cbz(
-                compressed_path=Path(item_path),
-                output_path=Path(output_path) / f"{name}.cbz",
+            # 增量处理：跳过未变化的项目
+            fingerprint = None
+            if incremental:
+                fingerprint, up_to_date = check_item_state(
+                    item_path, output_path, cbz_path, params, content_hash
+                )
+                if up_to_date:
+                    if verbose:
+                        print(f"跳过未变化的项目: {os.path.basename(item_path)}")
+                    return True
+
+            volumes = pack_compressed_comic_to_cbz(
+                # 标准输入重定向自文件时直接读取，来自管道时读入内存，不写入临时文件
+                compressed_path=sys.stdin.buffer if from_stdin else Path(item_path),
+                output_path=item_output(output_path, name),
+                stats=stats,
+                max_memory=max_memory,
                 **params,
             )
+            if fingerprint:
+                record_item_state(item_path, output_path, cbz_path, params, fingerprint)
             if verbose:
-                print(f"✓ 成功处理: {os.path.basename(item_path)} -> {name}.cbz")
+                print(
+                    f"✓ 成功处理: {label} -> "
+                    + (", ".join(volume.name for volume in volumes) or "标准输出")
+                )
             return True
 
         # 处理文件夹
@@ -77,19 +273,65 @@ def process_single_item(
             params = {
                 "series": extra_params.get("series", name),
                 "number": extra_params.get("number", 1),
-                "language_iso": language,
+                "language_iso": extra_params.get("language", language),
                 "title": extra_params.get("title", name),
                 "remove_original_file": delete_original,
+                "compression": compression,
+                "compresslevel": compresslevel,
+                **metadata_params(extra_params),
             }
+            if split_pages:
+                params["split_pages"] = split_pages
+            if split_size:
+                params["split_size"] = split_size
+            # 转码和缩放设置影响输出内容，加入参数以便增量处理时比较
+            if transcode:
+                params["transcode"] = transcode
+            if transcode or max_width or max_height:
+                params["quality"] = quality
+            if max_width:
+                params["max_width"] = max_width
+            if max_height:
+                params["max_height"] = max_height
+
+            cbz_path = Path(output_path) / f"{name}.cbz"
+            if split_pages or split_size:
+                # 拆分分卷时以第一卷作为增量处理的输出
+                cbz_path = volume_path(cbz_path, 1)
+
+            # 增量处理：跳过未变化的项目
+            fingerprint = None
+            if incremental:
+                fingerprint, up_to_date = check_item_state(
+                    item_path, output_path, cbz_path, params, content_hash
+                )
+                if up_to_date:
+                    if verbose:
+                        print(f"跳过未变化的项目: {name}")
+                    return True
 
             # 将文件夹中的漫画文件打包为CBZ格式
-            pack_comic_to_cbz(
-                comic_path=Path(item_path),
-                output_path=Path(output_path) / f"{name}.cbz",
-                **params,
-            )
+            with (
+                PageCache(page_cache_path, page_cache_size)
+                if page_cache_path
+                else contextlib.nullcontext()
+            ) as page_cache:
+                volumes = pack_comic_to_cbz(
+                    comic_path=Path(item_path),
+                    output_path=item_output(output_path, name),
+                    page_cache=page_cache,
+                    stats=stats,
+                    max_memory=max_memory,
+                    transcode_workers=transcode_workers,
+                    **params,
+                )
+            if fingerprint:
+                record_item_state(item_path, output_path, cbz_path, params, fingerprint)
             if verbose:
-                print(f"✓ 成功处理: {name} -> {name}.cbz")
+                print(
+                    f"✓ 成功处理: {name} -> "
+                    + (", ".join(volume.name for volume in volumes) or "标准输出")
+                )
             return True
 
         else:
@@ -102,7 +344,496 @@ def process_single_item(
         return False
 
 
+def build_item_args(item_path, args, extra_params, output_dir=None, manifest=None):
+    """根据命令行参数构建处理单个项目的参数
+
+    Args:
+        item_path: 输入项目路径
+        args: 命令行参数
+        extra_params (dict): 额外参数
+        output_dir (str, optional): 输出目录，默认为命令行指定的输出目录
+        manifest (Manifest, optional): 元数据清单，匹配的字段覆盖额外参数
+
+    Returns:
+        tuple[str, dict]: 项目路径和传给process_single_item的关键字参数
+    """
+    if manifest is not None:
+        extra_params = {**extra_params, **manifest.lookup(item_path, args.inputpath)}
+    return item_path, {
+        "output_path": output_dir or args.output,
+        "language": args.language,
+        "delete_original": args.delete_original,
+        "verbose": args.verbose,
+        "extra_params": extra_params,
+        "incremental": args.incremental,
+        "content_hash": args.hash,
+        "compression": args.compression,
+        "compresslevel": args.compress_level,
+        "page_cache_path": args.page_cache,
+        "page_cache_size": args.page_cache_size,
+        "max_memory": args.max_memory,
+        "transcode": args.transcode,
+        "quality": args.quality,
+        "transcode_workers": args.transcode_workers,
+        "max_width": args.max_width,
+        "max_height": args.max_height,
+        "split_pages": args.split_pages,
+        "split_size": args.split_size,
+    }
+
+
+def item_output_dir(item, args):
+    """批量处理时项目的输出目录，嵌套目录中的项目输出到对应的输出子目录，避免同名项目相互覆盖"""
+    return os.path.normpath(
+        os.path.join(args.output, os.path.relpath(os.path.dirname(item), args.inputpath))
+    )
+
+
+def run_item(item_args, collect_stats=False):
+    """处理单个项目，需要时收集处理统计
+
+    启用进度报告时，写入的页面通过当前进程的页面计数器计入进度。
+
+    Args:
+        item_args (tuple[str, dict]): 项目路径和关键字参数，参见build_item_args
+        collect_stats (bool): 是否收集处理统计
+
+    Returns:
+        tuple[bool, dict]: 处理结果和统计记录（未收集统计时为None）
+    """
+    item_path, options = item_args
+    counter = page_counter()
+    if not collect_stats and counter is None:
+        return process_single_item(item_path, **options), None
+
+    if collect_stats:
+        reset_peak_memory()
+    stats = PackStats(item_path, on_page=counter.page if counter else None)
+    try:
+        success = process_single_item(item_path, **options, stats=stats)
+    finally:
+        if counter is not None:
+            counter.finish_item()
+    if not collect_stats:
+        return success, None
+    stats.finish(success)
+    return success, stats.to_dict()
+
+
+def process_item_captured(item_args, collect_stats=False):
+    """处理单个项目并捕获其输出，供进程池中的工作进程调用"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        success, record = run_item(item_args, collect_stats)
+    return success, buffer.getvalue(), record
+
+
+def process_item_isolated(item_args, collect_stats=False, pool_options=None):
+    """在独立的单进程池中处理单个项目，用于确认导致工作进程崩溃的项目"""
+    from concurrent.futures.process import BrokenProcessPool
+
+    pool = WorkerPool(1, **(pool_options or {}))
+    try:
+        return pool.run_isolated(process_item_captured, item_args, collect_stats)
+    except BrokenProcessPool:
+        message = f"错误处理 {os.path.basename(item_args[0])}: 工作进程异常退出\n"
+        return False, message, None
+
+
+def process_items_parallel(items_args, jobs, collect_stats=False, pool_options=None):
+    """使用进程池并行处理多个项目
+
+    结果按输入顺序逐个返回，保证输出确定。同时提交的项目数量有上限，
+    项目可以在遍历输入的同时陆续提交。单个项目失败不会影响其他项目，
+    工作进程崩溃时会重建进程池并继续处理剩余项目。
+
+    Args:
+        items_args: 每个项目的路径和关键字参数，参见build_item_args
+        jobs (int): 工作进程数
+        collect_stats (bool): 是否收集处理统计
+        pool_options (dict, optional): 创建进程池的额外参数，例如ProgressReporter.pool_options()
+
+    Yields:
+        tuple[bool, str, dict]: 每个项目的处理结果、输出内容和统计记录
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    def on_error(job, error):
+        item_args = job[0]
+        if isinstance(error, BrokenProcessPool):
+            # 工作进程异常退出：单独重试当前项目以确认是否由其导致
+            return process_item_isolated(item_args, collect_stats, pool_options)
+        return False, f"错误处理 {os.path.basename(item_args[0])}: {error}\n", None
+
+    with WorkerPool(jobs, **(pool_options or {})) as pool:
+        yield from pool.imap(
+            process_item_captured,
+            ((item_args, collect_stats) for item_args in items_args),
+            on_error,
+        )
+
+
+def warm_worker():
+    """监视模式工作进程的初始化：提前导入打包所需的依赖，并忽略Ctrl+C以便完成正在处理的项目"""
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import pack_comic  # noqa: F401
+
+
+def watch_items(args, extra_params, collect_stats=False, manifest=None):
+    """监视模式：持续监视输入目录，使用常驻进程池处理新增或变化的项目
+
+    工作进程在启动时导入打包依赖并一直保留，新项目无需再承担解释器和依赖的启动开销。
+    按Ctrl+C停止监视，正在处理的项目会先完成。
+
+    Args:
+        args: 命令行参数
+        extra_params (dict): 额外参数
+        collect_stats (bool): 是否收集处理统计
+        manifest (Manifest, optional): 元数据清单
+
+    Yields:
+        tuple[bool, str, dict]: 每个项目的处理结果、输出内容和统计记录，按完成顺序返回
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+    from watcher import ItemWatcher
+
+    def submit(item):
+        item_args = build_item_args(
+            item, args, extra_params, item_output_dir(item, args), manifest
+        )
+        running[pool.submit(process_item_captured, item_args, collect_stats)] = item_args
+
+    pool = WorkerPool(args.jobs, initializer=warm_worker)
+    # 正在处理的项目：future -> (项目路径, 关键字参数)
+    running = {}
+    # 处理期间再次变化的项目，当前处理完成后重新提交
+    deferred = set()
+    stopping = False
+
+    with ItemWatcher(
+        args.inputpath,
+        settle=args.watch_settle,
+        interval=args.watch_interval,
+        exclude=args.output,
+        onerror=lambda e: print(f"警告: 无法访问目录 '{e.filename}'，已跳过"),
+    ) as watcher:
+        print(f"开始监视目录: {args.inputpath} ({watcher.mode})，按Ctrl+C停止")
+        try:
+            while running or not stopping:
+                if stopping:
+                    wait(running, return_when=FIRST_COMPLETED)
+                else:
+                    try:
+                        items = watcher.poll()
+                    except KeyboardInterrupt:
+                        stopping = True
+                        deferred.clear()
+                        if running:
+                            print("\n正在等待处理中的项目完成...")
+                        continue
+                    active = {item_args[0] for item_args in running.values()}
+                    for item in items:
+                        if item in active:
+                            deferred.add(item)
+                        else:
+                            submit(item)
+
+                for future in [f for f in running if f.done()]:
+                    item_args = running.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        # 工作进程异常退出：单独重试当前项目，然后重建进程池并重新提交其余项目
+                        pool.restart()
+                        yield process_item_isolated(item_args, collect_stats)
+                        resubmit = list(running.values())
+                        running.clear()
+                        for other_args in resubmit:
+                            submit(other_args[0])
+                        break
+                    if item_args[0] in deferred:
+                        deferred.discard(item_args[0])
+                        submit(item_args[0])
+        finally:
+            pool.close(cancel_futures=True)
+
+
+def merge_main(argv):
+    """merge子命令：将多个漫画文件夹、压缩包或CBZ按顺序合并为一个CBZ"""
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description="按顺序合并多个漫画文件夹、压缩包或CBZ，页面重新编号并生成一个ComicInfo.xml。"
+        "ZIP和CBZ中的图片直接复制原始压缩数据，不重新压缩",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python main.py merge -o ./海贼王第1卷.cbz ./第1话.zip ./第2话.zip ./第3话
+  python main.py merge -o ./合集.cbz ./第1卷.cbz ./第2卷.cbz --series 海贼王 --number 1
+  python main.py merge -o - ./第1话.zip ./第2话.zip --title 第1卷 | uploader
+        """,
+    )
+    parser.add_argument(
+        "inputs", nargs="+", metavar="INPUT", help="按顺序排列的漫画文件夹、压缩包或CBZ文件"
+    )
+    parser.add_argument("-o", "--output", required=True, help="输出CBZ文件路径，为-时写入标准输出")
+    parser.add_argument("--title", help="漫画标题 (默认: 输出文件名)")
+    parser.add_argument("--series", help="漫画系列名称 (默认: 标题)")
+    parser.add_argument("--number", type=int, default=1, help="漫画卷号 (默认: 1)")
+    parser.add_argument("--language", default="zh-CN", help="漫画语言代码 (默认: zh-CN)")
+    parser.add_argument(
+        "--compression",
+        choices=["store", "deflate", "auto"],
+        default="auto",
+        help="压缩策略，压缩方式与策略一致的压缩包页面直接复制，auto模式下已压缩的图片总是直接复制 (默认: auto)",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="Deflate压缩级别 (默认: zlib默认级别)",
+    )
+    parser.add_argument(
+        "--max-memory", type=parse_size, metavar="SIZE", help="内存预算，例如512M (默认: 不限制)"
+    )
+    parser.add_argument(
+        "--split-pages", type=parse_positive_int, metavar="N", help="每卷最多包含的页数 (默认: 不拆分)"
+    )
+    parser.add_argument(
+        "--split-size", type=parse_size, metavar="SIZE", help="每卷页面的最大总大小 (默认: 不拆分)"
+    )
+    parser.add_argument("--verbose", action="store_true", help="显示详细处理信息")
+    args = parser.parse_args(argv)
+    if args.output == STDOUT and (args.split_pages or args.split_size):
+        parser.error("输出到标准输出时不能拆分分卷")
+
+    from pack_comic import merge_comics_to_cbz
+
+    if args.output == STDOUT:
+        output = open_stdout_output()
+    else:
+        output = Path(args.output)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    if args.verbose:
+        for index, path in enumerate(args.inputs, 1):
+            print(f"[{index}/{len(args.inputs)}] {path}")
+
+    try:
+        volumes = merge_comics_to_cbz(
+            input_paths=[Path(path) for path in args.inputs],
+            output_path=output,
+            title=args.title,
+            series=args.series,
+            number=args.number,
+            language_iso=args.language,
+            compression=args.compression,
+            compresslevel=args.compress_level,
+            max_memory=args.max_memory,
+            split_pages=args.split_pages,
+            split_size=args.split_size,
+        )
+    except Exception as e:
+        print(f"错误: 合并失败: {e}")
+        sys.exit(1)
+
+    print(f"\n合并完成: {len(args.inputs)} 个输入")
+    for volume in volumes:
+        print(f"输出文件: {volume}")
+    if not volumes:
+        print("输出到标准输出")
+
+
+def verify_outputs(paths, jobs, header_samples=None, verbose=False):
+    """并行校验CBZ文件并显示结果
+
+    Args:
+        paths: CBZ文件路径
+        jobs (int): 并行进程数
+        header_samples (int, optional): 每个文件抽样解析文件头的页数，0表示全部页面
+        verbose (bool): 是否显示通过校验的文件
+
+    Returns:
+        tuple[int, int]: 校验的文件数和未通过的文件数
+    """
+    from verify import verify_cbzs
+
+    checked = 0
+    failed = 0
+    for result in verify_cbzs(paths, jobs, header_samples):
+        checked += 1
+        if result.ok:
+            if verbose:
+                print(f"✓ 校验通过: {result.path} ({result.pages} 页)")
+            continue
+        failed += 1
+        print(f"✗ 校验失败: {result.path}")
+        for error in result.errors:
+            print(f"    {error}")
+    return checked, failed
+
+
+def verify_main(argv):
+    """verify子命令：并行校验CBZ文件或目录树中的所有CBZ文件"""
+    parser = argparse.ArgumentParser(
+        prog="main.py verify",
+        description="并行校验CBZ文件：检查所有成员的CRC，ComicInfo.xml的页数和页面大小是否与图片成员一致，"
+        "并可抽样解析页面文件头。只读取压缩数据，不解码图片",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python main.py verify ./ComicPackerOutput
+  python main.py verify ./漫画.cbz --headers 5
+        """,
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="CBZ文件或包含CBZ文件的目录")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=parse_jobs,
+        default="auto",
+        help="并行进程数，auto表示使用CPU核心数 (默认: auto)",
+    )
+    parser.add_argument(
+        "--headers",
+        type=int,
+        nargs="?",
+        const=0,
+        metavar="N",
+        help="每个文件均匀抽样N页解析文件头，不指定N时解析全部页面 (默认: 不解析)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="显示通过校验的文件")
+    args = parser.parse_args(argv)
+
+    from verify import iter_cbz_files
+
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"错误: 路径 '{path}' 不存在")
+            sys.exit(1)
+
+    paths = itertools.chain.from_iterable(iter_cbz_files(path) for path in args.paths)
+    checked, failed = verify_outputs(paths, args.jobs, args.headers, args.verbose)
+
+    print(f"\n校验完成: {checked} 个文件")
+    if failed:
+        print(f"校验失败: {failed} 个文件")
+        sys.exit(1)
+
+
+def parse_assignment(value):
+    """解析KEY=VALUE格式的参数"""
+    key, sep, text = value.partition("=")
+    if not sep or not key.strip():
+        raise argparse.ArgumentTypeError(f"格式应为KEY=VALUE: '{value}'")
+    return key.strip(), text
+
+
+def retag_main(argv):
+    """retag子命令：只替换已有CBZ中的ComicInfo.xml，不重新打包图片"""
+    parser = argparse.ArgumentParser(
+        prog="main.py retag",
+        description="修改已有CBZ的元数据：只替换ComicInfo.xml，图片成员直接复制原始压缩数据或保持不动，"
+        "不重新压缩。ComicInfo.xml是最后一个成员时原地覆盖它并重写中央目录",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python main.py retag ./ComicPackerOutput --series 海贼王 --age-rating Teen
+  python main.py retag ./第1卷.cbz --number 1 --set Writer=尾田荣一郎 --set Summary=
+        """,
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="CBZ文件或包含CBZ文件的目录")
+    parser.add_argument("--title", help="漫画标题")
+    parser.add_argument("--series", help="漫画系列名称")
+    parser.add_argument("--number", type=int, help="漫画卷号")
+    parser.add_argument("--language", help="漫画语言代码")
+    parser.add_argument("--format", help="漫画格式，例如\"Web Comic\"")
+    parser.add_argument("--black-white", help="是否为黑白漫画: Yes、No或Unknown")
+    parser.add_argument("--manga", help="是否为日漫: Yes、No、YesAndRightToLeft或Unknown")
+    parser.add_argument("--age-rating", help="年龄分级，例如Teen或\"Adults Only 18+\"")
+    parser.add_argument(
+        "--set",
+        type=parse_assignment,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="设置任意ComicInfo.xml元素，例如Writer=作者；VALUE为空时删除该元素，可重复使用",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=parse_jobs,
+        default=1,
+        help="并行进程数，auto表示使用CPU核心数 (默认: 1)",
+    )
+    parser.add_argument(
+        "--rewrite",
+        action="store_true",
+        help="总是将图片成员复制到新文件后替换原文件，不原地覆盖 (更安全但需要读写整个文件)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="显示每个文件的处理结果")
+    args = parser.parse_args(argv)
+
+    fields = {
+        name: value
+        for name, value in (
+            ("title", args.title),
+            ("series", args.series),
+            ("number", args.number),
+            ("language_iso", args.language),
+            ("format", args.format),
+            ("black_white", args.black_white),
+            ("manga", args.manga),
+            ("age_rating", args.age_rating),
+        )
+        if value is not None
+    }
+    fields.update(args.set)
+    if not fields:
+        parser.error("至少需要指定一个要修改的元数据")
+
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"错误: 路径 '{path}' 不存在")
+            sys.exit(1)
+
+    from retag import retag_cbzs
+    from verify import iter_cbz_files
+
+    paths = itertools.chain.from_iterable(iter_cbz_files(path) for path in args.paths)
+    done = 0
+    failed = 0
+    try:
+        for result in retag_cbzs(paths, fields, args.jobs, in_place=not args.rewrite):
+            if result.ok:
+                done += 1
+                if args.verbose:
+                    print(f"✓ 已修改: {result.path} ({result.mode})")
+            else:
+                failed += 1
+                print(f"✗ 修改失败: {result.path}: {result.error}")
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+    print(f"\n修改完成: {done} 个文件")
+    if failed:
+        print(f"修改失败: {failed} 个文件")
+        sys.exit(1)
+
+
+# 子命令：第一个参数为子命令名称时交给对应的函数处理
+SUBCOMMANDS = {"merge": merge_main, "retag": retag_main, "verify": verify_main}
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     # 创建命令行参数解析器
     parser = argparse.ArgumentParser(
         description="ComicPacker - 将漫画文件打包成CBZ格式的工具",
@@ -113,15 +844,29 @@ def main():
   python main.py -i ./漫画文件夹                    # 处理单个文件夹
   python main.py -i ./漫画.zip                      # 处理单个ZIP文件
   python main.py -i ./漫画文件夹 -o ./输出目录       # 指定输出目录
+  python main.py -i ./漫画.zip -o - | uploader       # 将CBZ写入标准输出
+  downloader | python main.py -i - -e 'title="第一卷"'  # 从标准输入读取压缩包
   
   # 批量处理模式
   python main.py -ip ./输入目录                     # 批量处理输入目录下的所有文件夹和ZIP文件
   python main.py -ip ./输入目录 -o ./输出目录        # 指定输出目录
+  python main.py -ip ./输入目录 --jobs 8            # 使用8个进程并行处理
+  python main.py -ip ./输入目录 --progress          # 显示进度、吞吐量和预计剩余时间
+  python main.py -ip ./输入目录 --incremental       # 跳过自上次运行后未变化的项目
   
   # 使用额外参数
   python main.py -i ./漫画文件夹 -e 'series="火影忍者", number="1", title="第一卷"'
   python main.py -ip ./输入目录 -e 'series="海贼王", language="ja-JP"'
   
+  # 按顺序合并多个章节为一卷 (详见 python main.py merge --help)
+  python main.py merge -o ./第1卷.cbz ./第1话.zip ./第2话.zip ./第3话
+
+  # 校验CBZ文件 (详见 python main.py verify --help)
+  python main.py verify ./输出目录
+
+  # 只修改已有CBZ的元数据，不重新打包 (详见 python main.py retag --help)
+  python main.py retag ./输出目录 --series 火影忍者 --age-rating Teen
+
   # 删除原始文件
   python main.py -i ./漫画文件夹 --delete-original
   python main.py -ip ./输入目录 --delo
@@ -134,7 +879,9 @@ def main():
     # 输入参数组
     input_group = parser.add_mutually_exclusive_group(required=True)
     input_group.add_argument(
-        "-i", "--input", help="需要打包的单个漫画文件夹或ZIP文件路径"
+        "-i",
+        "--input",
+        help="需要打包的单个漫画文件夹或压缩包(ZIP、7Z、TAR)路径，为-时从标准输入读取压缩包",
     )
 
     input_group.add_argument(
@@ -148,7 +895,8 @@ def main():
         "-o",
         "--output",
         default="./ComicPackerOutput",
-        help="输出目录路径，用于存放打包后的CBZ文件 (默认: ./ComicPackerOutput)",
+        help="输出目录路径，用于存放打包后的CBZ文件。为-时将CBZ写入标准输出，仅用于单个项目模式 "
+        "(默认: ./ComicPackerOutput)",
     )
 
     parser.add_argument(
@@ -164,6 +912,188 @@ def main():
 
     parser.add_argument("--verbose", action="store_true", help="显示详细处理信息")
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=parse_jobs,
+        default="auto",
+        help="批量处理时的并行进程数，auto表示使用CPU核心数 (默认: auto)",
+    )
+
+    parser.add_argument(
+        "--compression",
+        choices=["store", "deflate", "auto"],
+        default="auto",
+        help="压缩策略: store全部存储, deflate全部压缩, auto仅压缩ComicInfo.xml、BMP和TIFF (默认: auto)",
+    )
+
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="Deflate压缩级别 (默认: zlib默认级别)",
+    )
+
+    parser.add_argument(
+        "--page-cache",
+        nargs="?",
+        const=str(DEFAULT_CACHE_PATH),
+        metavar="PATH",
+        help=f"启用页面元数据缓存，未变化的页面不再解析 (默认位置: {DEFAULT_CACHE_PATH})",
+    )
+
+    parser.add_argument(
+        "--page-cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"页面元数据缓存最多保存的页面数量 (默认: {DEFAULT_MAX_ENTRIES})",
+    )
+
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="每个打包任务的内存预算，例如512M或2G。根据页面大小估算超出预算的漫画会改为分块流式写入，"
+        "需要暂存的页面超出预算的部分写入临时文件。文件夹只按最大的页面判断，预算只决定每一页的缓冲方式 (默认: 不限制)",
+    )
+
+    parser.add_argument(
+        "--split-pages",
+        type=parse_positive_int,
+        metavar="N",
+        help='每卷最多包含的页数，超出时在一次遍历中依次写入"名称 v01.cbz"、"名称 v02.cbz"等分卷，'
+        "每卷的卷号从number开始递增 (默认: 不拆分)",
+    )
+
+    parser.add_argument(
+        "--split-size",
+        type=parse_size,
+        metavar="SIZE",
+        help="每卷页面的最大总大小，例如500MB，规则同--split-pages (默认: 不拆分)",
+    )
+
+    parser.add_argument(
+        "--transcode",
+        choices=["webp", "jpeg"],
+        help="将文件夹中的PNG、BMP和TIFF页面并行转码为WebP或JPEG后写入，转码后没有变小的页面保持原样 (默认: 不转码)",
+    )
+
+    parser.add_argument(
+        "--quality",
+        type=int,
+        choices=range(1, 101),
+        metavar="1-100",
+        default=DEFAULT_QUALITY,
+        help=f"转码和缩放后重新编码JPEG、WebP的质量 (默认: {DEFAULT_QUALITY})",
+    )
+
+    parser.add_argument(
+        "--max-width",
+        type=parse_positive_int,
+        metavar="PX",
+        help="页面最大宽度，超出的页面等比缩小并保留原格式，JPEG使用draft模式快速解码，"
+        "尺寸在限制以内的页面原样写入。适用于文件夹和压缩包，压缩包中的页面在当前进程中依次缩小 (默认: 不限制)",
+    )
+
+    parser.add_argument(
+        "--max-height",
+        type=parse_positive_int,
+        metavar="PX",
+        help="页面最大高度，例如电子墨水阅读器的1448 (默认: 不限制)",
+    )
+
+    parser.add_argument(
+        "--transcode-workers",
+        type=parse_jobs,
+        metavar="N",
+        help="每个项目转码和缩放使用的进程数，auto表示使用CPU核心数 "
+        "(默认: CPU核心数，批量并行处理时为CPU核心数除以并行进程数)",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="监视模式：持续监视输入目录，新增或变化的项目停止变化后使用常驻进程池处理。"
+        "Linux上使用inotify，其他平台定期轮询，按Ctrl+C停止",
+    )
+
+    parser.add_argument(
+        "--watch-interval",
+        type=parse_seconds,
+        default=DEFAULT_INTERVAL,
+        metavar="SECONDS",
+        help=f"监视模式的轮询间隔，使用inotify时为最长等待时间 (默认: {DEFAULT_INTERVAL:g})",
+    )
+
+    parser.add_argument(
+        "--watch-settle",
+        type=parse_seconds,
+        default=DEFAULT_SETTLE,
+        metavar="SECONDS",
+        help=f"监视模式中项目需要保持不变的时间，避免处理仍在复制中的项目 (默认: {DEFAULT_SETTLE:g})",
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="处理完成后并行校验本次生成的CBZ文件：CRC、ComicInfo.xml的页数和页面大小",
+    )
+
+    parser.add_argument(
+        "--verify-headers",
+        type=int,
+        nargs="?",
+        const=0,
+        metavar="N",
+        help="校验时每个文件均匀抽样N页解析文件头，不指定N时解析全部页面 (默认: 不解析)",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量处理，跳过自上次运行后未变化的项目 (状态保存在输出目录中)",
+    )
+
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="增量处理时额外比较文件内容哈希 (更可靠但需要读取全部输入)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const=True,
+        metavar="PATH",
+        help="记录每个项目各阶段的耗时、输入输出字节数和内存峰值，写入JSON Lines报告并在结束时显示汇总表 "
+        "(默认报告位置: 输出目录/comicpacker_stats.jsonl)",
+    )
+
+    parser.add_argument(
+        "--progress",
+        nargs="?",
+        const="auto",
+        choices=PROGRESS_MODES,
+        metavar="MODE",
+        help="在标准错误显示进度、吞吐量(MB/s、页/s)和预计剩余时间: bar为终端进度条，"
+        "lines为定时输出的JSON行，auto在终端中使用bar、否则使用lines (默认: auto)",
+    )
+
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        metavar="SECONDS",
+        help="进度刷新间隔（秒） (默认: 进度条0.2，JSON行5)",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="CSV或JSON元数据清单，按项目路径或通配符指定series、number、title、language、format、"
+        "manga、black_white和age_rating，覆盖-e中的同名参数",
+    )
+
     parser.add_argument(
         "-e",
         help='额外参数，格式: key1="value1", key2="value2" (例如: series="火影忍者", number="1")',
@@ -178,30 +1108,87 @@ def main():
 
     # 解析命令行参数
     args = parser.parse_args()
+    if args.watch and args.input:
+        parser.error("--watch只能用于批量处理模式 (-ip)")
+    if args.watch and args.progress:
+        parser.error("--progress不能与--watch同时使用")
+    if args.progress_interval is not None and args.progress_interval <= 0:
+        parser.error("--progress-interval必须大于0")
+    if args.output == STDOUT:
+        if not args.input:
+            parser.error("-o -只能用于单个项目模式 (-i)")
+        if args.split_pages or args.split_size:
+            parser.error("输出到标准输出时不能拆分分卷")
+        if args.incremental or args.verify:
+            parser.error("输出到标准输出时不能使用--incremental和--verify")
+        open_stdout_output()
+    if args.input == STDIN:
+        if args.incremental:
+            parser.error("从标准输入读取时不能使用--incremental")
+        if sys.stdin.isatty():
+            parser.error("标准输入是终端，请从文件或管道重定向压缩包")
 
     # 解析额外参数
     extra_params = parse_extra_args(args.e)
 
+    # 读取元数据清单，只读取一次并建立索引
+    manifest = None
+    if args.manifest:
+        try:
+            manifest = load_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取清单: {e}")
+            sys.exit(1)
+        if args.verbose:
+            print(f"元数据清单: {args.manifest} ({len(manifest)} 个条目)")
+
     # 创建输出目录（如果不存在）
-    os.makedirs(args.output, exist_ok=True)
+    if args.output != STDOUT:
+        os.makedirs(args.output, exist_ok=True)
 
     processed_count = 0
     error_count = 0
+    # 校验时只检查本次运行中生成的CBZ文件
+    start_time = time.time()
+
+    # 处理统计报告
+    stats_report = None
+    if args.stats:
+        stats_path = (
+            os.path.join(
+                args.output if args.output != STDOUT else ".", "comicpacker_stats.jsonl"
+            )
+            if args.stats is True
+            else args.stats
+        )
+        stats_report = StatsReport(stats_path)
+
+    # 进度报告，项目的输出在进度条上方打印
+    reporter = None
+    if args.progress:
+        reporter = ProgressReporter(args.progress, interval=args.progress_interval)
 
     if args.input:
         # 单个文件/文件夹模式
+        if args.transcode_workers is None:
+            args.transcode_workers = os.cpu_count() or 1
         if args.verbose:
             print(f"处理单个项目: {args.input}")
             print(f"输出目录: {args.output}")
 
-        if process_single_item(
-            args.input,
-            args.output,
-            args.language,
-            args.delete_original,
-            args.verbose,
-            extra_params,
-        ):
+        item_args = build_item_args(args.input, args, extra_params, manifest=manifest)
+        if reporter is None:
+            success, record = run_item(item_args, bool(stats_report))
+        else:
+            reporter.add_item(item_input_size(args.input))
+            success, output, record = process_item_captured(item_args, bool(stats_report))
+            reporter.item_done(success)
+            with reporter.suspend():
+                print(output, end="")
+        if record and stats_report:
+            stats_report.add(record)
+
+        if success:
             processed_count += 1
         else:
             error_count += 1
@@ -212,40 +1199,137 @@ def main():
             print(f"错误: 输入目录 '{args.inputpath}' 不存在")
             sys.exit(1)
 
-        try:
-            items = os.listdir(args.inputpath)
-        except PermissionError:
-            print(f"错误: 无法访问目录 '{args.inputpath}'，请检查权限")
-            sys.exit(1)
+        if args.watch:
+            # 监视模式，项目在完成后逐个返回
+            if args.verbose:
+                print(f"输出目录: {args.output}")
+            if args.transcode_workers is None:
+                args.transcode_workers = max(1, (os.cpu_count() or 1) // args.jobs)
+            results = watch_items(args, extra_params, bool(stats_report), manifest)
+        else:
+            # 边遍历目录树边处理项目，无需等待整个目录树列出
+            try:
+                # 启用进度报告时同时统计每个项目的输入字节数，无需再次遍历项目
+                find_items = iter_work_items if reporter is None else iter_sized_work_items
+                items = find_items(
+                    args.inputpath,
+                    onerror=lambda e: print(f"警告: 无法访问目录 '{e.filename}'，已跳过"),
+                )
+                first_items = list(itertools.islice(items, 2))
+            except PermissionError:
+                print(f"错误: 无法访问目录 '{args.inputpath}'，请检查权限")
+                sys.exit(1)
+            items = itertools.chain(first_items, items)
+            if reporter is not None:
+                # 在后台遍历目录树，统计输入总字节数用于估算剩余时间
+                items = reporter.discover(items)
 
-        if args.verbose:
-            print(f"开始批量处理目录: {args.inputpath}")
-            print(f"输出目录: {args.output}")
-            print(f"找到 {len(items)} 个项目")
+            if args.transcode_workers is None:
+                # 并行处理多个项目时按项目数分配转码进程，避免进程数成倍增加
+                parallel = args.jobs > 1 and len(first_items) > 1
+                args.transcode_workers = max(
+                    1, (os.cpu_count() or 1) // (args.jobs if parallel else 1)
+                )
+
+            if args.verbose:
+                print(f"开始批量处理目录: {args.inputpath}")
+                print(f"输出目录: {args.output}")
+
+            items_args = (
+                build_item_args(
+                    item, args, extra_params, item_output_dir(item, args), manifest
+                )
+                for item in items
+            )
+
+            if args.jobs > 1 and len(first_items) > 1:
+                # 并行处理，输出按输入顺序打印
+                results = process_items_parallel(
+                    items_args,
+                    args.jobs,
+                    bool(stats_report),
+                    reporter.pool_options() if reporter else None,
+                )
+            elif reporter is not None:
+                # 捕获项目的输出，在进度条上方打印
+                results = (
+                    process_item_captured(item_args, bool(stats_report))
+                    for item_args in items_args
+                )
+            else:
+                results = (
+                    (success, "", record)
+                    for success, record in (
+                        run_item(item_args, bool(stats_report)) for item_args in items_args
+                    )
+                )
 
         # 遍历输入目录中的所有项目
-        for item in items:
-            item_path = os.path.join(args.inputpath, item)
-
-            if process_single_item(
-                item_path,
-                args.output,
-                args.language,
-                args.delete_original,
-                args.verbose,
-                extra_params,
-            ):
+        item_count = 0
+        for success, output, record in results:
+            item_count += 1
+            if reporter is not None:
+                reporter.item_done(success)
+            if output:
+                with reporter.suspend() if reporter else contextlib.nullcontext():
+                    print(output, end="")
+            if record and stats_report:
+                stats_report.add(record)
+
+            if success:
                 processed_count += 1
             else:
                 error_count += 1
 
+        if args.verbose:
+            print(f"共找到 {item_count} 个项目")
+
+    if reporter is not None:
+        reporter.close()
+    close_state_stores()
+
     # 显示处理结果
     print("\n处理完成!")
     print(f"成功处理: {processed_count} 个文件")
     if error_count > 0:
         print(f"处理失败: {error_count} 个文件")
-    print(f"输出目录: {args.output}")
+    if args.output != STDOUT:
+        print(f"输出目录: {args.output}")
+    elif error_count:
+        # 标准输出的内容不完整，以非零状态退出，避免管道下游当作成功
+        sys.exit(1)
+
+    if manifest is not None and manifest.unmatched():
+        print("\n警告: 清单中的以下条目没有匹配任何项目:")
+        for pattern in manifest.unmatched():
+            print(f"    {pattern}")
+
+    if args.verify:
+        from verify import iter_cbz_files
+
+        print("\n校验输出文件...")
+        checked, failed = verify_outputs(
+            iter_cbz_files(args.output, newer_than=start_time),
+            args.jobs,
+            args.verify_headers,
+            args.verbose,
+        )
+        print(f"校验完成: {checked} 个文件")
+        if failed:
+            print(f"校验失败: {failed} 个文件")
+
+    if stats_report:
+        stats_report.close()
+        print("\n处理统计:")
+        print(stats_report.summary())
+        if stats_report.path:
+            print(f"统计报告: {stats_report.path}")
 
 
 if __name__ == "__main__":
+    # 打包为可执行文件时，进程池的子进程需要freeze_support才能正常启动
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
     main()
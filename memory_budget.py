@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 内存预算
+在读取页面之前估算打包所需的内存，决定使用内存路径还是有界缓冲路径
+"""
+
+import re
+from typing import Iterable, Optional
+
+# 内存大小单位，按1024进位
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$", re.IGNORECASE)
+
+
+def parse_memory_size(value: str) -> int:
+    """解析内存或文件大小，例如"512M"、"1.5G"、"64MiB"或字节数"1048576"
+
+    Args:
+        value (str): 大小
+
+    Returns:
+        int: 字节数
+
+    Raises:
+        ValueError: 格式无效或大小不为正数
+    """
+    match = _SIZE_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"无效的大小: {value}")
+    number, unit = match.groups()
+    size = int(float(number) * _SIZE_UNITS[unit.upper()])
+    if size <= 0:
+        raise ValueError(f"大小必须大于0: {value}")
+    return size
+
+
+def estimate_reorder_peak(
+    stored: Iterable[tuple[str, int]], order: list[str]
+) -> int:
+    """估算按存储顺序读取、按路径顺序写入时需要同时保留在内存中的最大字节数
+
+    顺序读取的压缩包中，提前到达的页面需要等待前面的页面写入。该函数按存储顺序
+    模拟这一过程，结果包括当前正在写入的页面。
+
+    Args:
+        stored (Iterable[tuple[str, int]]): 按存储顺序排列的(成员路径, 解压后大小)
+        order (list[str]): 页面的写入顺序
+
+    Returns:
+        int: 估算的内存峰值字节数
+    """
+    wanted = set(order)
+    sizes = {}
+    pending = 0
+    peak = 0
+    index = 0
+    for name, size in stored:
+        if name not in wanted or name in sizes:
+            continue
+        sizes[name] = size
+        pending += size
+        peak = max(peak, pending)
+        while index < len(order) and order[index] in sizes:
+            pending -= sizes[order[index]]
+            index += 1
+    return peak
+
+
+def fits_in_memory(estimate: int, max_memory: Optional[int]) -> bool:
+    """判断估算的内存峰值是否在预算之内，未设置预算时总是返回True"""
+    return max_memory is None or estimate <= max_memory
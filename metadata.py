@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 元数据
+ComicInfo.xml元数据字段、枚举取值的解析，以及按路径或通配符为每个项目指定元数据的清单文件
+"""
+
+import json
+import os
+from typing import Optional
+
+# 参数名与ComicInfo.xml元素名的对应关系，与打包函数的参数名一致
+FIELD_NAMES = {
+    "title": "Title",
+    "series": "Series",
+    "number": "Number",
+    "language_iso": "LanguageISO",
+    "format": "Format",
+    "black_white": "BlackAndWhite",
+    "manga": "Manga",
+    "age_rating": "AgeRating",
+}
+# 取值为cbz库枚举的参数及对应的枚举类型名称
+ENUM_FIELDS = {
+    "format": "Format",
+    "black_white": "YesNo",
+    "manga": "Manga",
+    "age_rating": "AgeRating",
+}
+# 清单文件支持的字段，与-e额外参数的键一致
+MANIFEST_FIELDS = (
+    "series",
+    "number",
+    "title",
+    "language",
+    "format",
+    "manga",
+    "black_white",
+    "age_rating",
+)
+# 清单文件中指定项目路径或通配符的字段
+MANIFEST_PATH_FIELD = "path"
+
+
+def enum_member(field: str, value):
+    """将枚举名称或取值（不区分大小写）转换为cbz库的枚举成员
+
+    Args:
+        field (str): 参数名，例如age_rating
+        value: 枚举成员、枚举名称（例如ADULTS18）或取值（例如Adults Only 18+）
+
+    Returns:
+        Enum: cbz库的枚举成员
+
+    Raises:
+        ValueError: 不是有效的枚举名称或取值
+    """
+    # 延迟导入，cbz库只在需要解析枚举时才导入
+    from cbz import constants
+
+    enum = getattr(constants, ENUM_FIELDS[field])
+    if isinstance(value, enum):
+        return value
+    text = str(value).strip().lower()
+    for member in enum:
+        if text in (member.name.lower(), str(member.value).lower()):
+            return member
+    choices = ", ".join(str(member.value) for member in enum)
+    raise ValueError(f"无效的{FIELD_NAMES[field]}: '{value}'，可选值: {choices}")
+
+
+def resolve_enum(field: str, value) -> str:
+    """将枚举名称或取值（不区分大小写）转换为ComicInfo.xml中的取值
+
+    Args:
+        field (str): 参数名，例如age_rating
+        value: 枚举成员、枚举名称（例如ADULTS18）或取值（例如Adults Only 18+）
+
+    Returns:
+        str: ComicInfo.xml中的取值
+
+    Raises:
+        ValueError: 不是有效的枚举名称或取值
+    """
+    return enum_member(field, value).value
+
+
+def _is_pattern(text: str) -> bool:
+    return any(char in text for char in "*?[")
+
+
+def _normalize(path: str) -> str:
+    """统一路径分隔符，去掉开头的./和结尾的/"""
+    path = path.strip().replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path.rstrip("/") or "."
+
+
+class Manifest:
+    """按项目路径或通配符指定元数据的清单
+
+    清单条目的路径不含/时匹配项目名称（文件夹名或压缩包文件名），含/时匹配项目相对于
+    输入目录的路径，绝对路径匹配项目的绝对路径；可以使用*、?和[]通配符。一个项目匹配多个
+    条目时，通配符条目按清单中的顺序应用，再应用精确匹配的名称和路径条目，后应用的字段覆盖
+    先应用的字段。精确路径保存在字典中，查找时不需要遍历所有条目。
+
+    Example:
+        manifest = load_manifest("manifest.csv")
+        fields = manifest.lookup("./输入目录/海贼王/第1卷", root="./输入目录")
+    """
+
+    def __init__(self, entries: list[tuple[str, dict]], source: Optional[str] = None):
+        """
+        Args:
+            entries (list[tuple[str, dict]]): (路径或通配符, 字段)，字段已经过校验
+            source (str, optional): 清单文件路径，用于错误信息
+        """
+        self.source = source
+        # 精确匹配：规范化后的名称或路径 -> 字段
+        self._exact = {}
+        # 通配符条目：(规范化后的通配符, 是否匹配路径, 字段)
+        self._patterns = []
+        # 没有匹配过任何项目的条目，用于提示清单中的拼写错误
+        self._unmatched = {}
+
+        for pattern, fields in entries:
+            key = _normalize(pattern)
+            if os.path.isabs(pattern):
+                key = _normalize(os.path.abspath(pattern))
+            if _is_pattern(key):
+                self._patterns.append((key, "/" in key, fields))
+            else:
+                self._exact.setdefault(key, {}).update(fields)
+            self._unmatched[key] = pattern
+
+    def __len__(self) -> int:
+        return len(self._unmatched)
+
+    def lookup(self, item_path, root=None) -> dict:
+        """获取项目的元数据
+
+        Args:
+            item_path: 项目路径
+            root (optional): 输入目录，默认为项目所在的目录
+
+        Returns:
+            dict: 匹配条目的字段合并结果，没有匹配的条目时为空字典
+        """
+        # 延迟导入，清单只在批量处理时使用，避免拖慢命令行启动
+        from fnmatch import fnmatchcase
+
+        absolute = os.path.abspath(item_path)
+        if root is None:
+            root = os.path.dirname(absolute)
+        relative = _normalize(os.path.relpath(absolute, os.path.abspath(root)))
+        absolute = _normalize(absolute)
+        name = relative.rsplit("/", 1)[-1]
+
+        fields = {}
+        for pattern, match_path, pattern_fields in self._patterns:
+            target = absolute if os.path.isabs(pattern) else relative if match_path else name
+            if fnmatchcase(target, pattern):
+                fields.update(pattern_fields)
+                self._unmatched.pop(pattern, None)
+        for key in (name, relative, absolute):
+            if key in self._exact:
+                fields.update(self._exact[key])
+                self._unmatched.pop(key, None)
+        return fields
+
+    def unmatched(self) -> list[str]:
+        """获取目前还没有匹配过任何项目的条目"""
+        return list(self._unmatched.values())
+
+
+def _parse_fields(raw: dict, where: str) -> dict:
+    """校验并转换清单条目的字段，空值表示不设置"""
+    fields = {}
+    for key, value in raw.items():
+        if key not in MANIFEST_FIELDS:
+            raise ValueError(
+                f"{where}: 不支持的字段 '{key}'，可用字段: {', '.join(MANIFEST_FIELDS)}"
+            )
+        if value is None or value == "":
+            continue
+        if key == "number":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{where}: 无效的卷号 '{value}'") from None
+        elif key in ENUM_FIELDS:
+            try:
+                value = resolve_enum(key, value)
+            except ValueError as e:
+                raise ValueError(f"{where}: {e}") from None
+        else:
+            value = str(value)
+        fields[key] = value
+    return fields
+
+
+def _read_csv(path) -> list[tuple[str, dict]]:
+    import csv
+
+    entries = []
+    # utf-8-sig兼容Excel保存的带BOM的CSV文件
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or MANIFEST_PATH_FIELD not in reader.fieldnames:
+            raise ValueError(f"{path}: CSV清单的表头必须包含{MANIFEST_PATH_FIELD}列")
+        try:
+            for row in reader:
+                where = f"{path}:{reader.line_num}"
+                pattern = (row.pop(MANIFEST_PATH_FIELD) or "").strip()
+                if None in row:
+                    raise ValueError(f"{where}: 列数多于表头")
+                if not pattern:
+                    raise ValueError(f"{where}: 缺少{MANIFEST_PATH_FIELD}")
+                entries.append((pattern, _parse_fields(row, where)))
+        except csv.Error as e:
+            raise ValueError(f"{path}: 无效的CSV: {e}") from None
+    return entries
+
+
+def _read_json(path) -> list[tuple[str, dict]]:
+    with open(path, encoding="utf-8-sig") as f:
+        data = json.load(f)
+
+    # 支持两种格式: {"路径": {字段}} 或 [{"path": "路径", 字段}]
+    if isinstance(data, dict):
+        items = list(data.items())
+    elif isinstance(data, list):
+        items = []
+        for index, entry in enumerate(data):
+            if not isinstance(entry, dict) or not entry.get(MANIFEST_PATH_FIELD):
+                raise ValueError(f"{path}: 第{index + 1}个条目缺少{MANIFEST_PATH_FIELD}")
+            entry = dict(entry)
+            items.append((entry.pop(MANIFEST_PATH_FIELD), entry))
+    else:
+        raise ValueError(f"{path}: JSON清单必须是对象或数组")
+
+    entries = []
+    for pattern, fields in items:
+        where = f"{path}: {pattern}"
+        if not isinstance(fields, dict):
+            raise ValueError(f"{where}: 条目必须是对象")
+        entries.append((str(pattern), _parse_fields(fields, where)))
+    return entries
+
+
+def load_manifest(path) -> Manifest:
+    """读取CSV或JSON清单文件
+
+    CSV清单的表头包含path列和要设置的字段列，空单元格表示不设置；JSON清单可以是以路径为键、
+    字段对象为值的对象，也可以是包含path字段的对象数组。可用字段见MANIFEST_FIELDS。
+
+    Args:
+        path: 清单文件路径，按扩展名区分格式（.json为JSON，其他为CSV）
+
+    Returns:
+        Manifest: 已建立索引的清单
+
+    Raises:
+        OSError: 无法读取清单文件
+        ValueError: 清单格式或字段取值无效
+    """
+    path = os.fspath(path)
+    if path.lower().endswith(".json"):
+        try:
+            entries = _read_json(path)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: 无效的JSON: {e}") from None
+    else:
+        entries = _read_csv(path)
+    return Manifest(entries, path)
@@ -1,102 +1,388 @@
+import os
 from pathlib import Path
-from typing import Optional
-import tempfile
+from typing import BinaryIO, Iterable, Optional, Union
 import zipfile
 
 from cbz.comic import ComicInfo
 from cbz.constants import PageType, YesNo, Manga, AgeRating, Format
-from cbz.page import PageInfo
 
-IMAGE_EXTENSIONS_SET = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tiff", ".tif"}
+from archive_source import ArchiveSource, ZipSource, open_archive
+from cbz_writer import CBZWriter, is_output_stream, open_cbz_writer
+from discovery import (
+    IMAGE_EXTENSIONS_SET,
+    is_image_member,
+    iter_image_files,
+    member_sort_key,
+    split_archive_name,
+)
+from memory_budget import fits_in_memory
+from page_cache import PageCache
+from stats import PackStats, stage
+from image_probe import probe_image
+from transcode import (
+    DEFAULT_QUALITY,
+    TRANSCODE_FORMATS,
+    TranscodeOptions,
+    fit_size,
+    iter_transcoded,
+    transcode_image,
+)
 
 
 def get_image_files(folder_path: Path) -> list[Path]:
-    """从文件夹中获取所有图片文件。
+    """从文件夹（包括子文件夹）中获取所有图片文件。
 
     Args:
         folder_path (Path): 文件夹路径
 
     Returns:
-        list[Path]: 图片文件路径列表
+        list[Path]: 按路径顺序排列的图片文件路径列表
     """
-    # 支持的图片格式
-    # image_extensions = {
-    #     ".jpg",
-    #     ".jpeg",
-    #     ".png",
-    #     ".gif",
-    #     ".bmp",
-    #     ".webp",
-    #     ".tiff",
-    #     ".tif",
-    # }
-
-    # 获取文件夹中的所有文件并过滤出图片文件
-    all_files = list(folder_path.iterdir())
-    image_files = sorted(
-        [path for path in all_files if path.suffix.lower() in IMAGE_EXTENSIONS_SET],
-        key=lambda p: p.name
+    return [Path(entry.path) for entry in iter_image_files(folder_path)]
+
+
+def get_image_members(archive: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """从ZIP压缩包中获取所有图片成员。
+
+    Args:
+        archive (zipfile.ZipFile): ZIP压缩包
+
+    Returns:
+        list[zipfile.ZipInfo]: 按路径顺序排列的图片成员列表，包括子文件夹中的图片
+    """
+    # 与get_image_files的顺序一致：按路径逐级排序，并忽略隐藏文件和__MACOSX等目录
+    image_members = sorted(
+        [
+            info
+            for info in archive.infolist()
+            if not info.is_dir() and is_image_member(info.filename)
+        ],
+        key=lambda info: member_sort_key(info.filename),
+    )
+
+    return image_members
+
+
+def _transcode_options(
+    transcode: Optional[str],
+    quality: int,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+) -> Optional[TranscodeOptions]:
+    """校验转码参数并构建转码设置，既不转码也不限制尺寸时返回None"""
+    if transcode is None and max_width is None and max_height is None:
+        return None
+    if transcode is not None and transcode not in TRANSCODE_FORMATS:
+        raise ValueError(f"不支持的转码格式: {transcode}")
+    if not 1 <= quality <= 100:
+        raise ValueError(f"转码质量必须在1-100之间: {quality}")
+    for name, value in (("max_width", max_width), ("max_height", max_height)):
+        if value is not None and value < 1:
+            raise ValueError(f"{name}必须大于0: {value}")
+    return TranscodeOptions(transcode, quality, max_width, max_height)
+
+
+def _timed(iterator, stats: Optional[PackStats], name: str):
+    """将等待迭代器产出下一项的时间计入指定阶段"""
+    while True:
+        with stage(stats, name):
+            item = next(iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+def _add_pages(
+    writer: CBZWriter,
+    pages: Iterable[tuple[Union[Path, os.DirEntry], Optional[bytes]]],
+    page_cache: Optional[PageCache] = None,
+    stats: Optional[PackStats] = None,
+    stream: bool = False,
+) -> None:
+    """将图片文件逐页写入CBZ写入器
+
+    Args:
+        writer (CBZWriter): CBZ写入器或分卷写入器
+        pages (Iterable): 按顺序排列的(图片文件, 转码后的内容)，未转码的页面内容为None
+        page_cache (PageCache, optional): 页面元数据缓存，命中的页面不再解析图片头
+        stats (PackStats, optional): 处理统计，记录输入字节数
+        stream (bool, optional): 是否分块流式写入每一页，不将整页读入内存。默认为False
+    """
+    for entry, transcoded in pages:
+        path = Path(entry)
+        if transcoded is not None:
+            size = entry.stat().st_size
+            if stats is not None:
+                stats.bytes_in += size
+            writer.add_page(
+                transcoded, name=path.name, type=PageType.STORY, input_size=size
+            )
+            continue
+
+        if page_cache is None:
+            if stream:
+                with path.open("rb") as f:
+                    page = writer.add_page_stream(f, name=path.name, type=PageType.STORY)
+                if stats is not None:
+                    stats.bytes_in += page.image_size
+                continue
+
+            with stage(stats, "load"):
+                data = path.read_bytes()
+            if stats is not None:
+                stats.bytes_in += len(data)
+            writer.add_page(data, name=path.name, type=PageType.STORY)
+            continue
+
+        # 缓存命中时无需解析图片，直接从文件流式写入
+        with stage(stats, "load"):
+            stat = entry.stat()
+            cached = page_cache.get(path, stat)
+        if cached is not None:
+            if stats is not None:
+                stats.bytes_in += stat.st_size
+            writer.add_page_file(
+                path, cached.suffix, cached.width, cached.height, type=PageType.STORY
+            )
+            continue
+
+        if stream:
+            with path.open("rb") as f:
+                page = writer.add_page_stream(
+                    f, stat.st_size, name=path.name, type=PageType.STORY
+                )
+            data = None
+        else:
+            with stage(stats, "load"):
+                data = path.read_bytes()
+            page = writer.add_page(data, name=path.name, type=PageType.STORY)
+        if stats is not None:
+            stats.bytes_in += page.image_size
+        page_cache.put(
+            path, stat, page.suffix, page.image_width, page.image_height, data
+        )
+
+
+class _ResizingWriter:
+    """包装CBZ写入器，将压缩包中超出尺寸限制的页面缩小后写入
+
+    压缩包来源通过add_page、add_page_stream和copy_zip_member写入页面。先只解析文件头，
+    尺寸在限制以内的页面原样交给写入器（ZIP成员仍直接复制原始压缩数据），
+    超出限制的页面读入内存后在当前进程中缩小。其他属性直接访问被包装的写入器。
+    """
+
+    def __init__(self, writer: CBZWriter, options: TranscodeOptions):
+        """
+        Args:
+            writer (CBZWriter): CBZ写入器或分卷写入器
+            options (TranscodeOptions): 尺寸限制和编码质量，format为None
+        """
+        self._writer = writer
+        self._options = options
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def _fits(self, source) -> bool:
+        """根据文件头判断页面是否在尺寸限制以内，无法解析时交给Pillow判断"""
+        info = probe_image(source)
+        return info is not None and fit_size(info[1], info[2], self._options) is None
+
+    def _add_resized(self, data: bytes, name: str, type: PageType):
+        with stage(self._writer.stats, "transcode"):
+            resized = transcode_image(data, self._options)
+        return self._writer.add_page(
+            data if resized is None else resized, name=name, type=type, input_size=len(data)
+        )
+
+    def add_page(self, data, name: str = "", type: PageType = PageType.STORY, input_size=None):
+        if self._fits(data):
+            return self._writer.add_page(data, name=name, type=type, input_size=input_size)
+        return self._add_resized(bytes(data), name, type)
+
+    def add_page_stream(self, src, size=None, name: str = "", type: PageType = PageType.STORY):
+        fits = self._fits(src)
+        src.seek(0)
+        if fits:
+            return self._writer.add_page_stream(src, size, name=name, type=type)
+        return self._add_resized(src.read(), name, type)
+
+    def copy_zip_member(self, source, info, type: PageType = PageType.STORY, stream=False):
+        if not info.flag_bits & 0x1:
+            with source.open(info) as f:
+                fits = self._fits(f)
+            if not fits:
+                with stage(self._writer.stats, "extract"):
+                    data = source.read(info)
+                return self._add_resized(data, Path(info.filename).name, type)
+        return self._writer.copy_zip_member(source, info, type=type, stream=stream)
+
+
+def _resolve_output(output_path, title: str) -> Union[Path, BinaryIO]:
+    """获取输出位置：文件对象原样返回，路径统一使用.cbz后缀，未指定时为脚本所在目录下的同名文件"""
+    if is_output_stream(output_path):
+        return output_path
+    return (
+        Path(output_path).with_suffix(".cbz")
+        if output_path
+        else Path(__file__).parent / f"{title}.cbz"
     )
 
-    return image_files
+
+def write_pages_to_cbz(
+    image_paths: list[Union[Path, os.DirEntry]],
+    output_path: Union[Path, BinaryIO],
+    comic: ComicInfo,
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stats: Optional[PackStats] = None,
+    stream: bool = False,
+    transcode: Optional[TranscodeOptions] = None,
+    transcode_workers: int = 1,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
+) -> list[Path]:
+    """将图片逐页流式写入CBZ文件，内存中只保留当前页面。
+
+    Args:
+        image_paths (list[Path | os.DirEntry]): 按顺序排列的图片文件，
+            传入DirEntry时直接复用遍历目录时获取的stat信息
+        output_path (Path | BinaryIO): 输出CBZ文件路径，或可写的二进制文件对象
+        comic (ComicInfo): 漫画信息，页面元数据将在写入时填充
+        compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。默认为"auto"
+        compresslevel (int, optional): Deflate压缩级别(0-9)
+        page_cache (PageCache, optional): 页面元数据缓存，命中的页面不再解析图片头
+        stats (PackStats, optional): 处理统计，记录各阶段耗时和输入输出字节数
+        stream (bool, optional): 是否分块流式写入每一页，不将整页读入内存。默认为False
+        transcode (TranscodeOptions, optional): 转码设置，需要转码或缩小的页面处理后写入
+        transcode_workers (int, optional): 转码和缩放使用的工作进程数。默认为1
+        split_pages (int, optional): 每卷最多包含的页数，指定后按分卷写入
+        split_size (int, optional): 每卷页面的最大总字节数，指定后按分卷写入
+
+    Returns:
+        list[Path]: 输出的CBZ文件路径，拆分分卷时按卷号排列，输出到文件对象时为空列表
+    """
+    if transcode is None:
+        pages = ((entry, None) for entry in image_paths)
+    else:
+        pages = _timed(
+            iter_transcoded(image_paths, transcode, transcode_workers), stats, "transcode"
+        )
+
+    with open_cbz_writer(
+        output_path, comic, compression, compresslevel, stats, split_pages, split_size
+    ) as writer:
+        _add_pages(writer, pages, page_cache, stats, stream)
+    return writer.volumes
 
 
 def pack_comic(
     comic_path: Path,
-    output_path: Optional[Path] = None,
+    output_path: Optional[Union[Path, BinaryIO]] = None,
     show: bool = False,
     title: Optional[str] = None,
     remove_original_file: bool = False,
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stats: Optional[PackStats] = None,
+    max_memory: Optional[int] = None,
+    transcode: Optional[str] = None,
+    quality: int = DEFAULT_QUALITY,
+    transcode_workers: Optional[int] = None,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
     **kwargs,
-) -> None:
+) -> list[Path]:
     """将漫画文件夹打包成CBZ格式的漫画文件。
 
     Args:
         comic_path (Path): 包含漫画图片的文件夹路径
-        output_path (Path, optional): 输出CBZ文件的路径。如果未指定，将在脚本所在目录创建同名CBZ文件
+        output_path (Path | BinaryIO, optional): 输出CBZ文件的路径，或可写的二进制文件对象
+            （例如sys.stdout.buffer，不能seek时使用数据描述符写入，不能同时拆分分卷）。
+            如果未指定，将在脚本所在目录创建同名CBZ文件
         show (bool, optional): 是否显示漫画信息。默认为False
         title (str, optional): 漫画标题。如果未指定，将使用文件夹名称
         remove_original_file (bool, optional): 打包完成后是否删除源文件。默认为False
+        compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。
+            auto模式下JPEG、PNG、GIF和WebP直接存储，ComicInfo.xml、BMP和TIFF使用Deflate压缩。默认为"auto"
+        compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+        page_cache (PageCache, optional): 页面元数据缓存，命中的页面不再解析图片头
+        stats (PackStats, optional): 处理统计，记录各阶段耗时、输入输出字节数
+        max_memory (int, optional): 内存预算字节数。文件夹每次只读入一页，预算只决定页面的缓冲方式：
+            最大的页面超出预算时改为分块流式写入每一页，不限制转码、缩放等其他内存占用。默认不限制
+        transcode (str, optional): 转码目标格式，可选"webp"和"jpeg"。指定后PNG、BMP和TIFF页面
+            将在进程池中并行重新编码，ComicInfo中的页面大小和尺寸与转码结果一致。默认不转码
+        quality (int, optional): 转码质量(1-100)。默认为85
+        transcode_workers (int, optional): 转码和缩放使用的工作进程数。默认为CPU核心数
+        max_width (int, optional): 页面最大宽度，超出的页面等比缩小，JPEG使用draft模式解码。
+            尺寸在限制以内的页面原样写入。默认不限制
+        max_height (int, optional): 页面最大高度，规则同max_width。默认不限制
+        split_pages (int, optional): 每卷最多包含的页数。指定后在一次遍历中将页面依次写入
+            "名称 v01.cbz"、"名称 v02.cbz"等分卷，每卷有自己的ComicInfo.xml，卷号从number开始递增
+        split_size (int, optional): 每卷页面的最大总字节数，规则同split_pages
 
     Returns:
-        None: 函数将直接创建CBZ文件
+        list[Path]: 输出的CBZ文件路径，拆分分卷时按卷号排列，输出到文件对象时为空列表
     """
+    transcode_options = _transcode_options(transcode, quality, max_width, max_height)
     # 如果未指定标题，使用文件夹名称作为标题
     title = title or Path(comic_path).name
     # 设置输出路径，如果未指定则使用默认路径
-    output_path = (
-        Path(output_path).with_suffix(".cbz")
-        if output_path
-        else Path(__file__).parent / f"{title}.cbz"
-    )
-
-    # 获取图片文件并转换为PageInfo对象
-    image_paths = get_image_files(comic_path)
-    pages = [PageInfo.load(path=path, type=PageType.STORY) for path in image_paths]
+    output_path = _resolve_output(output_path, title)
+
+    # 获取图片文件
+    with stage(stats, "discover"):
+        image_paths = list(iter_image_files(comic_path))
+        # 内存路径每次只读入一页，峰值取决于最大的页面。预算只决定每一页整页读入还是分块写入
+        stream = not fits_in_memory(
+            max((entry.stat().st_size for entry in image_paths), default=0), max_memory
+        )
+    if stats is not None:
+        stats.bounded = stream
 
-    # 创建ComicInfo对象
+    # 创建ComicInfo对象，页面元数据在写入时填充
     comic = ComicInfo.from_pages(
-        pages=pages,
+        pages=[],
         title=title,
         **kwargs,
     )
 
+    # 逐页流式写入CBZ文件
+    volumes = write_pages_to_cbz(
+        image_paths,
+        output_path,
+        comic,
+        compression,
+        compresslevel,
+        page_cache,
+        stats,
+        stream,
+        transcode_options,
+        transcode_workers or os.cpu_count() or 1,
+        split_pages,
+        split_size,
+    )
+
     # 如果需要显示漫画信息
     if show:
-        comic.show()
-
-    # 将漫画打包并写入CBZ文件
-    output_path.write_bytes(comic.pack())
+        for volume in volumes:
+            ComicInfo.from_cbz(volume).show()
 
     # 如果需要删除源文件
     if remove_original_file:
         import shutil
         shutil.rmtree(comic_path)
 
+    return volumes
+
 
 def pack_comic_to_cbz(
     comic_path: Path,
-    output_path: Optional[Path] = None,
+    output_path: Optional[Union[Path, BinaryIO]] = None,
     show: bool = False,
     title: Optional[str] = None,
     series: Optional[str] = None,
@@ -107,12 +393,26 @@ def pack_comic_to_cbz(
     manga: Manga = Manga.YES,
     age_rating: AgeRating = AgeRating.PENDING,
     remove_original_file: bool = False,
-) -> None:
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stats: Optional[PackStats] = None,
+    max_memory: Optional[int] = None,
+    transcode: Optional[str] = None,
+    quality: int = DEFAULT_QUALITY,
+    transcode_workers: Optional[int] = None,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
+) -> list[Path]:
     """将漫画文件夹打包成CBZ格式的漫画文件。
 
     Args:
         comic_path (Path): 包含漫画图片的文件夹路径
-        output_path (Path, optional): 输出CBZ文件的路径。如果未指定，将在脚本所在目录创建同名CBZ文件
+        output_path (Path | BinaryIO, optional): 输出CBZ文件的路径，或可写的二进制文件对象
+            （例如sys.stdout.buffer，不能seek时使用数据描述符写入，不能同时拆分分卷）。
+            如果未指定，将在脚本所在目录创建同名CBZ文件
         show (bool, optional): 是否显示漫画信息。默认为False
         title (str, optional): 漫画标题。如果未指定，将使用文件夹名称
         series (str, optional): 漫画系列名称
@@ -123,26 +423,46 @@ def pack_comic_to_cbz(
         manga: (Manga, optional): 是否为日式漫画。默认为YES
         age_rating (AgeRating, optional): 年龄分级。默认为PENDING
         remove_original_file (bool, optional): 打包完成后是否删除源文件。默认为False
+        compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。
+            auto模式下JPEG、PNG、GIF和WebP直接存储，ComicInfo.xml、BMP和TIFF使用Deflate压缩。默认为"auto"
+        compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+        page_cache (PageCache, optional): 页面元数据缓存，命中的页面不再解析图片头
+        stats (PackStats, optional): 处理统计，记录各阶段耗时、输入输出字节数
+        max_memory (int, optional): 内存预算字节数。文件夹每次只读入一页，预算只决定页面的缓冲方式：
+            最大的页面超出预算时改为分块流式写入每一页，不限制转码、缩放等其他内存占用。默认不限制
+        transcode (str, optional): 转码目标格式，可选"webp"和"jpeg"。指定后PNG、BMP和TIFF页面
+            将在进程池中并行重新编码，ComicInfo中的页面大小和尺寸与转码结果一致。默认不转码
+        quality (int, optional): 转码质量(1-100)。默认为85
+        transcode_workers (int, optional): 转码和缩放使用的工作进程数。默认为CPU核心数
+        max_width (int, optional): 页面最大宽度，超出的页面等比缩小，JPEG使用draft模式解码。
+            尺寸在限制以内的页面原样写入。默认不限制
+        max_height (int, optional): 页面最大高度，规则同max_width。默认不限制
+        split_pages (int, optional): 每卷最多包含的页数。指定后在一次遍历中将页面依次写入
+            "名称 v01.cbz"、"名称 v02.cbz"等分卷，每卷有自己的ComicInfo.xml，卷号从number开始递增
+        split_size (int, optional): 每卷页面的最大总字节数，规则同split_pages
 
     Returns:
-        None: 函数将直接创建CBZ文件
+        list[Path]: 输出的CBZ文件路径，拆分分卷时按卷号排列，输出到文件对象时为空列表
     """
+    transcode_options = _transcode_options(transcode, quality, max_width, max_height)
     # 如果未指定标题，使用文件夹名称作为标题
     title = title or Path(comic_path).name
     # 设置输出路径，如果未指定则使用默认路径
-    output_path = (
-        Path(output_path).with_suffix(".cbz")
-        if output_path
-        else Path(__file__).parent / f"{title}.cbz"
-    )
-
-    # 获取图片文件并转换为PageInfo对象
-    image_paths = get_image_files(comic_path)
-    pages = [PageInfo.load(path=path, type=PageType.STORY) for path in image_paths]
+    output_path = _resolve_output(output_path, title)
+
+    # 获取图片文件
+    with stage(stats, "discover"):
+        image_paths = list(iter_image_files(comic_path))
+        # 内存路径每次只读入一页，峰值取决于最大的页面。预算只决定每一页整页读入还是分块写入
+        stream = not fits_in_memory(
+            max((entry.stat().st_size for entry in image_paths), default=0), max_memory
+        )
+    if stats is not None:
+        stats.bounded = stream
 
-    # 创建ComicInfo对象
+    # 创建ComicInfo对象，页面元数据在写入时填充
     comic = ComicInfo.from_pages(
-        pages=pages,
+        pages=[],
         title=title,
         series=series,
         number=number,
@@ -153,12 +473,26 @@ def pack_comic_to_cbz(
         age_rating=age_rating,
     )
 
+    # 逐页流式写入CBZ文件
+    volumes = write_pages_to_cbz(
+        image_paths,
+        output_path,
+        comic,
+        compression,
+        compresslevel,
+        page_cache,
+        stats,
+        stream,
+        transcode_options,
+        transcode_workers or os.cpu_count() or 1,
+        split_pages,
+        split_size,
+    )
+
     # 如果需要显示漫画信息
     if show:
-        comic.show()
-
-    # 将漫画打包并写入CBZ文件
-    output_path.write_bytes(comic.pack())
+        for volume in volumes:
+            ComicInfo.from_cbz(volume).show()
 
     # 如果需要删除源文件
     if remove_original_file:
@@ -166,10 +500,12 @@ def pack_comic_to_cbz(
 
         shutil.rmtree(comic_path)
 
+    return volumes
+
 
 def pack_compressed_comic_to_cbz(
-    compressed_path: Path,
-    output_path: Optional[Path] = None,
+    compressed_path: Union[Path, bytes, bytearray, memoryview, BinaryIO],
+    output_path: Optional[Union[Path, BinaryIO]] = None,
     show: bool = False,
     title: Optional[str] = None,
     series: Optional[str] = None,
@@ -180,14 +516,31 @@ def pack_compressed_comic_to_cbz(
     manga: Manga = Manga.YES,
     age_rating: AgeRating = AgeRating.PENDING,
     remove_original_file: bool = False,
-) -> None:
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    stats: Optional[PackStats] = None,
+    max_memory: Optional[int] = None,
+    quality: int = DEFAULT_QUALITY,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
+) -> list[Path]:
     """将压缩包格式的漫画转换为CBZ格式的漫画文件。
 
+    支持ZIP、7z（需要py7zr）和TAR（包括.tar.gz、.tar.bz2、.tar.xz和.tar.zst）压缩包，
+    图片按路径顺序直接从压缩包流式写入CBZ，不会解压到临时目录。
+    压缩包也可以是内存中的数据或文件对象（例如sys.stdin.buffer），此时按文件头识别格式，
+    内存中ZIP的原始压缩数据直接从缓冲区切片写入，不复制页面数据。
+
     Args:
-        compressed_path (Path): 压缩包格式的漫画文件路径
-        output_path (Path, optional): 输出CBZ文件的路径。如果未指定，将在脚本所在目录创建同名CBZ文件
+        compressed_path (Path | bytes | bytearray | memoryview | BinaryIO): 压缩包格式的漫画文件路径，
+            或内存中的压缩包数据、二进制文件对象。不能seek的文件对象会先读入内存
+        output_path (Path | BinaryIO, optional): 输出CBZ文件的路径，或可写的二进制文件对象
+            （例如sys.stdout.buffer，不能seek时使用数据描述符写入，不能同时拆分分卷）。
+            如果未指定，将在脚本所在目录创建同名CBZ文件
         show (bool, optional): 是否显示漫画信息。默认为False
-        title (str, optional): 漫画标题。如果未指定，将使用压缩包名称
+        title (str, optional): 漫画标题。如果未指定，将使用压缩包名称；输入不是文件路径时必须指定
         series (str, optional): 漫画系列名称
         number (int, optional): 漫画卷号
         language_iso (str, optional): 语言代码。默认为"zh-CN"
@@ -195,48 +548,221 @@ def pack_compressed_comic_to_cbz(
         black_white (YesNo, optional): 是否为黑白漫画。默认为NO
         manga: (Manga, optional): 是否为日式漫画。默认为YES
         age_rating (AgeRating, optional): 年龄分级。默认为PENDING
-        remove_original_file (bool, optional): 打包完成后是否删除源文件。默认为False
+        remove_original_file (bool, optional): 打包完成后是否删除源文件，输入不是文件路径时忽略。默认为False
+        compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。
+            auto模式下JPEG、PNG、GIF和WebP直接存储，ComicInfo.xml、BMP和TIFF使用Deflate压缩。默认为"auto"
+        compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+        stats (PackStats, optional): 处理统计，记录各阶段耗时、输入输出字节数
+        max_memory (int, optional): 内存预算字节数。打包前根据页面大小估算内存峰值，
+            超出预算时改为分块流式写入每一页。默认不限制
+        quality (int, optional): 缩小后JPEG和WebP页面的编码质量(1-100)。默认为85
+        max_width (int, optional): 页面最大宽度，超出的页面读入内存后等比缩小并保留原格式，
+            尺寸在限制以内的页面只解析文件头并原样写入。默认不限制
+        max_height (int, optional): 页面最大高度，规则同max_width。默认不限制
+        split_pages (int, optional): 每卷最多包含的页数。指定后将页面依次写入
+            "名称 v01.cbz"、"名称 v02.cbz"等分卷，卷号从number开始递增
+        split_size (int, optional): 每卷页面的最大总字节数，规则同split_pages
 
     Returns:
-        None: 函数将直接创建CBZ文件
+        list[Path]: 输出的CBZ文件路径，拆分分卷时按卷号排列，输出到文件对象时为空列表
     """
-    # 创建临时目录
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
+    resize_options = _transcode_options(None, quality, max_width, max_height)
+    from_path = isinstance(compressed_path, (str, os.PathLike))
+    if from_path:
+        compressed_path = Path(compressed_path)
+        # 如果未指定标题，使用压缩包名称（不含扩展名）作为标题
+        title = title or split_archive_name(compressed_path.name)[0]
+    elif not title:
+        raise ValueError("压缩包不是文件路径时需要指定title")
+    # 设置输出路径，如果未指定则使用默认路径
+    output_path = _resolve_output(output_path, title)
 
-        # 解压文件到临时目录
-        with zipfile.ZipFile(compressed_path, "r") as zip_ref:
-            zip_ref.extractall(temp_path)
+    # 创建ComicInfo对象，页面元数据在写入时填充
+    comic = ComicInfo.from_pages(
+        pages=[],
+        title=title,
+        series=series,
+        number=number,
+        language_iso=language_iso,
+        format=format,
+        black_white=black_white,
+        manga=manga,
+        age_rating=age_rating,
+    )
 
-        # 如果未指定标题，使用压缩包名称（不含扩展名）作为标题
-        title = title or compressed_path.stem
-
-        # 调用现有的打包函数处理解压后的文件
-        pack_comic_to_cbz(
-            comic_path=temp_path,
-            output_path=output_path,
-            show=show,
-            title=title,
-            series=series,
-            number=number,
-            language_iso=language_iso,
-            format=format,
-            black_white=black_white,
-            manga=manga,
-            age_rating=age_rating,
-            remove_original_file=remove_original_file,
-        )
+    # 从压缩包直接流式写入页面，ZIP中的图片尽量直接复制原始压缩数据
+    with open_archive(compressed_path) as source:
+        with stage(stats, "discover"):
+            # 超出内存预算时页面分块流式写入，需要暂存的页面超出预算的部分写入临时文件
+            bounded = _needs_bounded_copy(source, max_memory)
+        if stats is not None:
+            stats.bytes_in += source.size()
+            stats.bounded = bounded
+
+        with open_cbz_writer(
+            output_path, comic, compression, compresslevel, stats, split_pages, split_size
+        ) as writer:
+            source.copy_pages(
+                _ResizingWriter(writer, resize_options) if resize_options else writer,
+                type=PageType.STORY,
+                memory_limit=max_memory if bounded else None,
+            )
 
-        # 如果需要删除源文件
-        if remove_original_file:
+    # 如果需要显示漫画信息
+    if show:
+        for volume in writer.volumes:
+            ComicInfo.from_cbz(volume).show()
+
+    # 如果需要删除源文件
+    if remove_original_file and from_path:
+        try:
+            compressed_path.unlink()
+        except Exception as e:
             try:
-                compressed_path.unlink()
+                os.remove(compressed_path)
             except Exception as e:
-                try:
-                    import os
+                import shutil
 
-                    os.remove(compressed_path)
-                except Exception as e:
-                    import shutil
+                shutil.rmtree(compressed_path)
+
+    return writer.volumes
+
+
+def _needs_bounded_copy(source: ArchiveSource, max_memory: Optional[int]) -> bool:
+    """判断压缩包是否需要在内存预算内分块流式写入页面
+
+    只能一次读取的来源（例如压缩的TAR）无法事先估算内存峰值，设置预算时总是分块写入。
+    """
+    if source.single_pass:
+        return max_memory is not None
+    source.image_names()
+    return not fits_in_memory(source.estimate_memory(), max_memory)
+
+
+def _open_merge_source(path: Path) -> ArchiveSource:
+    """打开合并输入中的压缩包，CBZ按ZIP读取"""
+    # CBZ本身就是ZIP，批量处理时不作为输入，合并时需要单独识别
+    if path.suffix.lower() == ".cbz":
+        return ZipSource(path)
+    return open_archive(path)
+
+
+def merge_comics_to_cbz(
+    input_paths: list[Path],
+    output_path: Union[Path, BinaryIO],
+    show: bool = False,
+    title: Optional[str] = None,
+    series: Optional[str] = None,
+    number: Optional[int] = None,
+    language_iso: str = "zh-CN",
+    format: Format = Format.WEB_COMIC,
+    black_white: YesNo = YesNo.NO,
+    manga: Manga = Manga.YES,
+    age_rating: AgeRating = AgeRating.PENDING,
+    compression: str = "auto",
+    compresslevel: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stats: Optional[PackStats] = None,
+    max_memory: Optional[int] = None,
+    split_pages: Optional[int] = None,
+    split_size: Optional[int] = None,
+) -> list[Path]:
+    """将多个漫画文件夹、压缩包或CBZ按顺序合并为一个CBZ文件。
+
+    页面按输入顺序依次写入并重新编号，合并后生成一个包含全部页面的ComicInfo.xml，
+    输入CBZ中原有的ComicInfo.xml不会保留。ZIP和CBZ中的图片直接复制原始压缩数据，
+    不进行解压和重新压缩。
+
+    Args:
+        input_paths (list[Path]): 按顺序排列的漫画文件夹、压缩包或CBZ文件路径
+        output_path (Path | BinaryIO): 输出CBZ文件的路径，或可写的二进制文件对象（不能同时拆分分卷）
+        show (bool, optional): 是否显示漫画信息。默认为False
+        title (str, optional): 漫画标题。如果未指定，将使用输出文件名，输出到文件对象时使用第一个输入的名称
+        series (str, optional): 漫画系列名称。如果未指定，将使用标题
+        number (int, optional): 漫画卷号
+        language_iso (str, optional): 语言代码。默认为"zh-CN"
+        format (Format, optional): 漫画格式。默认为WEB_COMIC
+        black_white (YesNo, optional): 是否为黑白漫画。默认为NO
+        manga: (Manga, optional): 是否为日式漫画。默认为YES
+        age_rating (AgeRating, optional): 年龄分级。默认为PENDING
+        compression (str, optional): 压缩策略，可选"store"、"deflate"和"auto"。默认为"auto"
+        compresslevel (int, optional): Deflate压缩级别(0-9)。默认使用zlib的默认级别
+        page_cache (PageCache, optional): 页面元数据缓存，文件夹中命中的页面不再解析图片头
+        stats (PackStats, optional): 处理统计，记录各阶段耗时、输入输出字节数
+        max_memory (int, optional): 内存预算字节数，超出预算的输入改为分块流式写入。默认不限制
+        split_pages (int, optional): 每卷最多包含的页数，规则同pack_comic_to_cbz
+        split_size (int, optional): 每卷页面的最大总字节数，规则同pack_comic_to_cbz
+
+    Returns:
+        list[Path]: 输出的CBZ文件路径，拆分分卷时按卷号排列，输出到文件对象时为空列表
+
+    Raises:
+        ValueError: 没有输入，或输入不是文件夹和支持的压缩包
+    """
+    input_paths = [Path(path) for path in input_paths]
+    if not input_paths:
+        raise ValueError("没有需要合并的输入")
+    for path in input_paths:
+        if not path.exists():
+            raise ValueError(f"路径不存在: {path}")
+
+    if is_output_stream(output_path):
+        title = title or split_archive_name(input_paths[0].name)[0]
+    else:
+        output_path = Path(output_path).with_suffix(".cbz")
+        title = title or output_path.stem
+
+    # 创建ComicInfo对象，页面元数据在写入时填充
+    comic = ComicInfo.from_pages(
+        pages=[],
+        title=title,
+        series=series or title,
+        number=number,
+        language_iso=language_iso,
+        format=format,
+        black_white=black_white,
+        manga=manga,
+        age_rating=age_rating,
+    )
+
+    bounded = False
+    with open_cbz_writer(
+        output_path, comic, compression, compresslevel, stats, split_pages, split_size
+    ) as writer:
+        for path in input_paths:
+            if path.is_dir():
+                with stage(stats, "discover"):
+                    image_paths = list(iter_image_files(path))
+                    stream = not fits_in_memory(
+                        max((entry.stat().st_size for entry in image_paths), default=0),
+                        max_memory,
+                    )
+                bounded = bounded or stream
+                _add_pages(
+                    writer,
+                    ((entry, None) for entry in image_paths),
+                    page_cache,
+                    stats,
+                    stream,
+                )
+                continue
+
+            with _open_merge_source(path) as source:
+                with stage(stats, "discover"):
+                    stream = _needs_bounded_copy(source, max_memory)
+                bounded = bounded or stream
+                if stats is not None:
+                    stats.bytes_in += path.stat().st_size
+                source.copy_pages(
+                    writer, type=PageType.STORY, memory_limit=max_memory if stream else None
+                )
+
+    if stats is not None:
+        stats.bounded = bounded
+
+    # 如果需要显示漫画信息
+    if show:
+        for volume in writer.volumes:
+            ComicInfo.from_cbz(volume).show()
 
-                    shutil.rmtree(compressed_path)
+    return writer.volumes
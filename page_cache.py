@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 页面元数据缓存
+按(路径, 大小, 修改时间)缓存图片的格式和尺寸，未变化的页面无需再次解析
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# 默认缓存文件位置
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "comicpacker" / "pages.sqlite"
+# 默认最多缓存的页面数量
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+class CachedPage(NamedTuple):
+    """缓存的页面元数据"""
+
+    suffix: str
+    width: int
+    height: int
+    size: int
+    content_hash: Optional[str] = None
+
+
+class PageCache:
+    """基于SQLite的页面元数据缓存
+
+    缓存条目以页面的绝对路径、大小和修改时间为键，文件变化后旧条目自然失效。
+    缓存条目数超过上限时按最近使用时间淘汰最旧的条目。
+
+    Example:
+        with PageCache(DEFAULT_CACHE_PATH) as cache:
+            stat = path.stat()
+            page = cache.get(path, stat)
+    """
+
+    def __init__(
+        self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, store_hash=False
+    ):
+        """
+        Args:
+            path: 缓存数据库路径
+            max_entries (int): 最多缓存的页面数量
+            store_hash (bool): 新增条目时是否同时保存页面内容的SHA-256哈希
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.store_hash = store_hash
+        self._hits = []
+        self._pending = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 延迟导入，避免拖慢命令行启动
+        import sqlite3
+
+        # 并行处理时多个进程会同时写入，等待锁而不是立即失败
+        self._conn = sqlite3.connect(str(self.path), timeout=60)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    suffix TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    content_hash TEXT,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (path, size, mtime_ns)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _key(path, stat):
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, path, stat) -> Optional[CachedPage]:
+        """查询页面的缓存元数据
+
+        Args:
+            path: 页面文件路径
+            stat (os.stat_result): 页面文件的当前状态
+
+        Returns:
+            Optional[CachedPage]: 命中时返回缓存的元数据，否则返回None
+        """
+        key = self._key(path, stat)
+        row = self._conn.execute(
+            "SELECT suffix, width, height, content_hash FROM pages "
+            "WHERE path = ? AND size = ? AND mtime_ns = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+
+        # 最近使用时间在关闭时批量更新
+        self._hits.append(key)
+        suffix, width, height, content_hash = row
+        return CachedPage(suffix, width, height, stat.st_size, content_hash)
+
+    def put(self, path, stat, suffix, width, height, content=None):
+        """保存页面元数据
+
+        Args:
+            path: 页面文件路径
+            stat (os.stat_result): 读取页面前获取的文件状态
+            suffix (str): 图片后缀
+            width (int): 图片宽度
+            height (int): 图片高度
+            content (bytes, optional): 页面内容，store_hash为True时用于计算哈希
+        """
+        content_hash = None
+        if self.store_hash and content is not None:
+            content_hash = hashlib.sha256(content).hexdigest()
+
+        # 新条目在关闭时批量写入，避免每页一次事务
+        self._pending.append(
+            (*self._key(path, stat), suffix, width, height, content_hash, time.time())
+        )
+
+    def evict(self):
+        """条目数超过上限时，按最近使用时间淘汰到上限的90%"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()
+        if count <= self.max_entries:
+            return
+
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM pages WHERE rowid IN "
+                "(SELECT rowid FROM pages ORDER BY last_used LIMIT ?)",
+                (count - int(self.max_entries * 0.9),),
+            )
+
+    def flush(self):
+        """写入新增条目并更新命中条目的使用时间"""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+            self._conn.executemany(
+                "UPDATE pages SET last_used = ? "
+                "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                [(now, *key) for key in self._hits],
+            )
+        self._pending = []
+        self._hits = []
+
+    def close(self):
+        """写入缓存变更，执行淘汰并关闭数据库"""
+        self.flush()
+        self.evict()
+        self._conn.close()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 进度报告
+统计已完成的项目、页面和输入字节数，显示吞吐量和预计剩余时间。工作进程中的页面计数
+按时间间隔合并后写入共享计数器，终端进度条和机器可读的进度行由后台线程定时刷新，
+报告的开销只与运行时间有关，与页面数量和工作进程数无关。
+"""
+
+import json
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+# 进度输出模式：auto在标准错误为终端时显示进度条，否则输出进度行
+PROGRESS_MODES = ("auto", "bar", "lines")
+# 默认刷新间隔（秒）
+BAR_INTERVAL = 0.2
+LINES_INTERVAL = 5.0
+# 页面计数写入共享计数器的最小间隔（秒）
+FLUSH_INTERVAL = 0.5
+
+# 共享计数器的下标：已写入的页数、进行中的项目已写入的页面字节数
+_PAGES = 0
+_INFLIGHT_BYTES = 1
+
+# 当前进程的页面计数器，由init_worker或ProgressReporter设置
+_counter = None
+
+
+class PageCounter:
+    """页面计数器，作为PackStats的on_page回调记录写入的页面
+
+    每页只在本地累加，距上次写入超过FLUSH_INTERVAL时才加锁写入共享计数器，
+    多个工作进程同时打包大量小页面时，加锁次数也只与运行时间成正比。
+    """
+
+    def __init__(self, shared, interval: float = FLUSH_INTERVAL):
+        """
+        Args:
+            shared: 所有进程共用的计数器，multiprocessing.Array("q", 2)
+            interval (float): 写入共享计数器的最小间隔（秒）
+        """
+        self._shared = shared
+        self._interval = interval
+        self._pages = 0
+        self._bytes = 0
+        # 当前项目已写入共享计数器的字节数，项目完成时扣除
+        self._item_bytes = 0
+        self._deadline = 0.0
+
+    def page(self, size: int) -> None:
+        """记录一页"""
+        self._pages += 1
+        self._bytes += size
+        now = time.monotonic()
+        if now >= self._deadline:
+            self._deadline = now + self._interval
+            self.flush()
+
+    def flush(self) -> None:
+        """将本地累计的页面写入共享计数器"""
+        with self._shared.get_lock():
+            self._shared[_PAGES] += self._pages
+            self._shared[_INFLIGHT_BYTES] += self._bytes
+        self._item_bytes += self._bytes
+        self._pages = 0
+        self._bytes = 0
+
+    def finish_item(self) -> None:
+        """项目完成：写入剩余的页数，并扣除该项目的页面字节数，由项目的输入大小代替"""
+        with self._shared.get_lock():
+            self._shared[_PAGES] += self._pages
+            self._shared[_INFLIGHT_BYTES] -= self._item_bytes
+        self._pages = 0
+        self._bytes = 0
+        self._item_bytes = 0
+
+
+def init_worker(shared) -> None:
+    """工作进程的初始化：创建写入共享计数器的页面计数器"""
+    global _counter
+    _counter = PageCounter(shared)
+
+
+def page_counter() -> Optional[PageCounter]:
+    """获取当前进程的页面计数器，未启用进度报告时为None"""
+    return _counter
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """将秒数格式化为[时:]分:秒，未知时为--:--"""
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def _display_width(text: str) -> int:
+    """文本在终端中的显示宽度，中文等全角字符占两列"""
+    import unicodedata
+
+    return sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text)
+
+
+class ProgressReporter:
+    """进度报告：汇总项目和页面进度，定时刷新终端进度条或输出进度行
+
+    页面进度来自当前进程和工作进程中的页面计数器（参见page_counter），
+    项目进度由调用方在每个项目完成时通过item_done报告。预计剩余时间按已处理的
+    输入字节数和平均吞吐量计算，输入总字节数在遍历项目时统计。
+
+    Example:
+        with ProgressReporter("auto") as reporter:
+            with ProcessPoolExecutor(**reporter.pool_options()) as executor:
+                for item in reporter.discover(iter_sized_work_items(root)):
+                    ...
+                    reporter.item_done(success)
+    """
+
+    def __init__(self, mode: str = "auto", stream=None, interval: Optional[float] = None):
+        """
+        Args:
+            mode (str): 输出模式，可选"auto"、"bar"（终端进度条）和"lines"（每行一个JSON对象）
+            stream (optional): 输出位置，默认为标准错误
+            interval (float, optional): 刷新间隔（秒），默认进度条为0.2秒，进度行为5秒
+        """
+        # 延迟导入，只在启用进度报告时才创建共享计数器和后台线程
+        import multiprocessing
+        import threading
+
+        global _counter
+
+        self.stream = stream or sys.stderr
+        if mode == "auto":
+            mode = "bar" if self.stream.isatty() else "lines"
+        if mode not in PROGRESS_MODES:
+            raise ValueError(f"不支持的进度输出模式: {mode}")
+        self.mode = mode
+        self.interval = interval or (BAR_INTERVAL if mode == "bar" else LINES_INTERVAL)
+
+        self.shared = multiprocessing.Array("q", 2)
+        self.items_total = 0
+        self.items_done = 0
+        self.items_failed = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        # 是否仍在遍历项目，此时总数和预计剩余时间都是下限
+        self.discovering = False
+        # 已发现但尚未完成的项目的输入字节数，按处理顺序排列
+        self._sizes = deque()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        # 进度条是否显示在当前行
+        self._shown = False
+        self._closed = threading.Event()
+
+        _counter = PageCounter(self.shared)
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def pool_options(self) -> dict:
+        """创建进程池时使用的参数，使工作进程中的页面计入进度"""
+        return {"initializer": init_worker, "initargs": (self.shared,)}
+
+    def add_item(self, size: int) -> None:
+        """登记一个待处理项目
+
+        Args:
+            size (int): 项目的输入字节数，未知时为0
+        """
+        with self._lock:
+            self.items_total += 1
+            self.bytes_total += size
+            self._sizes.append(size)
+
+    def discover(self, items: Iterable[tuple[str, int]]) -> Iterator[str]:
+        """在后台线程中遍历项目并登记输入字节数，同时按原顺序返回项目，处理无需等待遍历完成
+
+        Args:
+            items (Iterable[tuple[str, int]]): 待处理项目的路径和输入字节数，
+                例如discovery.iter_sized_work_items，字节数在遍历时一并统计，无需再次访问项目
+
+        Yields:
+            str: 待处理项目的路径，遍历时的异常在此重新抛出
+        """
+        import queue
+        import threading
+
+        found = queue.Queue()
+
+        def walk():
+            try:
+                for item, size in items:
+                    self.add_item(size)
+                    found.put((item, None))
+            except BaseException as e:
+                found.put((None, e))
+            finally:
+                self.discovering = False
+                found.put((None, None))
+
+        self.discovering = True
+        threading.Thread(target=walk, name="discovery", daemon=True).start()
+        while True:
+            item, error = found.get()
+            if error is not None:
+                raise error
+            if item is None:
+                return
+            yield item
+
+    def item_done(self, success: bool = True) -> None:
+        """报告一个项目已完成，项目按登记的顺序完成"""
+        with self._lock:
+            self.items_done += 1
+            if not success:
+                self.items_failed += 1
+            if self._sizes:
+                self.bytes_done += self._sizes.popleft()
+
+    def snapshot(self) -> dict:
+        """当前进度，可序列化为JSON"""
+        elapsed = time.monotonic() - self._start
+        with self.shared.get_lock():
+            pages = self.shared[_PAGES]
+            in_flight = self.shared[_INFLIGHT_BYTES]
+        with self._lock:
+            record = {
+                "elapsed": round(elapsed, 1),
+                "items_done": self.items_done,
+                "items_failed": self.items_failed,
+                "items_total": self.items_total,
+                "discovering": self.discovering,
+                "pages": pages,
+                "bytes_done": self.bytes_done + max(in_flight, 0),
+                "bytes_total": self.bytes_total,
+            }
+        if record["bytes_total"]:
+            # 进行中项目的页面字节数可能超过其输入大小（例如压缩的TAR）
+            record["bytes_done"] = min(record["bytes_done"], record["bytes_total"])
+
+        rate = record["bytes_done"] / elapsed if elapsed > 0 else 0.0
+        remaining = record["bytes_total"] - record["bytes_done"]
+        record["mb_per_s"] = round(rate / 1024 / 1024, 2)
+        record["pages_per_s"] = round(pages / elapsed, 1) if elapsed > 0 else 0.0
+        if record["bytes_total"] and record["bytes_done"] * 100 >= record["bytes_total"]:
+            # 处理至少1%的输入后才估算，避免启动阶段的估算剧烈波动
+            record["eta"] = round(remaining / rate, 1)
+        elif record["items_total"] and record["items_done"] == record["items_total"]:
+            record["eta"] = 0.0
+        else:
+            record["eta"] = None
+        return record
+
+    def format_bar(self, record: dict) -> str:
+        """生成终端进度条"""
+        import shutil
+
+        if record["bytes_total"]:
+            fraction = record["bytes_done"] / record["bytes_total"]
+        elif record["items_total"]:
+            fraction = record["items_done"] / record["items_total"]
+        else:
+            fraction = 0.0
+        # 仍在遍历项目时，总数和剩余时间都是下限
+        more = "+" if record["discovering"] else ""
+        info = (
+            f" {fraction:4.0%} {record['items_done']}/{record['items_total']}{more} 项目"
+            f" | {record['mb_per_s']:.1f} MB/s | {record['pages_per_s']:.0f} 页/s"
+            f" | 剩余 {format_duration(record['eta'])}{more}"
+        )
+        if record["items_failed"]:
+            info += f" | 失败 {record['items_failed']}"
+
+        columns = shutil.get_terminal_size((80, 24)).columns
+        width = columns - _display_width(info) - 3
+        if width < 10:
+            return info.strip()[: columns - 1]
+        filled = int(width * fraction)
+        return f"[{'#' * filled}{'-' * (width - filled)}]{info}"
+
+    def render(self, final: bool = False) -> None:
+        """输出一次进度"""
+        record = self.snapshot()
+        with self._output_lock:
+            if self.mode == "bar":
+                self.stream.write("\r" + self.format_bar(record) + "\x1b[K")
+                self._shown = True
+                if final:
+                    self.stream.write("\n")
+                    self._shown = False
+            else:
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.stream.flush()
+
+    @contextmanager
+    def suspend(self):
+        """暂时清除进度条，用于在进度条上方输出其他信息，进度条在下次刷新时重新显示"""
+        with self._output_lock:
+            if self._shown:
+                self.stream.write("\r\x1b[K")
+                self.stream.flush()
+                self._shown = False
+            try:
+                yield
+            finally:
+                sys.stdout.flush()
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.interval):
+            self.render()
+
+    def close(self) -> None:
+        """停止刷新并输出最终进度"""
+        global _counter
+
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+        self.render(final=True)
+        _counter = None
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 修改元数据
+只替换已有CBZ中的ComicInfo.xml，不重新打包图片。ComicInfo.xml是最后一个成员时
+原地覆盖它并重写中央目录，否则将其他成员的原始压缩数据复制到新文件，
+修改元数据的速度只受磁盘读写速度限制。
+"""
+
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from cbz_writer import seek_raw_member, unparse_comic_info, write_raw_member
+from metadata import ENUM_FIELDS, FIELD_NAMES, resolve_enum
+from worker_pool import WorkerPool
+
+# ComicInfo.xml在CBZ中的文件名
+COMIC_INFO_NAME = "ComicInfo.xml"
+
+# 新增元素插入到这些元素之前，使页面信息保持在末尾
+TRAILING_ELEMENTS = ("PageCount", "Pages")
+
+
+class RetagResult(NamedTuple):
+    """单个CBZ文件的元数据修改结果"""
+
+    path: str
+    # 修改方式: append（原地覆盖ComicInfo.xml）或rewrite（复制到新文件），失败时为None
+    mode: Optional[str]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def normalize_fields(fields: dict) -> dict[str, Optional[str]]:
+    """将参数转换为ComicInfo.xml元素名和取值
+
+    参数名可以是FIELD_NAMES中的参数名或ComicInfo.xml元素名（例如Writer），
+    取值可以是字符串、整数或cbz库枚举，为None或空字符串时删除该元素。
+
+    Args:
+        fields (dict): 要修改的元数据
+
+    Returns:
+        dict[str, Optional[str]]: 元素名 -> 取值，None表示删除
+    """
+    elements = {}
+    for key, value in fields.items():
+        name = FIELD_NAMES.get(key, key)
+        if value is None or value == "":
+            elements[name] = None
+        elif key in ENUM_FIELDS:
+            elements[name] = resolve_enum(key, value)
+        elif hasattr(value, "value"):
+            elements[name] = str(value.value)
+        else:
+            elements[name] = str(value)
+    return elements
+
+
+def update_comic_info(data: bytes, elements: dict[str, Optional[str]]) -> bytes:
+    """修改ComicInfo.xml中的元素，其他元素和页面信息保持不变
+
+    Args:
+        data (bytes): 原ComicInfo.xml内容
+        elements (dict[str, Optional[str]]): 元素名 -> 取值，None表示删除
+
+    Returns:
+        bytes: 新的ComicInfo.xml内容
+    """
+    import xmltodict
+
+    document = xmltodict.parse(data)
+    info = document.get("ComicInfo") or {}
+
+    added = {k: v for k, v in elements.items() if k not in info and v is not None}
+    updated = {}
+    for name, value in info.items():
+        if added and name in TRAILING_ELEMENTS:
+            updated.update(added)
+            added = {}
+        if name not in elements:
+            updated[name] = value
+        elif elements[name] is not None:
+            updated[name] = elements[name]
+    updated.update(added)
+
+    document["ComicInfo"] = updated
+    return unparse_comic_info(document)
+
+
+def _comic_info_is_last(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bool:
+    """判断ComicInfo.xml之后是否只有中央目录，可以安全地原地覆盖"""
+    if info.flag_bits & 0x1:
+        return False
+    for other in archive.infolist():
+        if other is not info and other.header_offset >= info.header_offset:
+            return False
+    # 成员数据到中央目录之间不能有其他内容（数据描述符除外）
+    data_end = seek_raw_member(archive, info).tell() + info.compress_size
+    return 0 <= archive.start_dir - data_end <= 24
+
+
+def _new_comic_info_entry(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """创建新ComicInfo.xml的成员信息，压缩方式与原成员一致"""
+    zinfo = zipfile.ZipInfo(COMIC_INFO_NAME, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr or 0o600 << 16
+    return zinfo
+
+
+def _append(path, info: zipfile.ZipInfo, content: bytes) -> None:
+    """原地覆盖位于末尾的ComicInfo.xml并重写中央目录"""
+    with zipfile.ZipFile(path, "a") as archive:
+        old = archive.NameToInfo.pop(info.filename)
+        archive.filelist.remove(old)
+        # 从原ComicInfo.xml的位置开始写入，关闭时截断多余的旧数据
+        archive.start_dir = old.header_offset
+        archive.writestr(_new_comic_info_entry(old), content)
+
+
+def _rewrite(path, archive: zipfile.ZipFile, info: zipfile.ZipInfo, content: bytes) -> None:
+    """将其他成员的原始压缩数据复制到临时文件，追加新的ComicInfo.xml后替换原文件"""
+    temp_path = f"{path}.part"
+    try:
+        with zipfile.ZipFile(temp_path, "w") as dest:
+            for source in archive.infolist():
+                if source is info:
+                    continue
+                zinfo = zipfile.ZipInfo(source.filename, date_time=source.date_time)
+                zinfo.compress_type = source.compress_type
+                zinfo.external_attr = source.external_attr
+                zinfo.create_system = source.create_system
+                # 保留加密标志，加密头位于原始压缩数据中。使用数据描述符的加密成员的校验字节
+                # 取自修改时间而不是CRC，因此同时保留数据描述符标志，并照样写入数据描述符
+                zinfo.flag_bits = source.flag_bits & (0x1 | 0x8) if source.flag_bits & 0x1 else 0
+                zinfo.CRC = source.CRC
+                zinfo.compress_size = source.compress_size
+                zinfo.file_size = source.file_size
+                write_raw_member(dest, zinfo, seek_raw_member(archive, source))
+            dest.writestr(_new_comic_info_entry(info), content)
+            dest.comment = archive.comment
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def retag_cbz(path, fields: dict, in_place: bool = True) -> str:
+    """只替换CBZ中的ComicInfo.xml，不重新打包图片
+
+    ComicInfo.xml是最后一个成员时（ComicPacker生成的CBZ都是如此）原地覆盖它并重写中央目录，
+    只写入几KB数据；否则将其他成员的原始压缩数据复制到同目录下的临时文件，完成后替换原文件。
+    原地覆盖期间中断（例如断电）可能损坏文件，需要完全避免时将in_place设为False。
+
+    Args:
+        path: CBZ文件路径
+        fields (dict): 要修改的元数据，参见normalize_fields，例如{"series": "海贼王", "age_rating": "Teen"}
+        in_place (bool): 是否允许原地覆盖。默认为True
+
+    Returns:
+        str: 修改方式，append表示原地覆盖，rewrite表示复制到新文件
+
+    Raises:
+        ValueError: 元数据取值无效或CBZ中没有ComicInfo.xml
+    """
+    path = os.fspath(path)
+    elements = normalize_fields(fields)
+    with zipfile.ZipFile(path) as archive:
+        try:
+            info = archive.getinfo(COMIC_INFO_NAME)
+        except KeyError:
+            raise ValueError(f"缺少{COMIC_INFO_NAME}") from None
+        content = update_comic_info(archive.read(info), elements)
+
+        append = in_place and _comic_info_is_last(archive, info)
+        if not append:
+            _rewrite(path, archive, info, content)
+            return "rewrite"
+    _append(path, info, content)
+    return "append"
+
+
+def _retag_one(path, fields: dict, in_place: bool) -> RetagResult:
+    try:
+        return RetagResult(os.fspath(path), retag_cbz(path, fields, in_place))
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        return RetagResult(os.fspath(path), None, str(e))
+
+
+def retag_cbzs(
+    paths: Iterable, fields: dict, workers: int = 1, in_place: bool = True
+) -> Iterator[RetagResult]:
+    """修改多个CBZ文件的元数据，结果按完成顺序返回
+
+    Args:
+        paths (Iterable): CBZ文件路径
+        fields (dict): 要修改的元数据，参见normalize_fields
+        workers (int): 工作进程数，为1时在当前进程中处理
+        in_place (bool): 是否允许原地覆盖。默认为True
+
+    Yields:
+        RetagResult: 每个文件的修改结果
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    # 提前检查取值，避免每个文件都报告同样的错误
+    normalize_fields(fields)
+
+    def on_error(job, error):
+        path = os.fspath(job[0])
+        if isinstance(error, BrokenProcessPool):
+            # 崩溃时所有未完成的文件都会报告BrokenProcessPool，单独重试以确认是否由该文件导致
+            try:
+                return pool.run_isolated(_retag_one, *job)
+            except BrokenProcessPool:
+                return RetagResult(path, None, "工作进程异常退出")
+        return RetagResult(path, None, f"{type(error).__name__}: {error}")
+
+    # 为1时在当前进程中处理
+    with WorkerPool(workers if workers > 1 else 0) as pool:
+        yield from pool.imap(
+            _retag_one,
+            ((path, fields, in_place) for path in paths),
+            on_error,
+            ordered=False,
+        )
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 增量处理状态存储
+记录每个输入项目的指纹和打包参数，用于跳过未变化的项目
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from discovery import walk
+
+# 状态数据库文件名，保存在输出目录中
+STATE_FILE_NAME = ".comicpacker_state.sqlite"
+
+# 当前进程中已打开的状态存储：输出目录 -> StateStore，参见get_state_store
+_stores = {}
+# 打开_stores中连接的进程，fork出的工作进程不能使用父进程的连接
+_stores_pid = None
+
+
+class Fingerprint(NamedTuple):
+    """输入项目的指纹"""
+
+    size: int
+    mtime_ns: int
+    content_hash: Optional[str] = None
+
+
+def _hash_file(path, digest):
+    """将文件内容更新到哈希对象中"""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+def compute_fingerprint(item_path, with_hash=False):
+    """计算输入项目的指纹
+
+    文件使用其大小和修改时间；文件夹使用其中（包括子文件夹中）所有文件的总大小和最新修改时间
+    （包括各级文件夹本身，增删文件会改变所在文件夹的修改时间）。
+
+    Args:
+        item_path: 文件或文件夹路径
+        with_hash (bool): 是否计算内容哈希。默认为False
+
+    Returns:
+        Fingerprint: 项目指纹
+    """
+    stat = os.stat(item_path)
+    if not os.path.isdir(item_path):
+        content_hash = None
+        if with_hash:
+            digest = hashlib.sha256()
+            _hash_file(item_path, digest)
+            content_hash = digest.hexdigest()
+        return Fingerprint(stat.st_size, stat.st_mtime_ns, content_hash)
+
+    size = 0
+    mtime_ns = stat.st_mtime_ns
+    digest = hashlib.sha256() if with_hash else None
+    for entry in walk(item_path):
+        entry_stat = entry.stat()
+        mtime_ns = max(mtime_ns, entry_stat.st_mtime_ns)
+        if not entry.is_file():
+            continue
+        size += entry_stat.st_size
+        if digest is not None:
+            relative = os.path.relpath(entry.path, item_path)
+            digest.update(relative.encode("utf-8", "surrogateescape"))
+            _hash_file(entry.path, digest)
+
+    return Fingerprint(size, mtime_ns, digest.hexdigest() if digest else None)
+
+
+class StateStore:
+    """基于SQLite的增量处理状态存储
+
+    每个输入项目记录一行：输入指纹、打包参数以及输出文件的大小和修改时间。
+    只有这些信息全部一致且输出文件仍然存在时，项目才被视为无需重新打包。
+    """
+
+    def __init__(self, output_dir):
+        """
+        Args:
+            output_dir: 输出目录，状态数据库保存在该目录中
+        """
+        self.path = Path(output_dir) / STATE_FILE_NAME
+        # 延迟导入，避免拖慢命令行启动
+        import sqlite3
+
+        # 并行处理时多个进程会同时写入，等待锁而不是立即失败
+        self._conn = sqlite3.connect(str(self.path), timeout=60)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    input_path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT,
+                    params TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    output_size INTEGER NOT NULL,
+                    output_mtime_ns INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    @staticmethod
+    def _serialize_params(params):
+        """将打包参数序列化为稳定的字符串"""
+        return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def is_up_to_date(self, item_path, output_path, fingerprint, params):
+        """判断项目的输出是否已是最新
+
+        Args:
+            item_path: 输入项目路径
+            output_path: 输出CBZ文件路径
+            fingerprint (Fingerprint): 输入项目的当前指纹
+            params (dict): 当前的打包参数
+
+        Returns:
+            bool: 输出已是最新时返回True
+        """
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, params, output_path, "
+            "output_size, output_mtime_ns FROM items WHERE input_path = ?",
+            (os.path.abspath(item_path),),
+        ).fetchone()
+        if row is None:
+            return False
+
+        size, mtime_ns, content_hash, params_text, output, output_size, output_mtime_ns = row
+        if (size, mtime_ns) != (fingerprint.size, fingerprint.mtime_ns):
+            return False
+        # 只有两次都计算了内容哈希时才比较
+        if fingerprint.content_hash and content_hash != fingerprint.content_hash:
+            return False
+        if params_text != self._serialize_params(params):
+            return False
+        if output != os.path.abspath(output_path):
+            return False
+
+        try:
+            output_stat = os.stat(output_path)
+        except OSError:
+            return False
+        return (output_stat.st_size, output_stat.st_mtime_ns) == (
+            output_size,
+            output_mtime_ns,
+        )
+
+    def record(self, item_path, output_path, fingerprint, params):
+        """记录项目的处理结果
+
+        Args:
+            item_path: 输入项目路径
+            output_path: 输出CBZ文件路径
+            fingerprint (Fingerprint): 处理前计算的输入项目指纹
+            params (dict): 使用的打包参数
+        """
+        output_stat = os.stat(output_path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(item_path),
+                    fingerprint.size,
+                    fingerprint.mtime_ns,
+                    fingerprint.content_hash,
+                    self._serialize_params(params),
+                    os.path.abspath(output_path),
+                    output_stat.st_size,
+                    output_stat.st_mtime_ns,
+                    time.time(),
+                ),
+            )
+
+
+def get_state_store(output_dir):
+    """获取当前进程中输出目录的状态存储
+
+    首次使用时打开数据库，之后同一批次的项目共用这个连接，不再为每个项目重新连接和建表。
+    进程池的每个工作进程各自打开自己的连接。
+
+    Args:
+        output_dir: 输出目录
+
+    Returns:
+        StateStore: 输出目录的状态存储，由close_state_stores统一关闭
+    """
+    global _stores_pid
+    if _stores_pid != os.getpid():
+        # fork继承的连接属于父进程，丢弃后重新打开
+        _stores.clear()
+        _stores_pid = os.getpid()
+    key = os.path.abspath(output_dir)
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = StateStore(output_dir)
+    return store
+
+
+def close_state_stores():
+    """关闭当前进程中get_state_store打开的所有状态存储"""
+    if _stores_pid == os.getpid():
+        for store in _stores.values():
+            store.close()
+    _stores.clear()
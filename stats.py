@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 处理统计
+记录每个项目各阶段的耗时、输入输出字节数和内存峰值
+"""
+
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# 处理阶段，按执行顺序排列
+#   discover:  列出图片文件或压缩包成员
+#   extract:   从源压缩包读取成员数据
+#   load:      读取页面文件并解析图片头
+#   transcode: 等待页面转码或缩放完成
+#   comicinfo: 生成ComicInfo.xml
+#   pack:      将页面写入CBZ（包括压缩）
+#   write:     写入ComicInfo.xml和中央目录并完成输出文件
+STAGES = ("discover", "extract", "load", "transcode", "comicinfo", "pack", "write")
+
+
+def reset_peak_memory():
+    """重置当前进程的内存峰值记录（仅Linux支持），使峰值只反映单个项目"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_memory_mb():
+    """获取当前进程的内存峰值，单位MB，无法获取时返回None"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux上ru_maxrss单位为KB，macOS上为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024 / 1024
+
+
+class PackStats:
+    """单个项目的处理统计
+
+    传给打包函数的stats参数即可收集各阶段耗时，也可以作为编程接口使用。
+
+    Example:
+        stats = PackStats("漫画文件夹")
+        pack_comic_to_cbz(comic_path, output_path, stats=stats)
+        print(stats.to_dict())
+    """
+
+    def __init__(self, item=None, on_page=None):
+        """
+        Args:
+            item (str, optional): 项目名称或路径
+            on_page (callable, optional): 每写入一页后以页面字节数为参数调用，用于报告进度，
+                应尽量轻量
+        """
+        self.item = item
+        self.on_page = on_page
+        self.stages = defaultdict(float)
+        self.pages = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.success = None
+        self.total = None
+        self.peak_memory_mb = None
+        # 是否因超出内存预算而使用了有界缓冲路径
+        self.bounded = False
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段的耗时，同一阶段多次执行时累加"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def page_written(self, size):
+        """由CBZ写入器在每页写入后调用"""
+        if self.on_page is not None:
+            self.on_page(size)
+
+    def finish(self, success=True):
+        """记录项目的处理结果、总耗时和内存峰值"""
+        self.success = success
+        self.total = time.perf_counter() - self._start
+        self.peak_memory_mb = peak_memory_mb()
+
+    def to_dict(self):
+        """转换为可序列化为JSON的字典"""
+        return {
+            "item": self.item,
+            "success": self.success,
+            "total": self.total,
+            "stages": {name: self.stages.get(name, 0.0) for name in STAGES},
+            "pages": self.pages,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "peak_memory_mb": self.peak_memory_mb,
+            "bounded": self.bounded,
+        }
+
+
+def stage(stats, name):
+    """stats为None时不做任何记录的阶段计时"""
+    if stats is None:
+        return _NULL_STAGE
+    return stats.stage(name)
+
+
+class _NullStage:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def percentile(values, p):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class StatsReport:
+    """收集所有项目的统计，写入JSON Lines报告并生成汇总表"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): JSON Lines报告文件路径，为None时只生成汇总表
+        """
+        self.path = path
+        self.records = []
+        self._file = open(path, "w", encoding="utf-8") if path else None
+
+    def add(self, record):
+        """添加一个项目的统计记录"""
+        self.records.append(record)
+        if self._file:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def summary(self):
+        """生成包含总计、p50和p95的汇总表"""
+        records = self.records
+        rows = [("total", [r["total"] or 0.0 for r in records])]
+        rows += [(name, [r["stages"][name] for r in records]) for name in STAGES]
+
+        lines = [f"{'阶段':<12}{'总计(s)':>12}{'p50(s)':>12}{'p95(s)':>12}"]
+        for name, values in rows:
+            lines.append(
+                f"{name:<12}{sum(values):>12.3f}"
+                f"{percentile(values, 50):>12.4f}{percentile(values, 95):>12.4f}"
+            )
+
+        pages = sum(r["pages"] for r in records)
+        bytes_in = sum(r["bytes_in"] for r in records)
+        bytes_out = sum(r["bytes_out"] for r in records)
+        peaks = [r["peak_memory_mb"] for r in records if r["peak_memory_mb"] is not None]
+        lines.append("")
+        lines.append(f"项目数: {len(records)}  页数: {pages}")
+        lines.append(
+            f"输入: {bytes_in / 1024 / 1024:.1f} MB  输出: {bytes_out / 1024 / 1024:.1f} MB"
+        )
+        if peaks:
+            lines.append(
+                f"内存峰值: p50 {percentile(peaks, 50):.1f} MB  "
+                f"p95 {percentile(peaks, 95):.1f} MB  最大 {max(peaks):.1f} MB"
+            )
+        bounded = sum(1 for r in records if r.get("bounded"))
+        if bounded:
+            lines.append(f"超出内存预算改用有界缓冲路径的项目: {bounded}")
+        return "\n".join(lines)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""测试共用的夹具：用Pillow生成页面图片，并打包为各种格式的压缩包"""
+
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# 页面文件名按名称排序为: 1.jpg, 10.jpg, 2.png, b.jpeg
+PAGE_NAMES = ["2.png", "10.jpg", "1.jpg", "b.jpeg"]
+# cbz库要求的系列和卷号，打包函数没有默认值
+COMIC_FIELDS = {"series": "漫画", "number": 1}
+
+
+def make_image(name: str, width: int, height: int, seed: int = 0) -> bytes:
+    """生成一张指定尺寸的图片，格式由扩展名决定，不同seed生成不同的内容"""
+    image = Image.new("RGB", (width, height))
+    # 加入图案，使JPEG页面有一定大小，且每页内容不同
+    image.putdata(
+        [((x * seed + y) % 256, (y * 7 + seed) % 256, (x ^ y) % 256)
+         for y in range(height) for x in range(width)]
+    )
+    output = io.BytesIO()
+    image.save(output, format="PNG" if name.lower().endswith(".png") else "JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def pages() -> dict[str, bytes]:
+    """页面文件名 -> 图片内容，每页尺寸不同"""
+    return {
+        name: make_image(name, 60 + index * 10, 80, seed=index + 1)
+        for index, name in enumerate(PAGE_NAMES)
+    }
+
+
+@pytest.fixture
+def comic_folder(tmp_path, pages) -> Path:
+    """包含所有页面的漫画文件夹"""
+    folder = tmp_path / "漫画"
+    folder.mkdir()
+    for name, data in pages.items():
+        (folder / name).write_bytes(data)
+    return folder
+
+
+def write_zip(path: Path, members: dict[str, bytes], deflated: tuple = ()) -> Path:
+    """按给定顺序写入ZIP，deflated中的成员使用Deflate压缩，其余直接存储"""
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members.items():
+            compress_type = zipfile.ZIP_DEFLATED if name in deflated else zipfile.ZIP_STORED
+            archive.writestr(name, data, compress_type=compress_type)
+    return path
+
+
+def write_tar(path: Path, members: dict[str, bytes], mode: str = "w") -> Path:
+    """按给定顺序写入TAR，mode为"w:gz"等时写入压缩的TAR"""
+    with tarfile.open(path, mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def write_7z(path: Path, members: dict[str, bytes]) -> Path:
+    """按给定顺序写入7z压缩包，需要py7zr"""
+    py7zr = pytest.importorskip("py7zr")
+    with py7zr.SevenZipFile(path, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(data, name)
+    return path
+
+
+def read_cbz(path) -> tuple[list[bytes], bytes]:
+    """读取CBZ，返回按成员顺序排列的页面内容和ComicInfo.xml"""
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        names = [name for name in archive.namelist() if name != "ComicInfo.xml"]
+        return [archive.read(name) for name in names], archive.read("ComicInfo.xml")
+
+
+def sorted_pages(pages: dict[str, bytes]) -> list[bytes]:
+    """按文件名排序的页面内容，即CBZ中应有的页面顺序"""
+    return [pages[name] for name in sorted(pages)]
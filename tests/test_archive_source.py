@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""TAR和7z压缩包：存储顺序与路径顺序不同时，页面经重排缓冲按路径顺序写入CBZ"""
+
+import io
+
+import pytest
+from cbz.comic import ComicInfo
+from cbz.constants import PageType
+from conftest import COMIC_FIELDS, read_cbz, sorted_pages, write_7z, write_tar
+
+import archive_source
+from archive_source import _PageReorderBuffer, open_archive
+from cbz_writer import CBZWriter
+from pack_comic import pack_compressed_comic_to_cbz
+
+# 小于任何一页的内存预算，使提前到达的页面都暂存到临时文件
+TINY_BUDGET = 1024
+
+
+def reversed_members(pages: dict[str, bytes]) -> dict[str, bytes]:
+    """按路径的逆序存储页面，除最后一页外的所有页面都需要暂存，另加一个非图片成员"""
+    members = {f"卷/{name}": pages[name] for name in sorted(pages, reverse=True)}
+    members["卷/说明.txt"] = b"not a page"
+    return members
+
+
+@pytest.mark.parametrize("suffix, mode", [(".tar", "w"), (".tar.gz", "w:gz")])
+@pytest.mark.parametrize("max_memory", [None, TINY_BUDGET])
+def test_tar_reorder(tmp_path, pages, suffix, mode, max_memory):
+    source = write_tar(tmp_path / f"漫画{suffix}", reversed_members(pages), mode)
+    output = tmp_path / "out.cbz"
+    pack_compressed_comic_to_cbz(source, output, max_memory=max_memory, **COMIC_FIELDS)
+
+    assert read_cbz(output)[0] == sorted_pages(pages)
+
+
+@pytest.mark.parametrize("max_memory", [None, TINY_BUDGET])
+def test_7z_reorder(tmp_path, pages, max_memory):
+    source = write_7z(tmp_path / "漫画.7z", reversed_members(pages))
+    output = tmp_path / "out.cbz"
+    pack_compressed_comic_to_cbz(source, output, max_memory=max_memory, **COMIC_FIELDS)
+
+    assert read_cbz(output)[0] == sorted_pages(pages)
+
+
+def test_compressed_tar_reads_once(tmp_path, pages, monkeypatch):
+    source = write_tar(tmp_path / "漫画.tar.gz", reversed_members(pages), "w:gz")
+    with open_archive(source) as archive:
+        assert archive.single_pass
+        # 单次读取的来源不应事先列出成员
+        monkeypatch.setattr(
+            archive, "list_members", lambda: pytest.fail("list_members被调用")
+        )
+        with CBZWriter(tmp_path / "out.cbz", ComicInfo.from_pages(pages=[], **COMIC_FIELDS)) as writer:
+            archive.copy_pages(writer, memory_limit=TINY_BUDGET)
+
+    assert read_cbz(tmp_path / "out.cbz")[0] == sorted_pages(pages)
+
+
+@pytest.mark.parametrize("max_memory", [None, TINY_BUDGET * 4])
+def test_compressed_tar_bounded_buffer(tmp_path, pages, monkeypatch, max_memory):
+    # 按路径顺序存储的大量页面：暂存在内存中的页面不超过预算，未设置预算时不超过SINGLE_PASS_MEMORY
+    members = {f"{index:03d}.jpg": pages["1.jpg"] for index in range(50)}
+    source = write_tar(tmp_path / "漫画.tar.gz", members, "w:gz")
+    monkeypatch.setattr(archive_source, "SINGLE_PASS_MEMORY", TINY_BUDGET * 2)
+    buffers = []
+
+    class RecordingBuffer(_PageReorderBuffer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            buffers.append(self)
+
+    monkeypatch.setattr(archive_source, "_PageReorderBuffer", RecordingBuffer)
+    output = tmp_path / "out.cbz"
+    pack_compressed_comic_to_cbz(source, output, max_memory=max_memory, **COMIC_FIELDS)
+
+    assert read_cbz(output)[0] == list(members.values())
+    assert buffers[0].peak_memory <= (max_memory or TINY_BUDGET * 2)
+    assert sum(len(data) for data in members.values()) > TINY_BUDGET * 4
+
+
+@pytest.mark.parametrize("names", [None, ["a.jpg", "b.jpg"]])
+def test_reorder_buffer_releases_memory(tmp_path, pages, names):
+    data = pages["1.jpg"]
+    with CBZWriter(tmp_path / "out.cbz", ComicInfo.from_pages(pages=[], **COMIC_FIELDS)) as writer:
+        buffer = _PageReorderBuffer(writer, names, PageType.STORY, memory_limit=len(data) * 3)
+        # 重复的成员只使用第一次出现的内容，其暂存文件也要归还预算
+        for name in ("b.jpg", "b.jpg", "a.jpg"):
+            spool = buffer.open_spool(len(data))
+            spool.write(data)
+            buffer.push(name, spool)
+        buffer.finish()
+        assert buffer._memory == 0
+        assert buffer._in_memory == {}
+
+    assert read_cbz(tmp_path / "out.cbz")[0] == [data, data]
+
+
+def test_reorder_buffer_missing_page(tmp_path):
+    with CBZWriter(io.BytesIO(), ComicInfo.from_pages(pages=[], **COMIC_FIELDS)) as writer:
+        buffer = _PageReorderBuffer(writer, ["a.jpg", "b.jpg"], PageType.STORY)
+        buffer.push("b.jpg", b"data")
+        with pytest.raises(ValueError):
+            buffer.finish()
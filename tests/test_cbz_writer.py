@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""CBZ写入器：按页数或大小拆分分卷，以及输出到BytesIO和不能seek的管道"""
+
+import io
+import zipfile
+
+import pytest
+import xmltodict
+from cbz.comic import ComicInfo
+from conftest import COMIC_FIELDS, read_cbz, sorted_pages, write_zip
+
+from cbz_writer import VolumeWriter
+from stats import PackStats
+from pack_comic import pack_comic_to_cbz, pack_compressed_comic_to_cbz
+
+
+def volume_info(path) -> dict:
+    return xmltodict.parse(read_cbz(path)[1])["ComicInfo"]
+
+
+def test_split_pages(tmp_path, comic_folder, pages):
+    volumes = pack_comic_to_cbz(
+        comic_folder, tmp_path / "漫画.cbz", split_pages=3, series="漫画", number=5
+    )
+
+    assert [volume.name for volume in volumes] == ["漫画 v01.cbz", "漫画 v02.cbz"]
+    assert [page for volume in volumes for page in read_cbz(volume)[0]] == sorted_pages(pages)
+    infos = [volume_info(volume) for volume in volumes]
+    # 卷号从number开始递增，每卷有自己的页数
+    assert [info["Number"] for info in infos] == ["5", "6"]
+    assert [info["PageCount"] for info in infos] == ["3", "1"]
+
+
+def test_split_size(tmp_path, pages):
+    source = write_zip(tmp_path / "漫画.zip", pages)
+    split_size = max(len(data) for data in pages.values())
+    volumes = pack_compressed_comic_to_cbz(
+        source, tmp_path / "漫画.cbz", split_size=split_size, **COMIC_FIELDS
+    )
+
+    volume_pages = [read_cbz(volume)[0] for volume in volumes]
+    assert [page for chunk in volume_pages for page in chunk] == sorted_pages(pages)
+    for chunk in volume_pages:
+        assert chunk
+        assert sum(len(page) for page in chunk) <= split_size
+
+
+def test_oversized_page_gets_own_volume(tmp_path, pages):
+    comic = ComicInfo.from_pages(pages=[], **COMIC_FIELDS)
+    with VolumeWriter(tmp_path / "漫画.cbz", comic, split_size=1) as writer:
+        for data in sorted_pages(pages):
+            writer.add_page(data)
+
+    assert len(writer.volumes) == len(pages)
+    assert [read_cbz(volume)[0] for volume in writer.volumes] == [[data] for data in sorted_pages(pages)]
+
+
+def test_abort_removes_volumes(tmp_path, pages):
+    comic = ComicInfo.from_pages(pages=[], **COMIC_FIELDS)
+    with pytest.raises(RuntimeError):
+        with VolumeWriter(tmp_path / "漫画.cbz", comic, split_pages=1) as writer:
+            for data in sorted_pages(pages):
+                writer.add_page(data)
+            raise RuntimeError("中断")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "output, options",
+    [
+        (io.BytesIO(), {"split_pages": 1}),
+        ("漫画.cbz", {}),
+        ("漫画.cbz", {"split_pages": 0}),
+        ("漫画.cbz", {"split_size": -1}),
+        ("漫画.cbz", {"split_pages": 1, "compression": "不存在"}),
+    ],
+)
+def test_invalid_options(tmp_path, output, options):
+    if isinstance(output, str):
+        output = tmp_path / output
+    with pytest.raises(ValueError):
+        VolumeWriter(output, ComicInfo.from_pages(pages=[], **COMIC_FIELDS), **options)
+
+
+class PipeWriter(io.RawIOBase):
+    """模拟管道：只能顺序写入，不支持seek和tell"""
+
+    def __init__(self):
+        self.data = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.data.write(data)
+
+
+@pytest.mark.parametrize("sink", [io.BytesIO, PipeWriter])
+def test_stream_output(tmp_path, comic_folder, pages, sink):
+    output = sink()
+    stats = PackStats()
+    assert pack_comic_to_cbz(comic_folder, output, stats=stats, **COMIC_FIELDS) == []
+
+    data = output.getvalue() if isinstance(output, io.BytesIO) else output.data.getvalue()
+    assert stats.bytes_out == len(data)
+    path = tmp_path / "stream.cbz"
+    path.write_bytes(data)
+    actual, info = read_cbz(path)
+    assert actual == sorted_pages(pages)
+    assert xmltodict.parse(info)["ComicInfo"]["PageCount"] == str(len(pages))
+
+
+@pytest.mark.parametrize("max_memory", [None, 1])
+def test_zip_to_pipe(tmp_path, pages, max_memory):
+    # 不能回写本地文件头，压缩后大小未知的成员在数据之后写入数据描述符；max_memory为1时分块流式写入
+    source = write_zip(tmp_path / "漫画.zip", pages, deflated=("2.png",))
+    output = PipeWriter()
+    pack_compressed_comic_to_cbz(source, output, max_memory=max_memory, **COMIC_FIELDS)
+
+    path = tmp_path / "stream.cbz"
+    path.write_bytes(output.data.getvalue())
+    assert read_cbz(path)[0] == sorted_pages(pages)
+    with zipfile.ZipFile(path) as archive:
+        assert archive.getinfo("ComicInfo.xml").flag_bits & 0x08
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""ComicPacker引擎：结构化结果，以及工作进程崩溃时只报告真正导致崩溃的项目"""
+
+import os
+import time
+
+import pytest
+from conftest import COMIC_FIELDS, read_cbz, sorted_pages, write_zip
+
+import engine
+from engine import ComicPacker
+
+_pack_item = engine.pack_item
+
+
+def crashing_pack_item(item_path, output_path=None, options=None):
+    """名称含crash的项目使工作进程异常退出，名称含slow的项目先等待一段时间"""
+    name = os.path.basename(item_path)
+    if "crash" in name:
+        os._exit(1)
+    if "slow" in name:
+        time.sleep(1)
+    return _pack_item(item_path, output_path, options)
+
+
+@pytest.fixture
+def folders(tmp_path, comic_folder):
+    """按名称区分行为的漫画文件夹，内容与comic_folder相同"""
+    paths = []
+    for name in ("slow", "crash", "ok"):
+        path = tmp_path / name
+        path.mkdir()
+        for page in comic_folder.iterdir():
+            (path / page.name).write_bytes(page.read_bytes())
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_map_results(tmp_path, comic_folder, pages, workers):
+    archive = write_zip(tmp_path / "压缩包.zip", pages)
+    with ComicPacker(tmp_path / "输出", workers=workers, **COMIC_FIELDS) as packer:
+        results = list(packer.map([comic_folder, (archive, {"title": "另一本"})], ordered=True))
+
+    assert [result.success for result in results] == [True, True]
+    assert [result.pages for result in results] == [len(pages), len(pages)]
+    assert results[0].bytes_in == sum(len(data) for data in pages.values())
+    for result in results:
+        assert read_cbz(result.outputs[0])[0] == sorted_pages(pages)
+
+
+def test_map_reports_missing_item(tmp_path):
+    with ComicPacker(tmp_path, workers=0) as packer:
+        (result,) = packer.map([tmp_path / "不存在"])
+    assert not result.success
+    assert result.error
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_map_blames_crashing_item(tmp_path, folders, monkeypatch, ordered):
+    # 进程池在子进程中调用engine.pack_item，替换后由fork的工作进程继承
+    monkeypatch.setattr(engine, "pack_item", crashing_pack_item)
+    with ComicPacker(tmp_path / "输出", workers=2, **COMIC_FIELDS) as packer:
+        results = {
+            os.path.basename(result.item): result
+            for result in packer.map(folders, ordered=ordered)
+        }
+
+    # 崩溃时仍在处理的slow项目不受牵连
+    assert results["slow"].success
+    assert results["ok"].success
+    assert not results["crash"].success
+    assert "BrokenProcessPool" in results["crash"].error
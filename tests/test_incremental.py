@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""增量处理：输入、打包参数和输出都未变化时跳过项目，任何一项变化时重新打包"""
+
+import os
+
+import pytest
+from conftest import make_image, read_cbz, write_zip
+
+import state_store
+from main import process_single_item
+from state_store import close_state_stores
+
+SKIPPED = "跳过未变化的项目"
+
+
+@pytest.fixture
+def pack(tmp_path, capsys):
+    """以增量模式处理项目，返回项目是否被跳过"""
+    output_dir = tmp_path / "输出"
+
+    def pack(item_path, **options):
+        assert process_single_item(
+            str(item_path), str(output_dir), "zh-CN", False, True, {}, incremental=True, **options
+        )
+        return SKIPPED in capsys.readouterr().out
+
+    pack.output_dir = output_dir
+    yield pack
+    close_state_stores()
+
+
+def flip_byte(path):
+    """修改图片数据中间的一个字节，文件大小和图片头不变"""
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def bump_mtime(path):
+    """将修改时间推后，避免文件系统的时间精度使修改不可见"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+def test_folder_skip_and_invalidate(pack, comic_folder, pages):
+    output = pack.output_dir / f"{comic_folder.name}.cbz"
+    assert not pack(comic_folder)
+    assert pack(comic_folder)
+
+    # 新增页面
+    (comic_folder / "c.jpg").write_bytes(make_image("c.jpg", 40, 40, seed=9))
+    bump_mtime(comic_folder)
+    assert not pack(comic_folder)
+    assert len(read_cbz(output)[0]) == len(pages) + 1
+    assert pack(comic_folder)
+
+    # 修改已有页面，大小不变
+    page = comic_folder / "1.jpg"
+    flip_byte(page)
+    bump_mtime(page)
+    assert not pack(comic_folder)
+    assert pack(comic_folder)
+
+
+def test_params_invalidate(pack, comic_folder):
+    assert not pack(comic_folder)
+    assert not pack(comic_folder, compression="deflate")
+    assert pack(comic_folder, compression="deflate")
+    assert not pack(comic_folder, compression="deflate", max_height=40)
+    assert pack(comic_folder, compression="deflate", max_height=40)
+
+
+def test_output_changes_invalidate(pack, comic_folder):
+    output = pack.output_dir / f"{comic_folder.name}.cbz"
+    assert not pack(comic_folder)
+
+    output.unlink()
+    assert not pack(comic_folder)
+    assert output.exists()
+
+    bump_mtime(output)
+    assert not pack(comic_folder)
+    assert pack(comic_folder)
+
+
+def test_archive_skip_and_invalidate(pack, tmp_path, pages):
+    source = write_zip(tmp_path / "漫画.zip", pages)
+    assert not pack(source)
+    assert pack(source)
+
+    write_zip(source, dict(list(pages.items())[:2]))
+    bump_mtime(source)
+    assert not pack(source)
+    assert len(read_cbz(pack.output_dir / "漫画.cbz")[0]) == 2
+    assert pack(source)
+
+
+def test_content_hash(pack, comic_folder):
+    # 内容哈希在大小和修改时间都不变时也能发现修改
+    page = comic_folder / "1.jpg"
+    assert not pack(comic_folder, content_hash=True)
+    stat = os.stat(page)
+    flip_byte(page)
+    os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert not pack(comic_folder, content_hash=True)
+
+
+def test_batch_shares_state_store(pack, tmp_path, comic_folder, pages, monkeypatch):
+    opened = []
+
+    class CountingStateStore(state_store.StateStore):
+        def __init__(self, output_dir):
+            opened.append(output_dir)
+            super().__init__(output_dir)
+
+    monkeypatch.setattr(state_store, "StateStore", CountingStateStore)
+    source = write_zip(tmp_path / "压缩包.zip", pages)
+    assert not pack(comic_folder)
+    assert not pack(source)
+    assert pack(comic_folder)
+    assert pack(source)
+    # 同一输出目录的项目共用一个数据库连接
+    assert len(opened) == 1
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""合并多个输入：页面按输入顺序写入，只保留合并后生成的ComicInfo.xml"""
+
+import zipfile
+
+import pytest
+import xmltodict
+from conftest import COMIC_FIELDS, make_image, read_cbz, sorted_pages, write_zip
+
+from pack_comic import merge_comics_to_cbz, pack_comic_to_cbz
+
+
+@pytest.fixture
+def inputs(tmp_path, comic_folder, pages):
+    """文件夹、ZIP和CBZ三个输入，及按输入顺序排列的全部页面"""
+    other = {f"{index}.jpg": make_image("p.jpg", 40, 50, seed=index + 10) for index in range(3)}
+    archive = write_zip(tmp_path / "第二话.zip", other)
+    cbz = pack_comic_to_cbz(comic_folder, tmp_path / "第三话.cbz", **COMIC_FIELDS)[0]
+    return [comic_folder, archive, cbz], sorted_pages(pages) + sorted_pages(other) + sorted_pages(pages)
+
+
+def test_merge_in_input_order(tmp_path, inputs):
+    paths, expected = inputs
+    (output,) = merge_comics_to_cbz(paths, tmp_path / "合集.cbz", number=1)
+
+    actual, info = read_cbz(output)
+    assert actual == expected
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist().count("ComicInfo.xml") == 1
+    comic = xmltodict.parse(info)["ComicInfo"]
+    assert comic["Title"] == comic["Series"] == "合集"
+    assert comic["PageCount"] == str(len(expected))
+
+
+def test_merge_split(tmp_path, inputs):
+    paths, expected = inputs
+    volumes = merge_comics_to_cbz(paths, tmp_path / "合集.cbz", number=1, split_pages=4)
+
+    assert [volume.name for volume in volumes] == ["合集 v01.cbz", "合集 v02.cbz", "合集 v03.cbz"]
+    assert [page for volume in volumes for page in read_cbz(volume)[0]] == expected
+
+
+@pytest.mark.parametrize("paths", [[], ["不存在"]])
+def test_merge_invalid_input(tmp_path, paths):
+    with pytest.raises(ValueError):
+        merge_comics_to_cbz([tmp_path / path for path in paths], tmp_path / "合集.cbz", number=1)
+    assert not (tmp_path / "合集.cbz").exists()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""清单文件：通配符条目按顺序应用，精确匹配的名称和路径条目最后应用"""
+
+import json
+
+import pytest
+
+from metadata import load_manifest
+
+
+def write_manifest(tmp_path, entries) -> str:
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_exact_overrides_glob(tmp_path):
+    # 精确条目写在通配符之前，仍然覆盖通配符设置的字段
+    manifest = load_manifest(
+        write_manifest(
+            tmp_path,
+            [
+                {"path": "海贼王/第1卷", "number": "1", "title": "罗曼史黎明"},
+                {"path": "海贼王/*", "series": "海贼王", "number": "99", "manga": "YesAndRightToLeft"},
+                {"path": "第*卷", "title": "通配符标题", "language": "ja"},
+            ],
+        )
+    )
+    fields = manifest.lookup(tmp_path / "海贼王" / "第1卷", root=tmp_path)
+    assert fields == {
+        "series": "海贼王",
+        "number": 1,
+        "title": "罗曼史黎明",
+        "manga": "YesAndRightToLeft",
+        "language": "ja",
+    }
+
+    fields = manifest.lookup(tmp_path / "海贼王" / "第2卷", root=tmp_path)
+    assert fields == {
+        "series": "海贼王",
+        "number": 99,
+        "title": "通配符标题",
+        "manga": "YesAndRightToLeft",
+        "language": "ja",
+    }
+
+
+def test_later_glob_overrides_earlier(tmp_path):
+    manifest = load_manifest(
+        write_manifest(tmp_path, {"*": {"series": "全部"}, "*.zip": {"series": "压缩包"}})
+    )
+    assert manifest.lookup(tmp_path / "a.zip", root=tmp_path) == {"series": "压缩包"}
+    assert manifest.lookup(tmp_path / "a", root=tmp_path) == {"series": "全部"}
+
+
+def test_path_outranks_name(tmp_path):
+    # 名称和路径都精确匹配时，路径条目更具体，后应用
+    manifest = load_manifest(
+        write_manifest(tmp_path, {"系列/第1卷": {"number": 2}, "第1卷": {"number": 1}})
+    )
+    assert manifest.lookup(tmp_path / "系列" / "第1卷", root=tmp_path) == {"number": 2}
+    assert manifest.lookup(tmp_path / "其他" / "第1卷", root=tmp_path) == {"number": 1}
+
+
+def test_csv_and_unmatched(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text(
+        "path,series,number\n第1卷,系列,1\n拼写错误,,2\n", encoding="utf-8-sig"
+    )
+    manifest = load_manifest(path)
+    assert manifest.lookup(tmp_path / "第1卷", root=tmp_path) == {"series": "系列", "number": 1}
+    assert manifest.unmatched() == ["拼写错误"]
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        [{"path": "a", "unknown": "x"}],
+        [{"path": "a", "number": "一"}],
+        [{"path": "a", "age_rating": "不存在的分级"}],
+        [{"series": "缺少路径"}],
+    ],
+)
+def test_invalid_manifest(tmp_path, entries):
+    with pytest.raises(ValueError):
+        load_manifest(write_manifest(tmp_path, entries))
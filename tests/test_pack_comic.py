@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""打包文件夹和ZIP压缩包：与cbz库一次性打包的结果一致，ZIP成员直接复制原始压缩数据"""
+
+import io
+import zipfile
+
+import xmltodict
+from cbz.comic import ComicInfo
+from cbz.constants import AgeRating, Format, Manga, PageType, YesNo
+from cbz.page import PageInfo
+from conftest import COMIC_FIELDS, read_cbz, sorted_pages, write_zip
+
+from pack_comic import pack_comic_to_cbz, pack_compressed_comic_to_cbz
+
+# 每次打包都会变化的元素
+VOLATILE_ELEMENTS = ("FileCreationTime", "FileModifiedTime")
+
+
+def comic_info(data: bytes) -> dict:
+    """解析ComicInfo.xml，去掉每次打包都会变化的元素"""
+    info = dict(xmltodict.parse(data)["ComicInfo"])
+    for name in VOLATILE_ELEMENTS:
+        info.pop(name, None)
+    return info
+
+
+def baseline_cbz(folder) -> bytes:
+    """使用cbz库将整本漫画读入内存后一次性打包，即流式写入之前的实现"""
+    paths = sorted((path for path in folder.iterdir()), key=lambda path: path.name)
+    comic = ComicInfo.from_pages(
+        pages=[PageInfo.load(path=path, type=PageType.STORY) for path in paths],
+        title=folder.name,
+        series=folder.name,
+        number=1,
+        language_iso="zh-CN",
+        format=Format.WEB_COMIC,
+        black_white=YesNo.NO,
+        manga=Manga.YES,
+        age_rating=AgeRating.PENDING,
+    )
+    return comic.pack()
+
+
+def test_folder_matches_baseline(tmp_path, comic_folder, pages):
+    output = tmp_path / "out.cbz"
+    volumes = pack_comic_to_cbz(
+        comic_folder, output, title=comic_folder.name, series=comic_folder.name, number=1
+    )
+
+    assert volumes == [output]
+    expected_pages, expected_info = read_cbz(io.BytesIO(baseline_cbz(comic_folder)))
+    actual_pages, actual_info = read_cbz(output)
+    assert actual_pages == expected_pages == sorted_pages(pages)
+    assert comic_info(actual_info) == comic_info(expected_info)
+
+
+def test_folder_comic_info_is_last(tmp_path, comic_folder):
+    output = tmp_path / "out.cbz"
+    pack_comic_to_cbz(comic_folder, output, **COMIC_FIELDS)
+
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist()[-1] == "ComicInfo.xml"
+
+
+def test_zip_raw_copy_round_trip(tmp_path, pages):
+    # 一个JPEG使用Deflate压缩：auto模式下压缩后更小的成员也直接复制
+    source = write_zip(tmp_path / "漫画.zip", pages, deflated=("10.jpg",))
+    output = tmp_path / "out.cbz"
+    pack_compressed_comic_to_cbz(source, output, **COMIC_FIELDS)
+
+    actual_pages, actual_info = read_cbz(output)
+    assert actual_pages == sorted_pages(pages)
+
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(output) as dest:
+        source_info = src.getinfo("10.jpg")
+        copied = dest.infolist()[sorted(pages).index("10.jpg")]
+        # 原始压缩数据原样复制，没有解压后重新压缩
+        assert copied.compress_type == zipfile.ZIP_DEFLATED
+        assert copied.compress_size == source_info.compress_size
+        assert copied.CRC == source_info.CRC
+
+    info = comic_info(actual_info)
+    assert info["PageCount"] == str(len(pages))
+    sizes = [int(page["@ImageSize"]) for page in info["Pages"]["Page"]]
+    assert sizes == [len(data) for data in sorted_pages(pages)]
+
+
+def test_zip_matches_folder(tmp_path, comic_folder, pages):
+    source = write_zip(tmp_path / "漫画.zip", pages)
+    from_zip = tmp_path / "zip.cbz"
+    from_folder = tmp_path / "folder.cbz"
+    pack_compressed_comic_to_cbz(source, from_zip, **COMIC_FIELDS)
+    pack_comic_to_cbz(comic_folder, from_folder, **COMIC_FIELDS)
+
+    zip_pages, zip_info = read_cbz(from_zip)
+    folder_pages, folder_info = read_cbz(from_folder)
+    assert zip_pages == folder_pages
+    assert comic_info(zip_info)["Pages"] == comic_info(folder_info)["Pages"]
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""修改元数据：原地覆盖最后一个成员ComicInfo.xml，或复制其他成员到新文件"""
+
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+import xmltodict
+from conftest import COMIC_FIELDS, read_cbz, sorted_pages
+
+import retag
+from pack_comic import pack_comic_to_cbz
+from retag import retag_cbz, retag_cbzs
+
+FIELDS = {"series": "海贼王", "number": 3, "age_rating": "Teen"}
+PASSWORD = b"secret"
+
+_retag_one = retag._retag_one
+
+
+def crashing_retag_one(path, fields, in_place):
+    """名称含crash的文件使工作进程异常退出"""
+    if "crash" in os.path.basename(path):
+        os._exit(1)
+    return _retag_one(path, fields, in_place)
+
+
+def zip_crypto_encrypt(data: bytes, check_byte: int) -> bytes:
+    """使用ZIP传统加密（ZipCrypto）加密数据，返回12字节加密头和密文"""
+
+    def crc_byte(crc, byte):
+        return zlib.crc32(bytes([byte]), crc ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+    keys = [0x12345678, 0x23456789, 0x34567890]
+
+    def update(byte):
+        keys[0] = crc_byte(keys[0], byte)
+        keys[1] = ((keys[1] + (keys[0] & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        keys[2] = crc_byte(keys[2], keys[1] >> 24)
+
+    for byte in PASSWORD:
+        update(byte)
+    output = bytearray()
+    for byte in bytes(11) + bytes([check_byte]) + data:
+        temp = keys[2] | 2
+        output.append(byte ^ (((temp * (temp ^ 1)) >> 8) & 0xFF))
+        update(byte)
+    return bytes(output)
+
+
+def add_encrypted_member(path, name: str, data: bytes) -> None:
+    """追加一个使用数据描述符的加密成员，其校验字节取自修改时间"""
+    with zipfile.ZipFile(path, "a") as archive:
+        info = zipfile.ZipInfo(name, date_time=(2020, 1, 2, 3, 4, 6))
+        info.flag_bits = 0x1 | 0x8
+        info.CRC = zlib.crc32(data)
+        info.file_size = len(data)
+        raw_time = 3 << 11 | 4 << 5 | 6 // 2
+        encrypted = zip_crypto_encrypt(data, raw_time >> 8)
+        info.compress_size = len(encrypted)
+        info.header_offset = archive.fp.tell()
+        archive.fp.write(info.FileHeader())
+        archive.fp.write(encrypted)
+        archive.fp.write(struct.pack("<4sLLL", b"PK\x07\x08", info.CRC, len(encrypted), len(data)))
+        archive.filelist.append(info)
+        archive.NameToInfo[name] = info
+        archive.start_dir = archive.fp.tell()
+        archive._didModify = True
+
+
+@pytest.fixture
+def cbz(tmp_path, comic_folder):
+    """ComicPacker生成的CBZ，ComicInfo.xml是最后一个成员"""
+    output = tmp_path / "out.cbz"
+    pack_comic_to_cbz(comic_folder, output, **COMIC_FIELDS)
+    return output
+
+
+def assert_retagged(path, pages):
+    actual_pages, info = read_cbz(path)
+    assert actual_pages == sorted_pages(pages)
+    comic = xmltodict.parse(info)["ComicInfo"]
+    assert comic["Series"] == "海贼王"
+    assert comic["Number"] == "3"
+    assert comic["AgeRating"] == "Teen"
+    # 页面信息保持不变，仍在末尾
+    assert list(comic)[-2:] == ["PageCount", "Pages"]
+    assert len(comic["Pages"]["Page"]) == len(pages)
+
+
+def test_append(cbz, pages):
+    assert retag_cbz(cbz, FIELDS) == "append"
+    assert_retagged(cbz, pages)
+
+    # 再次修改时仍然原地覆盖，不会留下旧的ComicInfo.xml
+    assert retag_cbz(cbz, {"title": "新标题"}) == "append"
+    with zipfile.ZipFile(cbz) as archive:
+        assert archive.namelist().count("ComicInfo.xml") == 1
+    assert_retagged(cbz, pages)
+
+
+def test_rewrite_when_not_in_place(cbz, pages):
+    assert retag_cbz(cbz, FIELDS, in_place=False) == "rewrite"
+    assert_retagged(cbz, pages)
+
+
+def test_rewrite_when_comic_info_first(tmp_path, cbz, pages):
+    # 其他工具生成的CBZ，ComicInfo.xml在页面之前
+    moved = tmp_path / "moved.cbz"
+    with zipfile.ZipFile(cbz) as src, zipfile.ZipFile(moved, "w") as dest:
+        infos = src.infolist()
+        for info in infos[-1:] + infos[:-1]:
+            dest.writestr(info, src.read(info))
+
+    assert retag_cbz(moved, FIELDS) == "rewrite"
+    assert_retagged(moved, pages)
+
+
+def test_missing_comic_info(tmp_path):
+    path = tmp_path / "empty.cbz"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("1.jpg", b"data")
+    with pytest.raises(ValueError):
+        retag_cbz(path, FIELDS)
+
+
+def test_invalid_value(cbz):
+    before = cbz.read_bytes()
+    with pytest.raises(ValueError):
+        retag_cbz(cbz, {"age_rating": "不存在的分级"})
+    assert cbz.read_bytes() == before
+
+
+def test_rewrite_keeps_encrypted_member_readable(tmp_path, cbz, pages):
+    data = pages["1.jpg"]
+    add_encrypted_member(cbz, "secret.jpg", data)
+    with zipfile.ZipFile(cbz) as archive:
+        assert archive.read("secret.jpg", pwd=PASSWORD) == data
+
+    # 加密成员在ComicInfo.xml之后，只能复制到新文件
+    assert retag_cbz(cbz, FIELDS) == "rewrite"
+    with zipfile.ZipFile(cbz) as archive:
+        assert archive.getinfo("secret.jpg").flag_bits & 0x9 == 0x9
+        assert archive.read("secret.jpg", pwd=PASSWORD) == data
+        assert b"<Series>" in archive.read("ComicInfo.xml")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_retag_many(tmp_path, cbz, workers):
+    other = tmp_path / "other.cbz"
+    other.write_bytes(cbz.read_bytes())
+    paths = [cbz, other, tmp_path / "不存在.cbz"]
+    results = {os.path.basename(result.path): result for result in retag_cbzs(paths, FIELDS, workers)}
+    assert {name: result.mode for name, result in results.items()} == {
+        "out.cbz": "append",
+        "other.cbz": "append",
+        "不存在.cbz": None,
+    }
+
+
+def test_retag_worker_crash(tmp_path, cbz, monkeypatch):
+    # 进程池在子进程中调用retag._retag_one，替换后由fork的工作进程继承
+    monkeypatch.setattr(retag, "_retag_one", crashing_retag_one)
+    paths = []
+    for name in ("a", "crash", "b", "c"):
+        path = tmp_path / f"{name}.cbz"
+        path.write_bytes(cbz.read_bytes())
+        paths.append(path)
+    results = {os.path.basename(result.path): result for result in retag_cbzs(paths, FIELDS, 2)}
+
+    assert sorted(results) == ["a.cbz", "b.cbz", "c.cbz", "crash.cbz"]
+    assert [name for name, result in results.items() if not result.ok] == ["crash.cbz"]
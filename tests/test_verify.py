@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""CBZ校验：CRC、ComicInfo.xml页数和页面大小、页面文件头，以及工作进程崩溃时继续校验"""
+
+import os
+import zipfile
+
+import pytest
+from conftest import COMIC_FIELDS
+
+import verify
+from pack_comic import pack_comic_to_cbz
+from verify import iter_cbz_files, verify_cbz, verify_cbzs
+
+_verify_cbz = verify.verify_cbz
+
+
+def crashing_verify_cbz(path, header_samples=None):
+    """名称含crash的文件使工作进程异常退出"""
+    if "crash" in os.path.basename(path):
+        os._exit(1)
+    return _verify_cbz(path, header_samples)
+
+
+@pytest.fixture
+def cbz(tmp_path, comic_folder):
+    output = tmp_path / "good.cbz"
+    pack_comic_to_cbz(comic_folder, output, **COMIC_FIELDS)
+    return output
+
+
+def rewrite_cbz(source, dest, replace=None, skip=()):
+    """复制CBZ，replace为成员名 -> 新内容，skip中的成员不复制"""
+    replace = replace or {}
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(dest, "w") as out:
+        for info in src.infolist():
+            if info.filename not in skip:
+                out.writestr(info, replace.get(info.filename, src.read(info)))
+    return dest
+
+
+def test_valid(cbz, pages):
+    result = verify_cbz(cbz, header_samples=0)
+    assert result.ok
+    assert result.pages == result.declared_pages == len(pages)
+
+
+def test_corrupted_member(tmp_path, cbz):
+    data = bytearray(cbz.read_bytes())
+    with zipfile.ZipFile(cbz) as archive:
+        info = archive.infolist()[0]
+    # 修改第一个成员的数据，使CRC不一致
+    offset = info.header_offset + 30 + len(info.filename.encode()) + len(info.extra) + 100
+    data[offset] ^= 0xFF
+    corrupted = tmp_path / "corrupted.cbz"
+    corrupted.write_bytes(bytes(data))
+
+    result = verify_cbz(corrupted)
+    assert not result.ok
+    assert info.filename in result.errors[0]
+
+
+def test_missing_comic_info(tmp_path, cbz):
+    result = verify_cbz(rewrite_cbz(cbz, tmp_path / "bad.cbz", skip=("ComicInfo.xml",)))
+    assert result.errors == ["缺少ComicInfo.xml"]
+
+
+def test_page_count_mismatch(tmp_path, cbz):
+    with zipfile.ZipFile(cbz) as archive:
+        first = archive.namelist()[0]
+    result = verify_cbz(rewrite_cbz(cbz, tmp_path / "bad.cbz", skip=(first,)))
+    assert not result.ok
+    assert result.declared_pages == result.pages + 1
+
+
+def test_bad_header(tmp_path, cbz):
+    with zipfile.ZipFile(cbz) as archive:
+        first = archive.getinfo(archive.namelist()[0])
+        data = b"\0" * first.file_size
+    bad = rewrite_cbz(cbz, tmp_path / "bad.cbz", replace={first.filename: data})
+    assert verify_cbz(bad).ok
+    assert not verify_cbz(bad, header_samples=0).ok
+
+
+def test_not_a_zip(tmp_path):
+    path = tmp_path / "broken.cbz"
+    path.write_bytes(b"not a zip")
+    result = verify_cbz(path)
+    assert result.errors[0].startswith("无法打开")
+
+
+def test_iter_cbz_files(tmp_path, cbz):
+    (tmp_path / "sub").mkdir()
+    nested = rewrite_cbz(cbz, tmp_path / "sub" / "nested.cbz")
+    (tmp_path / "sub" / "other.zip").write_bytes(b"")
+    assert list(iter_cbz_files(tmp_path)) == [str(cbz), str(nested)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_many(tmp_path, cbz, workers):
+    paths = [cbz, rewrite_cbz(cbz, tmp_path / "other.cbz"), tmp_path / "不存在.cbz"]
+    results = {os.path.basename(result.path): result.ok for result in verify_cbzs(paths, workers)}
+    assert results == {"good.cbz": True, "other.cbz": True, "不存在.cbz": False}
+
+
+def test_worker_crash(tmp_path, cbz, monkeypatch):
+    # 进程池在子进程中调用verify.verify_cbz，替换后由fork的工作进程继承
+    monkeypatch.setattr(verify, "verify_cbz", crashing_verify_cbz)
+    paths = [rewrite_cbz(cbz, tmp_path / f"{name}.cbz") for name in ("a", "crash", "b", "c")]
+    results = {os.path.basename(result.path): result for result in verify_cbzs(paths, 2)}
+
+    assert sorted(results) == ["a.cbz", "b.cbz", "c.cbz", "crash.cbz"]
+    assert [name for name, result in results.items() if not result.ok] == ["crash.cbz"]
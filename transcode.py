@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 图片转码
+将PNG、BMP、TIFF等无损页面重新编码为WebP或JPEG，或将超出设备尺寸的页面缩小，
+在进程池中并行执行并按原顺序返回结果。同一进程中的多个项目复用一个转码进程池
+"""
+
+import os
+from collections import deque
+from io import BytesIO
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from image_probe import probe_image
+
+# 支持的转码目标格式：格式名 -> (Pillow格式, 页面后缀)
+TRANSCODE_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpeg")}
+# 需要转码的页面后缀，GIF可能是动图，不进行转码
+TRANSCODE_SOURCE_SUFFIXES = {".png", ".bmp", ".tif", ".tiff"}
+# 实际图片格式需要在其中才会转码，避免后缀与内容不符时误处理
+TRANSCODE_SOURCE_FORMATS = {"PNG", "BMP", "TIFF"}
+# 默认编码质量
+DEFAULT_QUALITY = 85
+# WebP支持的最大边长，超出时保留原始页面
+WEBP_MAX_SIZE = 16383
+
+# 当前进程复用的转码进程池及其工作进程数，参见_get_pool
+_pool = None
+_pool_workers = 0
+
+
+class TranscodeOptions(NamedTuple):
+    """转码设置
+
+    format为None时不转换格式，只缩小超出max_width或max_height的页面，缩小后保留原格式。
+    """
+
+    format: Optional[str] = None
+    quality: int = DEFAULT_QUALITY
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+
+    @property
+    def resize(self) -> bool:
+        """是否限制页面尺寸"""
+        return self.max_width is not None or self.max_height is not None
+
+
+def is_transcode_candidate(name: str) -> bool:
+    """根据文件名判断页面是否需要转码"""
+    return os.path.splitext(name)[1].lower() in TRANSCODE_SOURCE_SUFFIXES
+
+
+def needs_processing(name: str, options: TranscodeOptions) -> bool:
+    """根据文件名判断页面是否需要交给工作进程处理
+
+    限制尺寸时所有页面都需要检查尺寸，否则只有需要转码的格式才需要处理。
+    """
+    return options.resize or (
+        options.format is not None and is_transcode_candidate(name)
+    )
+
+
+def fit_size(
+    width: int, height: int, options: TranscodeOptions
+) -> Optional[tuple[int, int]]:
+    """计算等比缩小到尺寸限制以内的大小
+
+    Returns:
+        Optional[tuple[int, int]]: 缩小后的宽度和高度，页面已在限制以内时返回None
+    """
+    scale = 1.0
+    if options.max_width is not None:
+        scale = min(scale, options.max_width / width)
+    if options.max_height is not None:
+        scale = min(scale, options.max_height / height)
+    if scale >= 1.0:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _prepare_image(image, target: str):
+    """将图片转换为目标格式支持的颜色模式"""
+    from PIL import Image
+
+    if image.mode.startswith("I;16") or image.mode == "I":
+        # 16位灰度图缩放到8位
+        image = image.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if target not in ("JPEG", "WEBP"):
+        # 保留原格式时只处理缩放所需的调色板和二值图片
+        if image.mode in ("P", "1"):
+            return image.convert("RGBA" if has_alpha else "RGB")
+        return image
+
+    if target == "JPEG":
+        if has_alpha:
+            # JPEG不支持透明度，合成到白色背景上
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+        return image if image.mode in ("RGB", "L", "CMYK") else image.convert("RGB")
+
+    if has_alpha:
+        return image if image.mode == "RGBA" else image.convert("RGBA")
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def transcode_image(data: bytes, options: TranscodeOptions) -> Optional[bytes]:
+    """将一页图片缩小到尺寸限制以内并重新编码为目标格式
+
+    JPEG页面缩小时使用draft模式解码，解码器直接按1/2、1/4或1/8的比例输出，
+    大尺寸扫描图无需完整解码。
+
+    Args:
+        data (bytes): 原始图片内容
+        options (TranscodeOptions): 转码设置
+
+    Returns:
+        Optional[bytes]: 处理后的图片内容。页面既不需要转码也不需要缩小、只转换格式但结果
+            不比原始内容小，或无法处理时返回None，调用方应保留原始页面
+    """
+    # 注意: Pillow只在工作进程真正转码时导入，主程序导入本模块时无需加载
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            convert = (
+                options.format is not None
+                and image.format in TRANSCODE_SOURCE_FORMATS
+            )
+            size = fit_size(*image.size, options) if options.resize else None
+            if not convert and size is None:
+                return None
+            if getattr(image, "is_animated", False):
+                # 动图缩放或转码会丢失帧
+                return None
+
+            target = TRANSCODE_FORMATS[options.format][0] if convert else image.format
+            if size is not None:
+                if image.format == "JPEG":
+                    image.draft(None, size)
+                image = _prepare_image(image, target)
+                image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            else:
+                image = _prepare_image(image, target)
+            if target == "WEBP" and max(image.size) > WEBP_MAX_SIZE:
+                return None
+
+            output = BytesIO()
+            if target in ("JPEG", "WEBP"):
+                image.save(output, target, quality=options.quality)
+            else:
+                image.save(output, target)
+    except (OSError, ValueError):
+        return None
+    if size is None and output.tell() >= len(data):
+        # 只转换格式时，重新编码没有减小体积则保留原始页面
+        return None
+    return output.getvalue()
+
+
+def transcode_file(path: str, options: TranscodeOptions) -> Optional[bytes]:
+    """读取并处理一个图片文件，供进程池中的工作进程调用"""
+    with open(path, "rb") as f:
+        if options.resize and not (
+            options.format is not None and is_transcode_candidate(path)
+        ):
+            # 只需缩放时先解析文件头，尺寸在限制以内的页面无需读取整个文件
+            info = probe_image(f)
+            if info is not None and fit_size(info[1], info[2], options) is None:
+                return None
+            f.seek(0)
+        data = f.read()
+    return transcode_image(data, options)
+
+
+def iter_transcoded(
+    paths: Iterable, options: TranscodeOptions, workers: int = 1
+) -> Iterator[tuple[object, Optional[bytes]]]:
+    """并行转码或缩小页面，按输入顺序返回结果
+
+    同时提交的页面数量有上限，内存中最多保留workers*2个已转码的页面。
+
+    Args:
+        paths (Iterable): 按顺序排列的页面，可以是路径或DirEntry
+        options (TranscodeOptions): 转码设置
+        workers (int): 工作进程数，为1时在当前进程中转码，否则使用当前进程复用的进程池
+
+    Yields:
+        tuple[object, Optional[bytes]]: 输入的页面和处理后的内容，不需要处理的页面内容为None
+    """
+    global _pool
+
+    if workers <= 1:
+        for path in paths:
+            data = None
+            if needs_processing(os.fspath(path), options):
+                data = transcode_file(os.fspath(path), options)
+            yield path, data
+        return
+
+    from concurrent.futures.process import BrokenProcessPool
+
+    executor = _get_pool(workers)
+    pending = deque()
+    try:
+        for path in paths:
+            future = None
+            if needs_processing(os.fspath(path), options):
+                future = executor.submit(transcode_file, os.fspath(path), options)
+            pending.append((path, future))
+
+            if len(pending) >= workers * 2:
+                path, future = pending.popleft()
+                yield path, future.result() if future else None
+
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result() if future else None
+    except BrokenProcessPool:
+        # 转码进程异常退出后进程池无法继续使用，下一个项目重新创建
+        if _pool is executor:
+            _pool = None
+        raise
+    finally:
+        # 提前结束时（例如写入失败）取消尚未开始的转码，进程池留给后续项目
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
+
+
+def _get_pool(workers: int):
+    """获取当前进程复用的转码进程池，工作进程数变化时重新创建
+
+    批量处理时每个工作进程依次处理多个项目，复用进程池避免为每个项目重新启动转码进程。
+    """
+    global _pool, _pool_workers
+    import multiprocessing.util
+    from concurrent.futures import ProcessPoolExecutor
+
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+        # 工作进程退出时会等待所有子进程结束，需要在此之前关闭进程池，否则会一直等待。
+        # 优先级需高于进程池内部队列的清理（exitpriority=10），关闭时还要通过队列通知转码进程
+        multiprocessing.util.Finalize(None, shutdown_pool, exitpriority=100)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """关闭当前进程复用的转码进程池，进程退出时会自动调用"""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
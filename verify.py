@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker CBZ校验
+并行检查CBZ文件能否打开、所有成员的CRC是否正确、ComicInfo.xml的页数和页面大小
+是否与图片成员一致，并可抽样解析页面文件头。只读取压缩数据，不解码图片。
+"""
+
+import os
+import zipfile
+from typing import Iterable, Iterator, NamedTuple, Optional
+from xml.etree import ElementTree
+
+from discovery import is_image_member, walk
+from image_probe import probe_image
+from worker_pool import WorkerPool
+
+# ComicInfo.xml在CBZ中的文件名
+COMIC_INFO_NAME = "ComicInfo.xml"
+# 校验CRC时每次读取的字节数
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+class VerifyResult(NamedTuple):
+    """单个CBZ文件的校验结果"""
+
+    path: str
+    # 图片成员数量
+    pages: int
+    # ComicInfo.xml中记录的页数，缺少或无法解析时为None
+    declared_pages: Optional[int]
+    # 发现的问题，为空表示校验通过
+    errors: list[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """完整读取一个成员，zipfile在读到末尾时校验CRC，不一致时抛出BadZipFile"""
+    with archive.open(info) as f:
+        while f.read(READ_BUFFER_SIZE):
+            pass
+
+
+def _sample_indexes(count: int, samples: int) -> list[int]:
+    """在count个页面中均匀选取samples个，包括第一页和最后一页；samples为0时返回全部"""
+    if samples <= 0 or samples >= count:
+        return list(range(count))
+    if samples == 1:
+        return [0]
+    step = (count - 1) / (samples - 1)
+    return sorted({round(i * step) for i in range(samples)})
+
+
+def _check_comic_info(data: bytes, images: list[zipfile.ZipInfo], errors: list[str]):
+    """检查ComicInfo.xml的页数和页面大小是否与图片成员一致
+
+    Returns:
+        Optional[int]: ComicInfo.xml中记录的页数
+    """
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError as e:
+        errors.append(f"{COMIC_INFO_NAME}无法解析: {e}")
+        return None
+
+    declared = None
+    page_count = root.findtext("PageCount")
+    if page_count is not None:
+        try:
+            declared = int(page_count)
+        except ValueError:
+            errors.append(f"{COMIC_INFO_NAME}中的PageCount无效: {page_count}")
+
+    pages = root.findall("Pages/Page")
+    if declared is None:
+        declared = len(pages)
+    elif declared != len(pages):
+        errors.append(f"PageCount为{declared}，但Pages中有{len(pages)}页")
+
+    if declared != len(images):
+        errors.append(f"{COMIC_INFO_NAME}记录{declared}页，但有{len(images)}个图片成员")
+        return declared
+
+    for index, (page, info) in enumerate(zip(pages, images)):
+        size = page.get("ImageSize")
+        if size is not None and size.isdigit() and int(size) != info.file_size:
+            errors.append(
+                f"第{index + 1}页大小为{info.file_size}字节，与{COMIC_INFO_NAME}记录的{size}字节不一致"
+            )
+    return declared
+
+
+def verify_cbz(path, header_samples: Optional[int] = None) -> VerifyResult:
+    """校验单个CBZ文件
+
+    依次检查：文件能否作为ZIP打开；所有成员能否完整读取且CRC正确；ComicInfo.xml是否存在，
+    其页数和各页大小是否与图片成员一致；可选地抽样解析页面文件头。
+
+    Args:
+        path: CBZ文件路径
+        header_samples (int, optional): 抽样解析文件头的页数，0表示全部页面。默认不解析
+
+    Returns:
+        VerifyResult: 校验结果
+    """
+    path = os.fspath(path)
+    errors = []
+    try:
+        archive = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile) as e:
+        return VerifyResult(path, 0, None, [f"无法打开: {e}"])
+
+    with archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        images = [info for info in infos if is_image_member(info.filename)]
+
+        for info in infos:
+            try:
+                _read_member(archive, info)
+            except (zipfile.BadZipFile, OSError, RuntimeError, NotImplementedError) as e:
+                errors.append(f"{info.filename}: {e}")
+
+        declared = None
+        try:
+            comic_info = archive.read(COMIC_INFO_NAME)
+        except KeyError:
+            errors.append(f"缺少{COMIC_INFO_NAME}")
+        except (zipfile.BadZipFile, OSError) as e:
+            errors.append(f"{COMIC_INFO_NAME}: {e}")
+        else:
+            declared = _check_comic_info(comic_info, images, errors)
+
+        if header_samples is not None:
+            for index in _sample_indexes(len(images), header_samples):
+                info = images[index]
+                try:
+                    with archive.open(info) as f:
+                        result = probe_image(f)
+                except (zipfile.BadZipFile, OSError, RuntimeError):
+                    result = None
+                if result is None:
+                    errors.append(f"{info.filename}: 无法解析图片文件头")
+
+    return VerifyResult(path, len(images), declared, errors)
+
+
+def iter_cbz_files(root, newer_than: Optional[float] = None) -> Iterator[str]:
+    """按路径顺序返回目录树中的CBZ文件
+
+    Args:
+        root: CBZ文件或目录路径
+        newer_than (float, optional): 只返回修改时间不早于该时间戳的文件
+
+    Yields:
+        str: CBZ文件路径
+    """
+    if not os.path.isdir(root):
+        yield os.fspath(root)
+        return
+
+    for entry in walk(root):
+        if not entry.name.lower().endswith(".cbz") or not entry.is_file():
+            continue
+        if newer_than is not None and entry.stat().st_mtime < newer_than:
+            continue
+        yield entry.path
+
+
+def verify_cbzs(
+    paths: Iterable, workers: int = 1, header_samples: Optional[int] = None
+) -> Iterator[VerifyResult]:
+    """使用进程池并行校验多个CBZ文件，结果按完成顺序返回
+
+    每个工作进程一次校验一个文件，大文件不会阻塞其他文件的结果。同时提交的文件数量有上限，
+    可以在遍历目录树的同时陆续提交。工作进程异常退出（例如内存不足被终止）时，受影响的文件
+    单独重新校验，仍然崩溃的文件报告为校验失败，其余文件继续校验。
+
+    Args:
+        paths (Iterable): CBZ文件路径
+        workers (int): 工作进程数，为1时在当前进程中校验
+        header_samples (int, optional): 每个文件抽样解析文件头的页数，0表示全部页面。默认不解析
+
+    Yields:
+        VerifyResult: 每个文件的校验结果
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    def on_error(job, error):
+        path = os.fspath(job[0])
+        if isinstance(error, BrokenProcessPool):
+            # 崩溃时所有未完成的文件都会报告BrokenProcessPool，单独重新校验以确认是否由该文件导致
+            try:
+                return pool.run_isolated(verify_cbz, *job)
+            except BrokenProcessPool:
+                return VerifyResult(path, 0, None, ["校验时工作进程异常退出"])
+        return VerifyResult(path, 0, None, [f"校验失败: {type(error).__name__}: {error}"])
+
+    # 为1时在当前进程中校验
+    with WorkerPool(workers if workers > 1 else 0) as pool:
+        yield from pool.imap(
+            verify_cbz,
+            ((path, header_samples) for path in paths),
+            on_error,
+            ordered=False,
+        )
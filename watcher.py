@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 监视目录
+持续监视输入目录，在新增或变化的项目停止变化后返回，供常驻进程池处理。
+Linux上使用inotify接收文件系统事件，其他平台或inotify不可用时定期轮询。
+"""
+
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional
+
+from discovery import is_ignored_name, iter_items_at
+from state_store import compute_fingerprint
+
+# inotify事件掩码，参见inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+# 不监视IN_MODIFY，大文件写入时会产生大量事件，写入结束时的IN_CLOSE_WRITE已足够
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# 默认轮询间隔（秒）
+DEFAULT_INTERVAL = 2.0
+# 默认稳定等待时间（秒），项目在这段时间内没有变化才会被处理
+DEFAULT_SETTLE = 3.0
+
+
+class _Inotify:
+    """通过ctypes调用libc的inotify接口，递归监视目录树"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._get_errno = ctypes.get_errno
+        self._paths = {}
+
+    def add_tree(self, root, exclude=None) -> None:
+        """监视目录及其所有子目录，exclude中的目录不监视
+
+        Raises:
+            OSError: 超出系统的监视数量限制等无法添加监视的情况
+        """
+        stack = [os.fspath(root)]
+        while stack:
+            path = stack.pop()
+            if exclude and _is_within(path, exclude):
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                errno = self._get_errno()
+                # 目录在添加监视前已被删除时忽略
+                if errno in (2, 20):
+                    continue
+                raise OSError(errno, os.strerror(errno), path)
+            self._paths[wd] = path
+            try:
+                with os.scandir(path) as it:
+                    stack.extend(
+                        entry.path
+                        for entry in it
+                        if entry.is_dir(follow_symlinks=False)
+                        and not is_ignored_name(entry.name)
+                    )
+            except OSError:
+                continue
+
+    def read(self, timeout: float) -> Optional[list[str]]:
+        """等待并读取事件
+
+        Args:
+            timeout (float): 最长等待时间（秒）
+
+        Returns:
+            Optional[list[str]]: 发生变化的路径，事件队列溢出时返回None，调用方应完整重新扫描
+        """
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return []
+
+        paths = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._paths.get(wd)
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # 新目录（包括整个移入的目录树）需要加入监视，无法添加时完整重新扫描
+                    try:
+                        self.add_tree(path)
+                    except OSError:
+                        overflow = True
+                paths.append(path)
+        return None if overflow else paths
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _is_within(path, parent) -> bool:
+    """判断路径是否为parent本身或位于其中"""
+    path = os.path.abspath(path)
+    parent = os.path.abspath(parent)
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+class ItemWatcher:
+    """监视输入目录，返回已经停止变化的新增或变化项目
+
+    项目的识别规则与批量处理相同。项目被发现后需要在settle秒内保持指纹（大小和修改时间）
+    不变才会返回，避免处理仍在复制中的文件夹或压缩包。已返回的项目再次变化时会重新返回。
+
+    Args:
+        root: 输入目录路径
+        settle (float): 稳定等待时间（秒）
+        interval (float): 轮询间隔（秒），使用inotify时为最长等待时间
+        exclude (optional): 不监视的目录，例如位于输入目录中的输出目录
+        use_inotify (bool): 是否尝试使用inotify。默认为True
+        onerror (callable, optional): 无法访问子目录时以OSError为参数调用
+    """
+
+    def __init__(
+        self,
+        root,
+        settle: float = DEFAULT_SETTLE,
+        interval: float = DEFAULT_INTERVAL,
+        exclude=None,
+        use_inotify: bool = True,
+        onerror=None,
+    ):
+        self.root = os.fspath(root)
+        self.settle = settle
+        self.interval = interval
+        self.exclude = exclude
+        self.onerror = onerror
+        # 已返回的项目及其指纹
+        self._known = {}
+        # 等待稳定的项目：项目 -> (指纹, 最近一次变化的时间)
+        self._pending = {}
+        # 需要重新扫描的输入目录直接子项，None表示需要完整扫描
+        self._dirty = None
+        self._last_scan = 0.0
+
+        self._inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+                self._inotify.add_tree(self.root, exclude)
+            except (OSError, AttributeError):
+                # inotify不可用或超出监视数量限制时改为轮询
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+
+    @property
+    def mode(self) -> str:
+        """当前使用的监视方式: inotify或polling"""
+        return "inotify" if self._inotify is not None else "polling"
+
+    def poll(self) -> list[str]:
+        """等待文件系统变化，返回已经稳定、需要处理的项目
+
+        最多等待interval秒，有项目等待稳定时会在其稳定时间到达时返回。
+
+        Returns:
+            list[str]: 按路径排序的待处理项目，可能为空
+        """
+        timeout = self.interval
+        now = time.monotonic()
+        for _, since in self._pending.values():
+            timeout = min(timeout, max(since + self.settle - now, 0))
+
+        if self._dirty is not None:
+            if self._inotify is not None:
+                changed = self._inotify.read(timeout)
+                if changed is None:
+                    self._dirty = None
+                else:
+                    self._mark_changed(changed)
+            else:
+                time.sleep(timeout)
+                if time.monotonic() - self._last_scan >= self.interval:
+                    self._dirty = None
+
+        self._rescan()
+        return self._collect_stable()
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _top_level(self, path) -> str:
+        """获取路径所在的输入目录直接子项"""
+        relative = os.path.relpath(path, self.root)
+        return os.path.join(self.root, relative.split(os.sep)[0])
+
+    def _mark_changed(self, paths) -> None:
+        for path in paths:
+            if self.exclude and _is_within(path, self.exclude):
+                continue
+            if os.path.abspath(path) == os.path.abspath(self.root):
+                continue
+            self._dirty.add(self._top_level(path))
+
+    def _rescan(self) -> None:
+        """扫描发生变化的部分，更新等待稳定的项目"""
+        if self._dirty is None:
+            # 完整扫描输入目录
+            self._last_scan = time.monotonic()
+            tops = [self.root]
+            stale = set(self._known) | set(self._pending)
+        else:
+            tops = sorted(self._dirty)
+            stale = {
+                item
+                for item in set(self._known) | set(self._pending)
+                if self._top_level(item) in self._dirty
+            }
+        self._dirty = set()
+
+        now = time.monotonic()
+        for top in tops:
+            try:
+                items = list(iter_items_at(top, self.onerror))
+            except OSError:
+                items = []
+            for item in items:
+                if self.exclude and _is_within(item, self.exclude):
+                    continue
+                stale.discard(item)
+                self._observe(item, now)
+
+        # 已被删除或不再是项目的路径
+        for item in stale:
+            self._known.pop(item, None)
+            self._pending.pop(item, None)
+
+    def _observe(self, item, now) -> None:
+        try:
+            fingerprint = compute_fingerprint(item)
+        except OSError:
+            return
+        if self._known.get(item) == fingerprint:
+            self._pending.pop(item, None)
+            return
+        pending = self._pending.get(item)
+        if pending is None or pending[0] != fingerprint:
+            self._pending[item] = (fingerprint, now)
+
+    def _collect_stable(self) -> list[str]:
+        """重新检查等待稳定的项目，返回稳定时间已到且指纹未变化的项目"""
+        now = time.monotonic()
+        ready = []
+        for item, (fingerprint, since) in sorted(self._pending.items()):
+            if now - since < self.settle:
+                continue
+            try:
+                current = compute_fingerprint(item)
+            except OSError:
+                self._pending.pop(item)
+                continue
+            if current != fingerprint:
+                self._pending[item] = (current, now)
+                continue
+            del self._pending[item]
+            self._known[item] = fingerprint
+            ready.append(item)
+        return ready
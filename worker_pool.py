@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ComicPacker 工作进程池
+可重建的进程池，以及批量处理共用的提交方式：同时提交的任务数量有上限，
+任务可以在遍历输入的同时陆续提交；工作进程异常退出时，对应任务单独报告失败，
+进程池重建后重新提交其余未完成的任务。
+"""
+
+from typing import Callable, Iterable, Iterator
+
+
+class WorkerPool:
+    """可重建的进程池，进程池在首次提交时创建，工作进程异常退出后通过restart重新创建
+
+    Example:
+        with WorkerPool(4, initializer=init) as pool:
+            for result in pool.imap(work, jobs, on_error=lambda job, e: None):
+                ...
+    """
+
+    def __init__(self, workers: int, **pool_options):
+        """
+        Args:
+            workers (int): 工作进程数。为0时在当前进程中依次执行任务
+            **pool_options: 创建ProcessPoolExecutor的额外参数，例如initializer和initargs
+        """
+        self.workers = workers
+        self.pool_options = pool_options
+        self._executor = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def submit(self, fn: Callable, *args):
+        """提交一个任务
+
+        Returns:
+            concurrent.futures.Future: 任务结果。工作进程异常退出时future抛出BrokenProcessPool
+        """
+        from concurrent.futures import Future, ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, **self.pool_options
+            )
+        try:
+            return self._executor.submit(fn, *args)
+        except BrokenProcessPool as e:
+            # 进程池已在之前的任务中损坏，与运行中崩溃的任务一样通过future报告
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def restart(self) -> None:
+        """放弃已损坏的进程池，下次提交时重新创建"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def run_isolated(self, fn: Callable, *args):
+        """在新建的单进程池中单独执行一个任务
+
+        工作进程异常退出时，同一进程池中所有未完成的任务都会抛出BrokenProcessPool，
+        单独重新执行才能区分真正导致崩溃的任务和受牵连的任务。
+
+        Returns:
+            fn的返回值
+
+        Raises:
+            BrokenProcessPool: 任务单独执行时工作进程仍然异常退出
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=1, **self.pool_options) as executor:
+            return executor.submit(fn, *args).result()
+
+    def imap(
+        self,
+        fn: Callable,
+        jobs: Iterable[tuple],
+        on_error: Callable,
+        ordered: bool = True,
+        window: int = 0,
+    ) -> Iterator:
+        """批量执行任务，按输入顺序（或完成顺序）逐个返回结果
+
+        Args:
+            fn (Callable): 在工作进程中执行的函数
+            jobs (Iterable[tuple]): 每个任务传给fn的参数元组
+            on_error (Callable): on_error(job, error)，任务抛出异常或工作进程异常退出时调用，
+                返回值作为该任务的结果。工作进程异常退出时，调用前进程池已放弃，
+                报告的任务不一定是导致崩溃的任务，应通过run_isolated单独重试
+            ordered (bool): 是否按输入顺序返回结果，否则按完成顺序返回
+            window (int): 同时提交的任务数上限，默认为工作进程数的两倍
+
+        Yields:
+            每个任务的结果
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from concurrent.futures.process import BrokenProcessPool
+
+        jobs = iter(jobs)
+        window = window or max(self.workers, 1) * 2
+        pending = []
+
+        while True:
+            # 保持进程池中有足够的待处理任务
+            while len(pending) < window:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                pending.append((job, self.submit(fn, *job)))
+            if not pending:
+                break
+
+            if ordered:
+                finished = [pending[0]]
+            else:
+                done, _ = wait([f for _, f in pending], return_when=FIRST_COMPLETED)
+                finished = [task for task in pending if task[1] in done]
+
+            for task in finished:
+                pending.remove(task)
+                job, future = task
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    # 工作进程异常退出：放弃进程池，报告当前任务，
+                    # 然后重新提交其余未成功完成的任务
+                    self.restart()
+                    yield on_error(job, e)
+                    pending = [
+                        (other, f)
+                        if f.done() and f.exception() is None
+                        else (other, self.submit(fn, *other))
+                        for other, f in pending
+                    ]
+                    break
+                except Exception as e:
+                    yield on_error(job, e)
+
+    def close(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """关闭进程池
+
+        Args:
+            wait (bool): 是否等待已提交的任务完成
+            cancel_futures (bool): 是否取消尚未开始的任务
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+            self._executor = None